@@ -1,3 +1,4 @@
+import threading
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -18,6 +19,26 @@ def build_agent() -> WorkflowAgent:
     return WorkflowAgent()
 
 
+_shared_agent: WorkflowAgent | None = None
+_shared_agent_lock = threading.Lock()
+
+
+def get_shared_agent() -> WorkflowAgent:
+    """Return the process-wide agent, built and warmed on first use.
+
+    WorkflowAgent keeps no per-session state, so every chat session can share
+    one instance together with its skill index, tool contracts and BAML
+    runtime; per-session state lives in SessionMemory.
+    """
+    global _shared_agent
+    with _shared_agent_lock:
+        if _shared_agent is None:
+            agent = build_agent()
+            agent.warm()
+            _shared_agent = agent
+    return _shared_agent
+
+
 def main():
     import asyncio
 
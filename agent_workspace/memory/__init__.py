@@ -9,6 +9,7 @@ from .session_memory import (
     StepCategory,
     WorkingStep,
 )
+from .summarizer import summarize_simple
 
 __all__ = [
     "SessionMemory",
@@ -18,10 +19,11 @@ __all__ = [
     "StepCategory",
     "WorkingStep",
     "extract_facts_simple",
+    "summarize_simple",
 ]
 
 
 def get_chainlit_data_layer():
-    """Get the Chainlit data layer (lazy import to avoid circular deps)."""
-    from .chainlit_data_layer import FileDataLayer
-    return FileDataLayer()
+    """Get the Chainlit data layer of the configured memory_backend (lazy import to avoid circular deps)."""
+    from .chainlit_data_layer import create_data_layer
+    return create_data_layer()
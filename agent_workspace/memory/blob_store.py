@@ -0,0 +1,80 @@
+"""Content-addressed store for large working-step payloads.
+
+Generated code and execution output are often kilobytes long and nearly
+identical across retries and continuations. ``SessionMemory`` writes step
+contents longer than ``INLINE_MAX_CHARS`` here instead of into the thread:
+the step keeps a short preview as ``content`` and the SHA-256 of the full text
+as ``content_ref``, and the full text is read only when the step is opened
+(``SessionMemory.load_step_content``). The full text travels with the step's
+event (as ``blob``) and the data layer stores it just before appending the
+event, so the write happens wherever the event is persisted (the
+write-behind thread included) and never after the step that refers to it.
+
+Blobs live under ``_blobs/`` in the sessions directory, named by their hash and
+zlib-compressed, so identical payloads are stored once across all sessions of
+that directory. They are not deleted with threads, since other threads may
+reference them.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import uuid
+import zlib
+from pathlib import Path
+
+BLOB_DIR = "_blobs"
+# Step contents up to this many characters stay inline in the thread
+INLINE_MAX_CHARS = 2048
+# Characters of an externalized content kept inline as its preview
+PREVIEW_CHARS = 200
+
+
+def blob_digest(text: str) -> str:
+    """Hex SHA-256 of a text's UTF-8 bytes: its blob reference."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def preview(text: str) -> str:
+    """Inline preview of an externalized content."""
+    if len(text) <= PREVIEW_CHARS:
+        return text
+    return text[:PREVIEW_CHARS] + f"... [{len(text)} chars]"
+
+
+class BlobStore:
+    """Hash-named, compressed, write-once text blobs in a directory."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest[2:]}.z"
+
+    def put(self, text: str) -> str:
+        """Store a text (once per distinct content).
+
+        Returns:
+            Hex SHA-256 of the UTF-8 text, its reference for ``get``
+        """
+        digest = blob_digest(text)
+        path = self._path(digest)
+        if path.exists():
+            return digest
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique temp name: concurrent writers of the same blob write identical bytes
+        tmp = path.with_name(f"{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        tmp.write_bytes(zlib.compress(text.encode("utf-8")))
+        os.replace(tmp, path)
+        return digest
+
+    def get(self, digest: str) -> str:
+        """Text of a stored blob.
+
+        Raises:
+            FileNotFoundError: If no blob has this digest
+        """
+        return zlib.decompress(self._path(digest).read_bytes()).decode("utf-8")
+
+    def exists(self, digest: str) -> bool:
+        return self._path(digest).exists()
@@ -2,6 +2,9 @@
 
 from __future__ import annotations
 
+import copy
+import os
+import threading
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
@@ -20,27 +23,14 @@ from chainlit.types import (
 from chainlit.user import PersistedUser, User
 from literalai import Step as LiteralStep
 
+from . import serializers, thread_log
+from .blob_store import BLOB_DIR, BlobStore
+from .thread_cache import CachedThread, ThreadCache, file_signature, shared_thread_cache
+from .thread_index import INDEX_FIELDS, INDEX_FILE, ThreadIndex, index_entry
+from .thread_log import LOG_SEQ_KEY, TAIL_FIELDS
 
-class _TolerantYamlLoader(yaml.SafeLoader):
-    pass
-
-
-def _construct_python_object_apply(loader: _TolerantYamlLoader, _suffix: str, node: yaml.Node):
-    if isinstance(node, yaml.SequenceNode):
-        seq = loader.construct_sequence(node)
-        if len(seq) == 1 and isinstance(seq[0], str):
-            return seq[0]
-        return seq
-    if isinstance(node, yaml.MappingNode):
-        return loader.construct_mapping(node)
-    if isinstance(node, yaml.ScalarNode):
-        return loader.construct_scalar(node)
-    return None
-
-
-_TolerantYamlLoader.add_multi_constructor(
-    "tag:yaml.org,2002:python/object/apply:", _construct_python_object_apply
-)
+# Process-wide locks serializing access to a thread's files, striped by snapshot path
+_THREAD_LOCKS = tuple(threading.RLock() for _ in range(64))
 
 
 class FileDataLayer(BaseDataLayer):
@@ -56,17 +46,54 @@ class FileDataLayer(BaseDataLayer):
     Design: messages[] stores conversation turns (user/assistant dialogue),
     while steps[] stores working artifacts (plan, codegen, execute outputs).
     This prevents duplication and provides clear separation of concerns.
+
+    The YAML file is a snapshot: incremental writes are appended to the
+    thread's event log (see thread_log.py) and folded into the snapshot once
+    the log grows past ``compact_bytes``. Parsed threads are kept in a
+    per-process LRU (see thread_cache.py), so an unchanged thread is read
+    from disk at most once. A sidecar index (see thread_index.py) serves
+    ``list_threads`` and ``get_thread_author`` without opening thread files.
+    Snapshots are written with the ``serializer`` (see serializers.py) and
+    read back in whatever format each file is in.
+
+    Writes to a thread's files, and reads of them from disk, hold the
+    thread's lock (``_thread_lock``), so appends from the write-behind thread,
+    Chainlit's own updates on the event loop and compaction do not interleave.
     """
 
-    def __init__(self, storage_dir: Path | None = None) -> None:
+    def __init__(
+        self,
+        storage_dir: Path | None = None,
+        *,
+        compact_bytes: int = thread_log.COMPACT_BYTES,
+        cache: ThreadCache | None = None,
+        serializer: str = "yaml",
+    ) -> None:
         self.storage_dir = storage_dir or Path(__file__).parent / "sessions"
         self.storage_dir.mkdir(parents=True, exist_ok=True)
         self._users_path = self.storage_dir / "_users.yaml"
+        self.compact_bytes = compact_bytes
+        self._cache = cache if cache is not None else shared_thread_cache
+        self._index = ThreadIndex.for_path(self.storage_dir / INDEX_FILE)
+        self._serializer = serializers.get_serializer(serializer)
+        self._blobs = BlobStore(self.storage_dir / BLOB_DIR)
 
     def _get_thread_path(self, thread_id: str) -> Path:
-        """Get the file path for a thread's YAML file."""
+        """Get the file path for a thread's snapshot (named .yaml in every format)."""
         return self.storage_dir / f"{thread_id}.yaml"
 
+    def _get_log_path(self, thread_id: str) -> Path:
+        """Get the file path for a thread's append-only event log."""
+        return self.storage_dir / f"{thread_id}{thread_log.LOG_SUFFIX}"
+
+    def _get_archive_path(self, thread_id: str) -> Path:
+        """Get the file path for the items pruned from a thread."""
+        return self.storage_dir / f"{thread_id}.archive.jsonl"
+
+    def _thread_lock(self, thread_id: str) -> threading.RLock:
+        """Lock of a thread's files, shared by every data layer of the process."""
+        return _THREAD_LOCKS[hash(str(self._get_thread_path(thread_id))) % len(_THREAD_LOCKS)]
+
     # --- User Methods ---
 
     def _load_users(self) -> dict[str, dict[str, Any]]:
@@ -137,28 +164,262 @@ class FileDataLayer(BaseDataLayer):
 
     # --- Thread Methods ---
 
-    def _load_thread(self, thread_id: str) -> dict[str, Any] | None:
-        """Load thread data from YAML file."""
+    def _thread_signature(self, thread_id: str) -> tuple:
+        return (
+            file_signature(self._get_thread_path(thread_id)),
+            file_signature(self._get_log_path(thread_id)),
+        )
+
+    def _read_thread(self, thread_id: str) -> dict[str, Any] | None:
+        """Thread data for read-only use, served from the cache while the files are unchanged."""
         path = self._get_thread_path(thread_id)
-        if not path.exists():
+        signature = self._thread_signature(thread_id)
+        if signature[0] is None:
+            self._cache.discard(path)
             return None
-        content = path.read_text(encoding="utf-8")
-        try:
-            return yaml.load(content, Loader=_TolerantYamlLoader)
-        except Exception:
+        cached = self._cache.get(path, signature)
+        if cached is not None:
+            return cached.data
+
+        with self._thread_lock(thread_id):
+            # A compaction may have replaced snapshot and log since the signature was taken
+            signature = self._thread_signature(thread_id)
+            try:
+                data = serializers.loads(path.read_bytes())
+            except Exception:
+                return None
+            if not isinstance(data, dict):
+                return data
+            seq = int(data.get(LOG_SEQ_KEY) or 0)
+            for event in thread_log.read_events(self._get_log_path(thread_id), after_seq=seq):
+                thread_log.apply_event(data, event)
+                seq = event["seq"]
+            self._cache.put(path, CachedThread(signature=signature, data=data, seq=seq))
+        return data
+
+    def _tail_messages(self, thread_id: str, n: int) -> list[dict[str, Any]]:
+        """Last ``n`` messages of a thread (read-only).
+
+        Served from the cache, else read backwards from the event log (see
+        ``thread_log.tail_messages``), so a long thread is not parsed to read
+        its recent conversation; loads the thread only when the log cannot tell.
+        """
+        path = self._get_thread_path(thread_id)
+        signature = self._thread_signature(thread_id)
+        if signature[0] is None:
+            return []
+        cached = self._cache.get(path, signature)
+        if cached is None:
+            tail = thread_log.tail_messages(self._get_log_path(thread_id), n)
+            if tail is not None:
+                return tail
+            data = self._read_thread(thread_id)
+        else:
+            data = cached.data
+        if not isinstance(data, dict):
+            return []
+        return (data.get("messages") or [])[-n:]
+
+    def _thread_summary(self, thread_id: str) -> str | None:
+        """Running summary of a thread's pruned turns, read like ``_tail_messages``."""
+        path = self._get_thread_path(thread_id)
+        signature = self._thread_signature(thread_id)
+        if signature[0] is None:
             return None
+        cached = self._cache.get(path, signature)
+        if cached is None:
+            found, summary = thread_log.tail_field(self._get_log_path(thread_id), "summary")
+            if found:
+                return summary
+            data = self._read_thread(thread_id)
+        else:
+            data = cached.data
+        return data.get("summary") if isinstance(data, dict) else None
+
+    def _load_thread(self, thread_id: str) -> dict[str, Any] | None:
+        """Load thread data: the YAML snapshot plus the events logged after it.
+
+        Returns a copy the caller may modify; see ``_read_thread``.
+        """
+        return copy.deepcopy(self._read_thread(thread_id))
 
     def _save_thread(self, thread_id: str, data: dict[str, Any]) -> None:
-        """Save thread data to YAML file."""
-        path = self._get_thread_path(thread_id)
-        self._save_yaml(path, data)
+        """Save thread data as a full YAML snapshot and reset its event log.
+
+        ``data`` must include the logged events, e.g. as returned by
+        ``_load_thread``.
+        """
+        self._ensure_index()
+        with self._thread_lock(thread_id):
+            path = self._get_thread_path(thread_id)
+            log_path = self._get_log_path(thread_id)
+            seq = max(thread_log.last_seq(log_path) or 0, int(data.get(LOG_SEQ_KEY) or 0))
+            self._cache.discard(path)
+            self._write_atomic(path, self._serializer.dumps({**data, LOG_SEQ_KEY: seq}))
+            if log_path.exists():
+                # The marker's recent messages stay well below the compaction threshold
+                thread_log.reset_log(
+                    log_path,
+                    seq=seq,
+                    messages=data.get("messages") or [],
+                    fields={key: data.get(key) for key in TAIL_FIELDS},
+                    max_bytes=self.compact_bytes // 4,
+                )
+            self._index.update(thread_id, index_entry(data))
+
+    def get_blob(self, digest: str) -> str:
+        """Full text of an externalized step content (see blob_store.py).
+
+        Raises:
+            FileNotFoundError: If no blob has this digest
+        """
+        return self._blobs.get(digest)
+
+    def _store_blobs(self, events: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Write the blobs carried by step events; returns the events without them."""
+        if not any("blob" in event for event in events):
+            return events
+        stored = []
+        for event in events:
+            if "blob" in event:
+                event = dict(event)
+                self._blobs.put(event.pop("blob"))
+            stored.append(event)
+        return stored
+
+    def _append_thread_events(self, thread_id: str, events: list[dict[str, Any]]) -> None:
+        """Append events to a thread's log, creating the thread if needed.
+
+        Costs O(events) rather than a full load and save; the log is folded
+        into the snapshot once it outgrows ``compact_bytes``, and right away
+        after a "prune" event so pruned items leave the snapshot (and reach
+        the archive). A cached copy of
+        the thread is updated copy-on-write (write-through). The blob of a
+        step event is stored before the event is logged.
+        """
+        self._ensure_index()
+        events = self._store_blobs(events)
+        with self._thread_lock(thread_id):
+            path = self._get_thread_path(thread_id)
+            log_path = self._get_log_path(thread_id)
+            cached = self._cache.get(path, self._thread_signature(thread_id))
+            if cached is not None:
+                seq = cached.seq
+            else:
+                seq = thread_log.last_seq(log_path)
+                if seq is None:
+                    data = self._load_thread(thread_id)
+                    if data is None:
+                        data = self._get_thread_data(thread_id, create_if_missing=True)
+                        self._save_thread(thread_id, data)
+                    seq = int(data.get(LOG_SEQ_KEY) or 0)
+            size = thread_log.append_events(log_path, events, first_seq=seq + 1)
+            if cached is not None:
+                # Readers may hold the cached dict or its lists (e.g. on another thread):
+                # update a copy, with new copies of the lists the events append to
+                data = dict(cached.data)
+                for key in {thread_log.APPENDED_LISTS.get(event.get("op"), "") for event in events} - {""}:
+                    data[key] = list(data.get(key) or [])
+                for event in copy.deepcopy(events):
+                    thread_log.apply_event(data, event)
+                cached.data = data
+                cached.seq = seq + len(events)
+                cached.signature = self._thread_signature(thread_id)
+            self._index_events(thread_id, events)
+            if size > self.compact_bytes or any(event.get("op") == "prune" for event in events):
+                self._compact_thread(thread_id)
+
+    def _index_events(self, thread_id: str, events: list[dict[str, Any]]) -> None:
+        """Record what logged events change in the thread index."""
+        fields: dict[str, Any] = {}
+        for event in events:
+            if event.get("op") == "set":
+                fields.update({k: v for k, v in (event.get("fields") or {}).items() if k in INDEX_FIELDS})
+            elif event.get("op") == "unset":
+                fields.update({k: None for k in event.get("keys") or [] if k in INDEX_FIELDS})
+            if event.get("at"):
+                fields["updated_at"] = event["at"]
+        added = sum(1 for event in events if event.get("op") == "message")
+        self._index.update(thread_id, fields, add_messages=added)
+
+    def _compact_thread(self, thread_id: str) -> None:
+        """Fold a thread's event log into its snapshot, archiving what it pruned first."""
+        with self._thread_lock(thread_id):
+            data = self._load_thread(thread_id)
+            if data is not None:
+                self._archive_pruned(thread_id, after_seq=int(data.get(LOG_SEQ_KEY) or 0))
+                self._save_thread(thread_id, data)
+
+    def _archive_pruned(self, thread_id: str, *, after_seq: int) -> None:
+        """Append the items of the logged "prune" events to the thread's archive file.
+
+        Archive lines keep the seq of their prune event, so events archived
+        before a crash are not archived again by the next fold.
+        """
+        archive_path = self._get_archive_path(thread_id)
+        after_seq = max(after_seq, thread_log.last_seq(archive_path) or 0)
+        for event in thread_log.read_events(self._get_log_path(thread_id), after_seq=after_seq):
+            if event.get("op") == "prune" and event.get("archive"):
+                thread_log.append_events(
+                    archive_path, [{"archived_at": event.get("at"), **event["archive"]}], first_seq=event["seq"]
+                )
+
+    def read_archive(self, thread_id: str) -> list[dict[str, Any]]:
+        """Items pruned from a thread, one entry per prune, oldest first.
+
+        Each entry has ``archived_at`` and the pruned ``messages``, ``steps``
+        and ``facts``.
+        """
+        return [
+            {key: value for key, value in entry.items() if key != "seq"}
+            for entry in thread_log.read_events(self._get_archive_path(thread_id))
+        ]
+
+    def _delete_thread(self, thread_id: str) -> None:
+        self._ensure_index()
+        with self._thread_lock(thread_id):
+            self._cache.discard(self._get_thread_path(thread_id))
+            for path in (
+                self._get_thread_path(thread_id),
+                self._get_log_path(thread_id),
+                self._get_archive_path(thread_id),
+            ):
+                path.unlink(missing_ok=True)
+            self._index.remove(thread_id)
+
+    # --- Thread index ---
+
+    def _ensure_index(self) -> None:
+        """Build the thread index from the thread files if it does not exist yet."""
+        if not self._index.exists():
+            self.rebuild_index()
+
+    def _index_entries(self) -> dict[str, dict[str, Any]]:
+        self._ensure_index()
+        return self._index.entries()
+
+    def rebuild_index(self) -> int:
+        """Rebuild the thread index from the thread files.
+
+        Returns:
+            Number of indexed threads
+        """
+        entries = []
+        for path in sorted(self._list_thread_files()):
+            data = self._read_thread(path.stem)
+            if isinstance(data, dict):
+                entries.append((path.stem, index_entry(data)))
+        self._index.replace_all(entries)
+        return len(entries)
 
     def _save_yaml(self, path: Path, data: Any) -> None:
-        """Save data to YAML file."""
-        path.write_text(
-            yaml.dump(data, default_flow_style=False, allow_unicode=True, sort_keys=False),
-            encoding="utf-8",
-        )
+        """Save data to YAML file (atomically, via a temp file and rename)."""
+        self._write_atomic(path, serializers.SERIALIZERS["yaml"].dumps(data))
+
+    def _write_atomic(self, path: Path, raw: bytes) -> None:
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(raw)
+        os.replace(tmp, path)
 
     def _get_thread_data(self, thread_id: str, create_if_missing: bool = False) -> dict[str, Any]:
         """Get thread data, optionally creating a new one."""
@@ -234,26 +495,33 @@ class FileDataLayer(BaseDataLayer):
     async def list_threads(
         self, pagination: Pagination, filters: ThreadFilter
     ) -> PaginatedResponse[ThreadDict]:
+        """List threads from the thread index (without their steps)."""
         threads: list[ThreadDict] = []
-        thread_files = self._list_thread_files()
+        # One read of _users.yaml for the threads that only know their user id
+        identifiers = {u.get("id"): identifier for identifier, u in self._load_users().items()}
 
         user_id_filter = getattr(filters, "userId", None)
         user_identifier_filter = getattr(filters, "userIdentifier", None)
 
-        for path in thread_files:
-            thread_id = path.stem
-            data = self._load_thread(thread_id)
-            if data is None:
+        for thread_id, entry in self._index_entries().items():
+            if user_id_filter and entry.get("user_id") != user_id_filter:
                 continue
-            if user_id_filter and data.get("user_id") != user_id_filter:
+            effective_identifier = entry.get("user_identifier") or identifiers.get(entry.get("user_id"))
+            if user_identifier_filter and effective_identifier != user_identifier_filter:
                 continue
-            if user_identifier_filter:
-                effective_identifier = data.get("user_identifier") or self._lookup_user_identifier(
-                    data.get("user_id")
+            created_at = entry.get("created_at")
+            threads.append(
+                ThreadDict(
+                    id=thread_id,
+                    name=entry.get("name") or self._default_thread_name(thread_id=thread_id, created_at=created_at),
+                    createdAt=created_at or "",
+                    userId=entry.get("user_id"),
+                    userIdentifier=effective_identifier,
+                    metadata={},
+                    tags=[],
+                    steps=[],
                 )
-                if effective_identifier != user_identifier_filter:
-                    continue
-            threads.append(self._thread_data_to_dict(thread_id, data))
+            )
 
         # Sort by createdAt descending (newest first)
         threads.sort(key=lambda t: t.get("createdAt", ""), reverse=True)
@@ -280,13 +548,13 @@ class FileDataLayer(BaseDataLayer):
         )
 
     async def get_thread(self, thread_id: str) -> ThreadDict | None:
-        data = self._load_thread(thread_id)
+        data = self._read_thread(thread_id)
         if data is None:
             return None
         return self._thread_data_to_dict(thread_id, data)
 
     async def get_thread_author(self, thread_id: str) -> str:
-        data = self._load_thread(thread_id)
+        data = self._index_entries().get(thread_id)
         if not data:
             return ""
         user_identifier = data.get("user_identifier") or self._lookup_user_identifier(
@@ -302,29 +570,27 @@ class FileDataLayer(BaseDataLayer):
         metadata: dict | None = None,
         tags: list[str] | None = None,
     ) -> None:
-        data = self._get_thread_data(thread_id, create_if_missing=True)
+        data = self._read_thread(thread_id) or {}
         now = datetime.now(timezone.utc).isoformat()
 
+        fields: dict[str, Any] = {}
         if name is not None:
-            data["name"] = name
+            fields["name"] = name
         if user_id is not None:
-            data["user_id"] = user_id
+            fields["user_id"] = user_id
             if not data.get("user_identifier"):
                 inferred_identifier = self._lookup_user_identifier(user_id)
                 if inferred_identifier:
-                    data["user_identifier"] = inferred_identifier
+                    fields["user_identifier"] = inferred_identifier
         if metadata is not None:
-            data["metadata"] = metadata
+            fields["metadata"] = metadata
         if tags is not None:
-            data["tags"] = tags
-        data["updated_at"] = now
+            fields["tags"] = tags
 
-        self._save_thread(thread_id, data)
+        self._append_thread_events(thread_id, [{"op": "set", "fields": fields, "at": now}])
 
     async def delete_thread(self, thread_id: str) -> None:
-        path = self._get_thread_path(thread_id)
-        if path.exists():
-            path.unlink()
+        self._delete_thread(thread_id)
 
     # --- Step Methods ---
 
@@ -399,3 +665,25 @@ class FileDataLayer(BaseDataLayer):
             "output": step.output,
             "createdAt": step.created_at,
         }
+
+
+def create_data_layer(storage_dir: Path | None = None) -> FileDataLayer:
+    """Data layer of the configured ``memory_backend``: "yaml" (default) or "sqlite".
+
+    The YAML store writes snapshots in ``memory_format`` ("yaml" by default,
+    "json" or "binary"). The SQLite database is ``memory_sqlite_path`` when
+    set (and no ``storage_dir`` is given), else ``threads.sqlite3`` in the
+    storage dir.
+
+    Raises:
+        ValueError: On an unknown backend or format
+    """
+    backend = (os.getenv("memory_backend") or "yaml").strip().lower()
+    if backend == "yaml":
+        return FileDataLayer(storage_dir=storage_dir, serializer=os.getenv("memory_format") or "yaml")
+    if backend == "sqlite":
+        from .sqlite_data_layer import SQLiteDataLayer
+
+        db_path = os.getenv("memory_sqlite_path") if storage_dir is None else None
+        return SQLiteDataLayer(storage_dir=storage_dir, db_path=Path(db_path) if db_path else None)
+    raise ValueError(f"memory_backend must be 'yaml' or 'sqlite', got {backend!r}")
@@ -0,0 +1,114 @@
+"""Snapshot serializers of the YAML store.
+
+``FileDataLayer`` writes thread snapshots with the serializer selected by
+``memory_format``:
+
+- ``yaml`` (default): human-readable, dumped and parsed with libyaml's C
+  emitter/parser when PyYAML was built with it, else pure Python.
+- ``json``: stdlib JSON, compact, several times faster than YAML.
+- ``binary``: zlib-compressed JSON behind a magic header, the smallest files.
+
+Readers detect the format of each file from its first bytes, so snapshots
+written in another format (including legacy YAML with ``!!python/object``
+tags) stay readable and are converted the next time they are written. The
+snapshot keeps its ``{thread_id}.yaml`` name in every format. Compare them on
+realistic threads with ``python benchmarks/bench_session_store.py``.
+"""
+from __future__ import annotations
+
+import json
+import zlib
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+import yaml
+
+BINARY_MAGIC = b"SMZ1"
+
+_SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+# The full Dumper, as before: represents values the safe dumper would reject
+_Dumper = getattr(yaml, "CDumper", yaml.Dumper)
+
+
+class TolerantYamlLoader(_SafeLoader):
+    """Safe loader that reads ``!!python/object/apply`` tags as plain values."""
+
+
+def _construct_python_object_apply(loader: TolerantYamlLoader, _suffix: str, node: yaml.Node):
+    if isinstance(node, yaml.SequenceNode):
+        seq = loader.construct_sequence(node)
+        if len(seq) == 1 and isinstance(seq[0], str):
+            return seq[0]
+        return seq
+    if isinstance(node, yaml.MappingNode):
+        return loader.construct_mapping(node)
+    if isinstance(node, yaml.ScalarNode):
+        return loader.construct_scalar(node)
+    return None
+
+
+TolerantYamlLoader.add_multi_constructor("tag:yaml.org,2002:python/object/apply:", _construct_python_object_apply)
+
+
+@dataclass(frozen=True)
+class Serializer:
+    """How snapshots are written; any format is read back by ``loads``."""
+
+    name: str
+    dumps: Callable[[Any], bytes]
+
+
+def _yaml_dumps(data: Any) -> bytes:
+    return yaml.dump(
+        data, Dumper=_Dumper, default_flow_style=False, allow_unicode=True, sort_keys=False
+    ).encode("utf-8")
+
+
+def _json_dumps(data: Any) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def _binary_dumps(data: Any) -> bytes:
+    return BINARY_MAGIC + zlib.compress(_json_dumps(data))
+
+
+SERIALIZERS = {
+    "yaml": Serializer("yaml", _yaml_dumps),
+    "json": Serializer("json", _json_dumps),
+    "binary": Serializer("binary", _binary_dumps),
+}
+
+
+def get_serializer(name: str) -> Serializer:
+    """Serializer by name ("yaml", "json" or "binary").
+
+    Raises:
+        ValueError: On an unknown name
+    """
+    try:
+        return SERIALIZERS[name.strip().lower()]
+    except KeyError:
+        raise ValueError(f"memory_format must be one of {', '.join(SERIALIZERS)}, got {name!r}") from None
+
+
+def detect_format(raw: bytes) -> str:
+    """Format of serialized data, from its first bytes."""
+    if raw.startswith(BINARY_MAGIC):
+        return "binary"
+    if raw.lstrip()[:1] == b"{":
+        return "json"
+    return "yaml"
+
+
+def loads(raw: bytes) -> Any:
+    """Parse data written by any serializer (or legacy YAML)."""
+    fmt = detect_format(raw)
+    if fmt == "binary":
+        return json.loads(zlib.decompress(raw[len(BINARY_MAGIC) :]))
+    if fmt == "json":
+        try:
+            return json.loads(raw)
+        except ValueError:
+            pass  # A YAML flow mapping
+    return yaml.load(raw.decode("utf-8"), Loader=TolerantYamlLoader)
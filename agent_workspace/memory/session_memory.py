@@ -2,14 +2,32 @@
 
 from __future__ import annotations
 
+import asyncio
+import copy
+import time
 import uuid
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
 from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
 from typing import Any
 
-from .chainlit_data_layer import FileDataLayer
+from . import thread_log
+from .blob_store import INLINE_MAX_CHARS, blob_digest, preview
+from .chainlit_data_layer import create_data_layer
+from .fact_extractor import extract_facts_simple
+from .summarizer import summarize_simple
+from .thread_log import PRUNED_KEY
+from .write_behind import get_writer
+
+# Longest time a write may wait in a batch before it is flushed (seconds)
+MAX_BATCH_DELAY = 2.0
+# compact(): messages and working steps kept in the hot thread, facts kept in total
+KEEP_MESSAGES = 40
+KEEP_STEPS = 40
+MAX_FACTS = 100
 
 
 class StepType(str, Enum):
@@ -43,9 +61,10 @@ class WorkingStep:
     """
     step_type: str         # "plan", "codegen", "execute"
     category: StepCategory # WORKING or RESPONSE
-    content: str           # JSON, code, output, etc.
+    content: str           # JSON, code, output, etc. (a preview if content_ref is set)
     metadata: dict | None = None  # Extra data (exit_code, attempt_num, etc.)
     timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
+    content_ref: str | None = None  # Blob holding the full content (see blob_store.py)
 
 
 @dataclass(frozen=True)
@@ -57,24 +76,151 @@ class KeyFact:
     timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
 
 
+def _message(item: dict[str, Any]) -> Message:
+    return Message(
+        role=item.get("role", ""),
+        content=item.get("content", ""),
+        timestamp=item.get("timestamp", ""),
+    )
+
+
 class SessionMemory:
     """Session memory that delegates to FileDataLayer for persistence.
 
     Provides a convenient app-level API while using the unified
-    storage layer (FileDataLayer) for YAML persistence.
+    storage layer (FileDataLayer for YAML, or SQLiteDataLayer with
+    ``memory_backend=sqlite``) for persistence. Each write is one
+    event appended to the thread's log rather than a rewrite of the file;
+    inside ``batch()`` the writes of a whole agent turn are committed at once.
+
+    With ``write_behind=True`` the session keeps its thread in memory: reads
+    never touch disk after ``preload()`` and commits are persisted by a
+    background writer (see write_behind.py), so async handlers do not block
+    on file I/O. The session must then be the thread's only writer, and async
+    callers should ``await wait_for_writer()`` between turns (back-pressure).
+
+    Working step contents longer than ``inline_max_chars`` are stored in the
+    content-addressed blob store (see blob_store.py); the step keeps a preview
+    and ``load_step_content`` reads the full text.
+
+    ``compact()`` bounds a long session: old turns are folded into a running
+    summary and facts, and old messages, steps and facts are moved out of the
+    thread into its archive file.
     """
 
     def __init__(
-        self, session_id: str | None = None, memory_dir: Path | None = None
+        self,
+        session_id: str | None = None,
+        memory_dir: Path | None = None,
+        *,
+        max_batch_delay: float = MAX_BATCH_DELAY,
+        write_behind: bool = False,
+        inline_max_chars: int = INLINE_MAX_CHARS,
     ) -> None:
         self.session_id = session_id or f"session_{uuid.uuid4().hex[:8]}"
-        self._data_layer = FileDataLayer(storage_dir=memory_dir)
+        self._data_layer = create_data_layer(storage_dir=memory_dir)
+        self.max_batch_delay = max_batch_delay
+        self._pending: list[dict[str, Any]] = []
+        self._pending_since = 0.0
+        self._batch_depth = 0
+        self._writer = get_writer() if write_behind else None
+        self._state: dict[str, Any] | None = None
+        self.inline_max_chars = inline_max_chars
 
     @property
     def file_path(self) -> Path:
-        """Path to the thread YAML file."""
+        """Path to the thread YAML file (the database file on the SQLite backend)."""
         return self._data_layer._get_thread_path(self.session_id)
 
+    def preload(self) -> None:
+        """Read the thread from disk ahead of use, e.g. in a worker thread.
+
+        Loads the in-memory state of a write-behind session; otherwise warms
+        the data layer's thread cache.
+        """
+        if self._writer is not None:
+            self._loaded_state()
+        else:
+            self._data_layer._read_thread(self.session_id)
+
+    def _loaded_state(self) -> dict[str, Any]:
+        if self._state is None:
+            self._state = self._data_layer._load_thread(self.session_id) or {}
+        return self._state
+
+    async def wait_for_writer(self) -> None:
+        """Wait, off the event loop, while the write-behind writer is backlogged.
+
+        Returns at once unless ``max_pending_events`` events are queued (see
+        write_behind.py); a no-op without write-behind.
+        """
+        if self._writer is not None and self._writer.backlogged:
+            await asyncio.to_thread(self._writer.wait_for_capacity)
+
+    def _commit(self, events: list[dict[str, Any]]) -> None:
+        if self._writer is not None:
+            self._writer.submit(self._data_layer, self.session_id, events)
+        else:
+            self._data_layer._append_thread_events(self.session_id, events)
+
+    def _record(self, event: dict[str, Any]) -> None:
+        """Append one event to the thread log (see thread_log.py), or buffer it in a batch."""
+        if self._writer is not None:
+            thread_log.apply_event(self._loaded_state(), event)
+        if not self._batch_depth:
+            self._commit([event])
+            return
+        if not self._pending:
+            self._pending_since = time.monotonic()
+        self._pending.append(event)
+        if time.monotonic() - self._pending_since >= self.max_batch_delay:
+            self.flush()
+
+    def _thread_data(self) -> dict[str, Any] | None:
+        """Stored thread data with buffered writes applied (read-only)."""
+        if self._writer is not None:
+            return self._loaded_state()
+        data = self._data_layer._read_thread(self.session_id)
+        if not self._pending:
+            return data
+        view = dict(data or {})
+        for key in ("messages", "steps", "facts"):
+            view[key] = list(view.get(key) or [])
+        for event in self._pending:
+            thread_log.apply_event(view, event)
+        return view
+
+    # --- Batching ---
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Buffer the writes made in the block and commit them as one append.
+
+        Reads inside the block see the buffered writes. Buffered writes are
+        also flushed once the oldest is ``max_batch_delay`` seconds old, by
+        an explicit ``flush()``, and on exit even if the block raises, so a
+        crash loses at most the writes since the last flush. Nested batches
+        commit with the outermost one.
+        """
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self.flush()
+
+    def flush(self) -> None:
+        """Commit the writes buffered by ``batch()``."""
+        if not self._pending:
+            return
+        events, self._pending = self._pending, []
+        try:
+            self._commit(events)
+        except BaseException:
+            self._pending = events + self._pending
+            raise
+
     # --- Core APIs ---
 
     def add_response(self, role: str, content: str) -> None:
@@ -85,17 +231,12 @@ class SessionMemory:
         This prevents duplicate writes that previously occurred via both
         add_message() and create_step().
         """
-        data = self._data_layer._get_thread_data(self.session_id, create_if_missing=True)
         now = datetime.now().isoformat()
-
-        data["messages"].append({
-            "role": role,
-            "content": content,
-            "timestamp": now,
+        self._record({
+            "op": "message",
+            "item": {"role": role, "content": content, "timestamp": now},
+            "at": now,
         })
-        data["updated_at"] = now
-
-        self._data_layer._save_thread(self.session_id, data)
 
     def add_message(self, role: str, content: str) -> None:
         """Alias for add_response() - kept for backward compatibility."""
@@ -114,13 +255,16 @@ class SessionMemory:
         They store intermediate artifacts that are useful for debugging,
         session resumption, and understanding the agent's decision process.
 
+        Contents longer than ``inline_max_chars`` go to the blob store and
+        the step keeps a preview (see ``load_step_content``). The blob is
+        written with the step's event, by whoever persists it.
+
         Args:
             step_type: Type of step ("plan", "codegen", "execute")
             content: The step content (JSON, code, output, etc.)
             category: WORKING for artifacts, RESPONSE for final outputs
             metadata: Optional extra data (exit_code, attempt_num, etc.)
         """
-        data = self._data_layer._get_thread_data(self.session_id, create_if_missing=True)
         now = datetime.now().isoformat()
 
         if isinstance(step_type, Enum):
@@ -128,16 +272,19 @@ class SessionMemory:
         else:
             step_type_value = str(step_type)
 
-        data["steps"].append({
+        item = {
             "step_type": step_type_value,
             "category": category.value,
             "content": content,
             "metadata": metadata or {},
             "timestamp": now,
-        })
-        data["updated_at"] = now
-
-        self._data_layer._save_thread(self.session_id, data)
+        }
+        event = {"op": "step", "item": item, "at": now}
+        if len(content) > self.inline_max_chars:
+            item["content_ref"] = blob_digest(content)
+            item["content"] = preview(content)
+            event["blob"] = content
+        self._record(event)
 
     def add_fact(self, fact: str) -> None:
         """Add a key fact and save."""
@@ -148,19 +295,13 @@ class SessionMemory:
         if not facts:
             return
 
-        data = self._data_layer._get_thread_data(self.session_id, create_if_missing=True)
-        turn = len(data.get("messages", []))
         now = datetime.now().isoformat()
-
-        for f in facts:
-            data["facts"].append({
-                "fact": f,
-                "source_turn": turn,
-                "timestamp": now,
-            })
-        data["updated_at"] = now
-
-        self._data_layer._save_thread(self.session_id, data)
+        # source_turn (the current message count) is filled in when the event is applied
+        self._record({
+            "op": "facts",
+            "items": [{"fact": f, "timestamp": now} for f in facts],
+            "at": now,
+        })
 
     def _add_facts(self, facts: list[str]) -> None:
         """Internal method to add facts."""
@@ -168,22 +309,33 @@ class SessionMemory:
 
     def get_messages(self) -> list[Message]:
         """Return all messages in this session."""
-        data = self._data_layer._load_thread(self.session_id)
+        data = self._thread_data()
         if data is None:
             return []
 
-        messages = []
-        for msg in data.get("messages", []):
-            messages.append(Message(
-                role=msg.get("role", ""),
-                content=msg.get("content", ""),
-                timestamp=msg.get("timestamp", ""),
-            ))
-        return messages
+        return [_message(msg) for msg in data.get("messages", [])]
+
+    def get_recent_messages(self, max_messages: int = 10) -> list[Message]:
+        """Return the last ``max_messages`` messages (all if 0).
+
+        Reads only the tail of the thread where the store allows (see
+        ``FileDataLayer._tail_messages``), so the cost follows the window,
+        not the thread length.
+        """
+        if not max_messages:
+            return self.get_messages()
+        if self._writer is not None:
+            items = (self._loaded_state().get("messages") or [])[-max_messages:]
+        else:
+            items = self._data_layer._tail_messages(self.session_id, max_messages)
+            pending = [event["item"] for event in self._pending if event.get("op") == "message"]
+            if pending:
+                items = (list(items) + pending)[-max_messages:]
+        return [_message(msg) for msg in items]
 
     def get_facts(self) -> list[KeyFact]:
         """Return all key facts."""
-        data = self._data_layer._load_thread(self.session_id)
+        data = self._thread_data()
         if data is None:
             return []
 
@@ -202,7 +354,7 @@ class SessionMemory:
         Working steps include plan proposals, generated code, execution outputs.
         These are distinct from conversation turns (messages).
         """
-        data = self._data_layer._load_thread(self.session_id)
+        data = self._thread_data()
         if data is None:
             return []
 
@@ -212,15 +364,48 @@ class SessionMemory:
                 step_type=step.get("step_type", ""),
                 category=StepCategory(step.get("category", "working")),
                 content=step.get("content", ""),
-                metadata=step.get("metadata"),
+                metadata=dict(step["metadata"]) if step.get("metadata") is not None else None,
                 timestamp=step.get("timestamp", ""),
+                content_ref=step.get("content_ref"),
             ))
         return steps
 
+    def load_step_content(self, step: WorkingStep) -> str:
+        """Full content of a working step, read from the blob store if externalized.
+
+        Raises:
+            FileNotFoundError: If the step's blob is missing
+        """
+        if step.content_ref is None:
+            return step.content
+        for event in self._pending:
+            if event.get("blob") is not None and event["item"].get("content_ref") == step.content_ref:
+                return event["blob"]
+        if self._writer is not None:
+            queued = self._writer.queued_blob(self._data_layer, self.session_id, step.content_ref)
+            if queued is not None:
+                return queued
+        return self._data_layer.get_blob(step.content_ref)
+
+    def get_summary(self) -> str | None:
+        """Return the running summary of the turns folded by ``compact()``."""
+        if self._writer is not None:
+            return self._loaded_state().get("summary")
+        for event in reversed(self._pending):
+            if event.get("op") == "set" and "summary" in (event.get("fields") or {}):
+                return event["fields"]["summary"]
+        return self._data_layer._thread_summary(self.session_id)
+
     def get_context_summary(self, max_messages: int = 10) -> str:
-        """Return recent messages + all facts as a context string for prompts."""
+        """Return the running summary + recent messages + all facts as a context string for prompts."""
         parts: list[str] = []
         facts = self.get_facts()
+        summary = self.get_summary()
+
+        if summary:
+            parts.append("## Earlier Conversation (summary)")
+            parts.append(summary)
+            parts.append("")
 
         if facts:
             parts.append("## Key Facts")
@@ -228,8 +413,7 @@ class SessionMemory:
                 parts.append(f"- {kf.fact}")
             parts.append("")
 
-        messages = self.get_messages()
-        recent = messages[-max_messages:] if max_messages else messages
+        recent = self.get_recent_messages(max_messages)
         if recent:
             parts.append("## Recent Conversation")
             for msg in recent:
@@ -242,18 +426,102 @@ class SessionMemory:
         return "\n".join(parts)
 
     def get_conversation_history(self, max_messages: int = 10) -> str:
-        messages = self.get_messages()
-        recent = messages[-max_messages:] if max_messages else messages
+        recent = self.get_recent_messages(max_messages)
         parts: list[str] = []
+        summary = self.get_summary()
+        if summary:
+            parts.append(f"Earlier conversation (summary):\n{summary}")
         for msg in recent:
             prefix = "User" if msg.role == "user" else "Assistant"
             content = msg.content[:500] + "..." if len(msg.content) > 500 else msg.content
             parts.append(f"{prefix}: {content}")
         return "\n".join(parts)
 
+    # --- Compaction ---
+
+    def compact(
+        self,
+        *,
+        keep_messages: int = KEEP_MESSAGES,
+        keep_steps: int = KEEP_STEPS,
+        max_facts: int = MAX_FACTS,
+        summarize: Callable[[str | None, list[dict[str, Any]]], str] = summarize_simple,
+    ) -> bool:
+        """Bound the thread's size however long the session runs.
+
+        Once the thread holds twice ``keep_messages`` messages, all but the
+        last ``keep_messages`` are folded into the running summary (see
+        ``get_summary``) and facts extracted from them, then pruned. Working
+        steps beyond the last ``keep_steps`` and the oldest facts beyond
+        ``max_facts`` are pruned likewise. Pruned items travel in the prune
+        event itself, so the data layer moves them to the thread's archive
+        (see ``read_archive``) in the same ordered write. Waiting for twice
+        the window makes the cost amortized O(1) per turn.
+
+        Args:
+            keep_messages: Messages kept in the thread (at least the prompt history window)
+            keep_steps: Working steps kept in the thread
+            max_facts: Facts kept in the thread
+            summarize: (previous summary, folded messages) -> new summary, e.g. an LLM call
+
+        Returns:
+            True if anything was pruned
+        """
+        data = self._thread_data() or {}
+        # Snapshots: in write-behind mode these are the live lists the recorded events update
+        messages = list(data.get("messages") or [])
+        steps = list(data.get("steps") or [])
+        facts = list(data.get("facts") or [])
+        fold = len(messages) - keep_messages if len(messages) >= 2 * keep_messages else 0
+        drop_steps = len(steps) - keep_steps if len(steps) >= 2 * keep_steps else 0
+
+        pruned = int(data.get(PRUNED_KEY) or 0)
+        now = datetime.now().isoformat()
+        known = {f.get("fact") for f in facts}
+        new_facts = []
+        for i, msg in enumerate(messages[:fold]):
+            if msg.get("role") != "assistant" or i == 0 or messages[i - 1].get("role") != "user":
+                continue
+            for fact in extract_facts_simple(messages[i - 1].get("content", ""), msg.get("content", "")):
+                if fact not in known:
+                    known.add(fact)
+                    new_facts.append({"fact": fact, "source_turn": pruned + i + 1, "timestamp": now})
+        drop_facts = max(0, len(facts) + len(new_facts) - max_facts)
+        if not (fold or drop_steps or drop_facts):
+            return False
+
+        with self.batch():
+            if new_facts:
+                self._record({"op": "facts", "items": new_facts, "at": now})
+            if fold:
+                self._record({
+                    "op": "set",
+                    "fields": {"summary": summarize(data.get("summary"), messages[:fold]), PRUNED_KEY: pruned + fold},
+                    "at": now,
+                })
+            self._record({
+                "op": "prune",
+                "messages": fold,
+                "steps": drop_steps,
+                "facts": drop_facts,
+                "archive": {
+                    "messages": messages[:fold],
+                    "steps": steps[:drop_steps],
+                    "facts": (facts + new_facts)[:drop_facts],
+                },
+                "at": now,
+            })
+        return True
+
     def clear(self) -> None:
-        """Clear session and delete file."""
-        self._data_layer.delete_thread(self.session_id)
+        """Clear session and delete its files (and any buffered writes)."""
+        self._pending.clear()
+        if self._writer is not None:
+            # Ordered after (and dropping) the writes still queued for the thread
+            self._writer.submit_delete(self._data_layer, self.session_id)
+            self._state = {}
+        else:
+            self._data_layer._delete_thread(self.session_id)
 
     # --- Multi-Turn Workflow State APIs ---
 
@@ -270,16 +538,12 @@ class SessionMemory:
                 - is_multi_turn: Whether this is multi-turn
                 - created_at: ISO timestamp
         """
-        data = self._data_layer._get_thread_data(self.session_id, create_if_missing=True)
         now = datetime.now().isoformat()
-
-        data["workflow_state"] = {
-            **state,
-            "updated_at": now,
-        }
-        data["updated_at"] = now
-
-        self._data_layer._save_thread(self.session_id, data)
+        self._record({
+            "op": "set",
+            "fields": {"workflow_state": {**state, "updated_at": now}},
+            "at": now,
+        })
 
     def get_workflow_state(self) -> dict | None:
         """Retrieve workflow state if exists.
@@ -287,11 +551,12 @@ class SessionMemory:
         Returns:
             Dictionary with workflow state or None if no pending workflow.
         """
-        data = self._data_layer._load_thread(self.session_id)
+        data = self._thread_data()
         if data is None:
             return None
 
-        return data.get("workflow_state")
+        state = data.get("workflow_state")
+        return copy.deepcopy(state) if state is not None else None
 
     def has_pending_workflow(self) -> bool:
         """Check if there's a pending workflow that needs continuation.
@@ -306,14 +571,8 @@ class SessionMemory:
 
     def clear_workflow_state(self) -> None:
         """Clear the workflow state (e.g., after workflow completion)."""
-        data = self._data_layer._get_thread_data(self.session_id, create_if_missing=True)
         now = datetime.now().isoformat()
-
-        if "workflow_state" in data:
-            del data["workflow_state"]
-        data["updated_at"] = now
-
-        self._data_layer._save_thread(self.session_id, data)
+        self._record({"op": "unset", "keys": ["workflow_state"], "at": now})
 
     # --- Persistence helpers (for backward compatibility) ---
 
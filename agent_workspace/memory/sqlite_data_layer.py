@@ -0,0 +1,514 @@
+"""Chainlit data layer and session store on stdlib ``sqlite3``.
+
+Selected with ``memory_backend=sqlite`` (see ``create_data_layer``). Users,
+threads, messages, steps and facts live in tables of one WAL-mode database, so
+writes are single-row inserts, the sidebar query uses the
+``(user_id, created_at)`` index with keyset pagination instead of parsing
+every thread file, and author lookups are indexed joins.
+
+Migrate an existing YAML sessions directory (idempotent, threads are
+replaced):
+
+    python -m agent_workspace.memory.sqlite_data_layer --from agent_workspace/memory/sessions --db agent_workspace/memory/sessions/threads.sqlite3
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from chainlit.types import PageInfo, PaginatedResponse, Pagination, ThreadDict, ThreadFilter
+from chainlit.user import PersistedUser
+
+from .chainlit_data_layer import FileDataLayer
+from .thread_log import PRUNED_KEY
+
+DEFAULT_DB_NAME = "threads.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    identifier TEXT NOT NULL UNIQUE,
+    created_at TEXT,
+    metadata TEXT NOT NULL DEFAULT '{}'
+);
+CREATE TABLE IF NOT EXISTS threads (
+    id TEXT PRIMARY KEY,
+    user_id TEXT,
+    user_identifier TEXT,
+    name TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT,
+    metadata TEXT NOT NULL DEFAULT '{}',
+    tags TEXT NOT NULL DEFAULT '[]',
+    workflow_state TEXT,
+    extra TEXT NOT NULL DEFAULT '{}',
+    message_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS threads_user_created ON threads (user_id, created_at, id);
+CREATE INDEX IF NOT EXISTS threads_identifier_created ON threads (user_identifier, created_at, id);
+CREATE INDEX IF NOT EXISTS threads_created ON threads (created_at, id);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    thread_id TEXT NOT NULL REFERENCES threads (id) ON DELETE CASCADE,
+    role TEXT,
+    content TEXT,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS messages_thread ON messages (thread_id, id);
+CREATE TABLE IF NOT EXISTS steps (
+    id INTEGER PRIMARY KEY,
+    thread_id TEXT NOT NULL REFERENCES threads (id) ON DELETE CASCADE,
+    step_type TEXT,
+    category TEXT,
+    content TEXT,
+    metadata TEXT,
+    timestamp TEXT,
+    content_ref TEXT
+);
+CREATE INDEX IF NOT EXISTS steps_thread ON steps (thread_id, id);
+CREATE TABLE IF NOT EXISTS facts (
+    id INTEGER PRIMARY KEY,
+    thread_id TEXT NOT NULL REFERENCES threads (id) ON DELETE CASCADE,
+    fact TEXT,
+    source_turn INTEGER,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS facts_thread ON facts (thread_id, id);
+CREATE TABLE IF NOT EXISTS archive (
+    id INTEGER PRIMARY KEY,
+    thread_id TEXT NOT NULL REFERENCES threads (id) ON DELETE CASCADE,
+    archived_at TEXT,
+    items TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS archive_thread ON archive (thread_id, id);
+"""
+
+# Thread fields stored in their own column (JSON-encoded where noted); any
+# other top-level field is kept in the ``extra`` JSON column.
+_JSON_COLUMNS = ("metadata", "tags", "workflow_state")
+_COLUMNS = ("user_id", "user_identifier", "name", "created_at", "updated_at", *_JSON_COLUMNS)
+_LIST_FIELDS = ("messages", "steps", "facts")
+
+
+class _Database:
+    """One connection per database file and process, serialized by a lock."""
+
+    _open: dict[Path, _Database] = {}
+    _open_lock = threading.Lock()
+
+    def __init__(self, path: Path) -> None:
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.lock = threading.RLock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(_SCHEMA)
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(steps)")}
+        if "content_ref" not in columns:  # Databases created before the blob store
+            self.conn.execute("ALTER TABLE steps ADD COLUMN content_ref TEXT")
+
+    @classmethod
+    def get(cls, path: Path) -> _Database:
+        key = path.resolve()
+        with cls._open_lock:
+            if key not in cls._open:
+                cls._open[key] = cls(key)
+            return cls._open[key]
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _step_row(row: sqlite3.Row) -> dict[str, Any]:
+    step = dict(row)
+    step["metadata"] = json.loads(row["metadata"]) if row["metadata"] is not None else None
+    if step["content_ref"] is None:  # Inline content, as in the YAML store
+        del step["content_ref"]
+    return step
+
+
+class SQLiteDataLayer(FileDataLayer):
+    """SQLite-backed data layer with the same thread data model as FileDataLayer.
+
+    Reuses FileDataLayer's Chainlit mapping and overrides its storage
+    primitives (``_read_thread``, ``_save_thread``, ``_append_thread_events``,
+    ``_delete_thread``, users), so SessionMemory works unchanged on top of it.
+    The thread index is the ``threads`` table. ``list_threads`` returns
+    threads without steps; ``get_thread`` loads them.
+    """
+
+    def __init__(self, storage_dir: Path | None = None, *, db_path: Path | None = None) -> None:
+        super().__init__(storage_dir)
+        self.db_path = Path(db_path) if db_path else self.storage_dir / DEFAULT_DB_NAME
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = _Database.get(self.db_path)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._db.lock:
+            conn = self._db.conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _query(self, sql: str, params: tuple | list = ()) -> list[sqlite3.Row]:
+        with self._db.lock:
+            return self._db.conn.execute(sql, params).fetchall()
+
+    def _get_thread_path(self, thread_id: str) -> Path:
+        """All threads live in the database file."""
+        return self.db_path
+
+    # --- Users ---
+
+    def _load_users(self) -> dict[str, dict[str, Any]]:
+        return {
+            row["identifier"]: {
+                "id": row["id"],
+                "identifier": row["identifier"],
+                "createdAt": row["created_at"],
+                "metadata": json.loads(row["metadata"]),
+            }
+            for row in self._query("SELECT * FROM users")
+        }
+
+    def _save_users(self, users: dict[str, dict[str, Any]]) -> None:
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO users (id, identifier, created_at, metadata) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (identifier) DO UPDATE SET metadata = excluded.metadata",
+                [
+                    (u["id"], identifier, u.get("createdAt"), _dumps(u.get("metadata") or {}))
+                    for identifier, u in users.items()
+                ],
+            )
+
+    def _lookup_user_identifier(self, user_id: str | None) -> str | None:
+        if not user_id:
+            return None
+        rows = self._query("SELECT identifier FROM users WHERE id = ?", (user_id,))
+        return rows[0]["identifier"] if rows else None
+
+    async def get_user(self, identifier: str) -> PersistedUser | None:
+        rows = self._query("SELECT * FROM users WHERE identifier = ?", (identifier,))
+        if not rows:
+            return None
+        return PersistedUser(
+            id=rows[0]["id"],
+            identifier=identifier,
+            createdAt=rows[0]["created_at"] or datetime.now(timezone.utc).isoformat(),
+            metadata=json.loads(rows[0]["metadata"]),
+        )
+
+    # --- Thread storage ---
+
+    def _read_thread(self, thread_id: str) -> dict[str, Any] | None:
+        rows = self._query("SELECT * FROM threads WHERE id = ?", (thread_id,))
+        if not rows:
+            return None
+        row = rows[0]
+        data: dict[str, Any] = {
+            "session_id": thread_id,
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+            "user_id": row["user_id"],
+            "user_identifier": row["user_identifier"],
+            "name": row["name"],
+            "metadata": json.loads(row["metadata"]),
+            "tags": json.loads(row["tags"]),
+            "messages": [
+                dict(m)
+                for m in self._query(
+                    "SELECT role, content, timestamp FROM messages WHERE thread_id = ? ORDER BY id", (thread_id,)
+                )
+            ],
+            "steps": [
+                _step_row(s)
+                for s in self._query(
+                    "SELECT step_type, category, content, metadata, timestamp, content_ref FROM steps "
+                    "WHERE thread_id = ? ORDER BY id",
+                    (thread_id,),
+                )
+            ],
+            "facts": [
+                dict(f)
+                for f in self._query(
+                    "SELECT fact, source_turn, timestamp FROM facts WHERE thread_id = ? ORDER BY id", (thread_id,)
+                )
+            ],
+        }
+        if row["workflow_state"] is not None:
+            data["workflow_state"] = json.loads(row["workflow_state"])
+        data.update(json.loads(row["extra"]))
+        return data
+
+    def _load_thread(self, thread_id: str) -> dict[str, Any] | None:
+        return self._read_thread(thread_id)
+
+    def _tail_messages(self, thread_id: str, n: int) -> list[dict[str, Any]]:
+        """Last ``n`` messages of a thread, read backwards on the ``(thread_id, id)`` index."""
+        rows = self._query(
+            "SELECT role, content, timestamp FROM messages WHERE thread_id = ? ORDER BY id DESC LIMIT ?",
+            (thread_id, n),
+        )
+        return [dict(m) for m in reversed(rows)]
+
+    def _thread_summary(self, thread_id: str) -> str | None:
+        rows = self._query("SELECT extra FROM threads WHERE id = ?", (thread_id,))
+        return json.loads(rows[0]["extra"]).get("summary") if rows else None
+
+    def _save_thread(self, thread_id: str, data: dict[str, Any]) -> None:
+        """Replace a thread and all its rows with ``data``."""
+        messages = data.get("messages") or []
+        extra = {
+            k: v for k, v in data.items() if k not in _COLUMNS and k not in _LIST_FIELDS and k != "session_id"
+        }
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO threads (id, created_at) VALUES (?, ?) ON CONFLICT (id) DO NOTHING",
+                (thread_id, data.get("created_at") or datetime.now(timezone.utc).isoformat()),
+            )
+            self._set_fields(conn, thread_id, {k: data.get(k) for k in _COLUMNS if k != "created_at" or data.get(k)})
+            conn.execute(
+                "UPDATE threads SET extra = ?, message_count = ? WHERE id = ?",
+                (_dumps(extra), len(messages) + int(data.get(PRUNED_KEY) or 0), thread_id),
+            )
+            for table in _LIST_FIELDS:
+                conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            for message in messages:
+                self._insert_message(conn, thread_id, message, count=False)
+            for step in data.get("steps") or []:
+                self._insert_step(conn, thread_id, step)
+            conn.executemany(
+                "INSERT INTO facts (thread_id, fact, source_turn, timestamp) VALUES (?, ?, ?, ?)",
+                [(thread_id, f.get("fact"), f.get("source_turn"), f.get("timestamp")) for f in data.get("facts") or []],
+            )
+
+    def _append_thread_events(self, thread_id: str, events: list[dict[str, Any]]) -> None:
+        """Apply SessionMemory events (see thread_log.py) as row inserts and updates."""
+        events = self._store_blobs(events)
+        if not self._query("SELECT 1 FROM threads WHERE id = ?", (thread_id,)):
+            self._save_thread(thread_id, self._get_thread_data(thread_id, create_if_missing=True))
+        with self._transaction() as conn:
+            for event in events:
+                op = event.get("op")
+                if op == "message":
+                    self._insert_message(conn, thread_id, event["item"])
+                elif op == "step":
+                    self._insert_step(conn, thread_id, event["item"])
+                elif op == "facts":
+                    (turn,) = conn.execute("SELECT message_count FROM threads WHERE id = ?", (thread_id,)).fetchone()
+                    conn.executemany(
+                        "INSERT INTO facts (thread_id, fact, source_turn, timestamp) VALUES (?, ?, ?, ?)",
+                        [
+                            (thread_id, f.get("fact"), f.get("source_turn", turn), f.get("timestamp"))
+                            for f in event.get("items", [])
+                        ],
+                    )
+                elif op == "set":
+                    self._set_fields(conn, thread_id, event.get("fields") or {})
+                elif op == "unset":
+                    self._set_fields(conn, thread_id, {key: None for key in event.get("keys") or []}, unset=True)
+                elif op == "prune":
+                    if event.get("archive"):
+                        conn.execute(
+                            "INSERT INTO archive (thread_id, archived_at, items) VALUES (?, ?, ?)",
+                            (thread_id, event.get("at"), _dumps(event["archive"])),
+                        )
+                    for table in _LIST_FIELDS:
+                        if event.get(table):
+                            conn.execute(
+                                f"DELETE FROM {table} WHERE id IN "
+                                f"(SELECT id FROM {table} WHERE thread_id = ? ORDER BY id LIMIT ?)",
+                                (thread_id, event[table]),
+                            )
+                else:
+                    continue
+                if event.get("at"):
+                    conn.execute("UPDATE threads SET updated_at = ? WHERE id = ?", (event["at"], thread_id))
+
+    def _insert_message(self, conn: sqlite3.Connection, thread_id: str, message: dict, *, count: bool = True) -> None:
+        conn.execute(
+            "INSERT INTO messages (thread_id, role, content, timestamp) VALUES (?, ?, ?, ?)",
+            (thread_id, message.get("role"), message.get("content"), message.get("timestamp")),
+        )
+        if count:
+            conn.execute("UPDATE threads SET message_count = message_count + 1 WHERE id = ?", (thread_id,))
+
+    def _insert_step(self, conn: sqlite3.Connection, thread_id: str, step: dict) -> None:
+        metadata = step.get("metadata")
+        conn.execute(
+            "INSERT INTO steps (thread_id, step_type, category, content, metadata, timestamp, content_ref) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                thread_id,
+                step.get("step_type"),
+                step.get("category"),
+                step.get("content"),
+                _dumps(metadata) if metadata is not None else None,
+                step.get("timestamp"),
+                step.get("content_ref"),
+            ),
+        )
+
+    def _set_fields(
+        self, conn: sqlite3.Connection, thread_id: str, fields: dict[str, Any], *, unset: bool = False
+    ) -> None:
+        for key, value in fields.items():
+            if key not in _COLUMNS:
+                continue
+            if key in ("metadata", "tags") and value is None:
+                value = {} if key == "metadata" else []
+            if key in _JSON_COLUMNS and value is not None:
+                value = _dumps(value)
+            conn.execute(f"UPDATE threads SET {key} = ? WHERE id = ?", (value, thread_id))
+        others = {k: v for k, v in fields.items() if k not in _COLUMNS and k not in _LIST_FIELDS and k != "session_id"}
+        if others:
+            (extra,) = conn.execute("SELECT extra FROM threads WHERE id = ?", (thread_id,)).fetchone()
+            merged = json.loads(extra)
+            for key, value in others.items():
+                if unset:
+                    merged.pop(key, None)
+                else:
+                    merged[key] = value
+            conn.execute("UPDATE threads SET extra = ? WHERE id = ?", (_dumps(merged), thread_id))
+
+    # --- Thread index ---
+
+    def _ensure_index(self) -> None:
+        """No-op: the ``threads`` table is the index."""
+
+    def _index_entries(self) -> dict[str, dict[str, Any]]:
+        return {
+            row["id"]: dict(row)
+            for row in self._query(
+                "SELECT id, user_id, user_identifier, name, created_at, updated_at, message_count FROM threads"
+            )
+        }
+
+    def rebuild_index(self) -> int:
+        """No-op: the database maintains its indexes; returns the number of threads."""
+        (row,) = self._query("SELECT COUNT(*) AS n FROM threads")
+        return row["n"]
+
+    def _delete_thread(self, thread_id: str) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM threads WHERE id = ?", (thread_id,))
+        self._get_archive_path(thread_id).unlink(missing_ok=True)  # Archived before the archive table
+
+    def read_archive(self, thread_id: str) -> list[dict[str, Any]]:
+        return [
+            {"archived_at": row["archived_at"], **json.loads(row["items"])}
+            for row in self._query("SELECT archived_at, items FROM archive WHERE thread_id = ? ORDER BY id", (thread_id,))
+        ]
+
+    # --- Chainlit queries ---
+
+    async def list_threads(
+        self, pagination: Pagination, filters: ThreadFilter
+    ) -> PaginatedResponse[ThreadDict]:
+        clauses: list[str] = []
+        params: list[Any] = []
+        user_id_filter = getattr(filters, "userId", None)
+        user_identifier_filter = getattr(filters, "userIdentifier", None)
+        if user_id_filter:
+            clauses.append("t.user_id = ?")
+            params.append(user_id_filter)
+        if user_identifier_filter:
+            clauses.append("COALESCE(t.user_identifier, u.identifier) = ?")
+            params.append(user_identifier_filter)
+        if pagination.cursor:
+            cursor = self._query("SELECT created_at FROM threads WHERE id = ?", (pagination.cursor,))
+            if cursor:
+                # Keyset pagination: threads strictly after the cursor in (created_at, id) order
+                clauses.append("(t.created_at, t.id) < (?, ?)")
+                params += [cursor[0]["created_at"], pagination.cursor]
+
+        page_size = pagination.first or 20
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._query(
+            "SELECT t.id, t.name, t.created_at, t.user_id, t.metadata, t.tags, "
+            "COALESCE(t.user_identifier, u.identifier) AS user_identifier "
+            f"FROM threads t LEFT JOIN users u ON u.id = t.user_id {where} "
+            "ORDER BY t.created_at DESC, t.id DESC LIMIT ?",
+            [*params, page_size + 1],
+        )
+        page = [
+            ThreadDict(
+                id=row["id"],
+                name=row["name"] or self._default_thread_name(thread_id=row["id"], created_at=row["created_at"]),
+                createdAt=row["created_at"],
+                userId=row["user_id"],
+                userIdentifier=row["user_identifier"],
+                metadata=json.loads(row["metadata"]),
+                tags=json.loads(row["tags"]),
+                steps=[],
+            )
+            for row in rows[:page_size]
+        ]
+        return PaginatedResponse(
+            data=page,
+            pageInfo=PageInfo(
+                hasNextPage=len(rows) > page_size,
+                startCursor=page[0]["id"] if page else None,
+                endCursor=page[-1]["id"] if page else None,
+            ),
+        )
+
+    async def get_thread_author(self, thread_id: str) -> str:
+        rows = self._query(
+            "SELECT COALESCE(t.user_identifier, u.identifier) AS author "
+            "FROM threads t LEFT JOIN users u ON u.id = t.user_id WHERE t.id = ?",
+            (thread_id,),
+        )
+        return (rows[0]["author"] or "") if rows else ""
+
+
+def migrate(source_dir: Path, layer: SQLiteDataLayer) -> tuple[int, list[str]]:
+    """Copy users and threads of a YAML sessions directory into ``layer``.
+
+    Returns:
+        Number of migrated threads and the ids of unreadable threads
+    """
+    source = FileDataLayer(storage_dir=source_dir)
+    layer._save_users(source._load_users())
+    migrated, skipped = 0, []
+    for path in sorted(source._list_thread_files()):
+        data = source._read_thread(path.stem)
+        if not isinstance(data, dict):
+            skipped.append(path.stem)
+            continue
+        layer._save_thread(path.stem, data)
+        migrated += 1
+    return migrated, skipped
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--from", dest="source", type=Path, default=Path(__file__).parent / "sessions")
+    parser.add_argument("--db", type=Path, help=f"target database (default: <source>/{DEFAULT_DB_NAME})")
+    args = parser.parse_args(argv)
+
+    layer = SQLiteDataLayer(storage_dir=args.source, db_path=args.db)
+    migrated, skipped = migrate(args.source, layer)
+    print(f"migrated: {migrated}  skipped (unreadable): {len(skipped)}  db: {layer.db_path}")
+    for thread_id in skipped:
+        print(f"  skipped {thread_id}")
+    return 1 if skipped else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,33 @@
+"""Running summary of conversation turns folded out of the hot history."""
+
+from __future__ import annotations
+
+from typing import Any
+
+# Longest running summary kept (characters); the oldest lines are dropped first
+SUMMARY_MAX_CHARS = 4000
+# Characters of a message kept in its summary line
+LINE_MAX_CHARS = 160
+
+
+def summarize_simple(previous: str | None, messages: list[dict[str, Any]]) -> str:
+    """
+    Extend a running summary with older messages using simple heuristics (no LLM).
+
+    Each message becomes one clipped line; the summary is capped at
+    SUMMARY_MAX_CHARS by dropping its oldest lines.
+    """
+    lines = (previous or "").splitlines()
+    for msg in messages:
+        prefix = "User" if msg.get("role") == "user" else "Assistant"
+        content = " ".join(str(msg.get("content") or "").split())
+        if len(content) > LINE_MAX_CHARS:
+            content = content[:LINE_MAX_CHARS] + "..."
+        lines.append(f"- {prefix}: {content}")
+
+    size = sum(len(line) + 1 for line in lines)
+    start = 0
+    while size > SUMMARY_MAX_CHARS and start < len(lines) - 1:
+        size -= len(lines[start]) + 1
+        start += 1
+    return "\n".join(lines[start:])
@@ -0,0 +1,88 @@
+"""Per-process cache of parsed thread data.
+
+A single chat turn reads the same thread many times (history, workflow state,
+every working step write). ``ThreadCache`` keeps the parsed data of recently
+used threads, validated on every lookup against the inode, mtime and size of
+the thread's snapshot and event log, so an unchanged thread is parsed from disk
+at most once and a file modified by another process is re-read. Writes through
+``FileDataLayer`` update or invalidate the entry; concurrent writers of the
+same thread in different processes are not coordinated (as before).
+"""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+# Threads kept parsed in memory per process
+THREAD_CACHE_SIZE = 64
+
+FileSignature = tuple[int, int, int]
+
+
+def file_signature(path: Path) -> FileSignature | None:
+    """(inode, mtime_ns, size) of a file, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+@dataclass
+class CachedThread:
+    """Parsed thread data and the file state it was read from.
+
+    Attributes:
+        signature: Signatures of the snapshot and the event log
+        data: Parsed thread data (shared; treat as read-only outside the data layer)
+        seq: Sequence number of the last event included in ``data``
+    """
+    signature: tuple[FileSignature | None, FileSignature | None]
+    data: dict[str, Any]
+    seq: int
+
+
+class ThreadCache:
+    """Bounded LRU of parsed threads, shared by the data layers of a process."""
+
+    def __init__(self, max_entries: int = THREAD_CACHE_SIZE) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Path, CachedThread] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Path, signature: tuple[FileSignature | None, FileSignature | None]) -> CachedThread | None:
+        """Cached entry for ``key`` if the files still match ``signature``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.signature != signature:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Path, entry: CachedThread) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, key: Path) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+# Shared by every FileDataLayer (and so every SessionMemory) in the process
+shared_thread_cache = ThreadCache()
@@ -0,0 +1,154 @@
+"""Sidecar index of thread metadata for the YAML store.
+
+``_index.jsonl`` in the sessions directory holds, per thread, the fields the
+chat history sidebar needs (user_id, user_identifier, name, created_at,
+updated_at, message_count), so ``list_threads`` and ``get_thread_author`` do
+not open thread files. Like the thread logs it is append-only: each thread
+write appends one small record and readers fold only the bytes added since
+their last read. It is rewritten compactly once stale records dominate, and
+built from the thread files when missing.
+
+Rebuild it from the thread files (e.g. after a crash or manual edits):
+
+    python -m agent_workspace.memory.thread_index --storage-dir agent_workspace/memory/sessions
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import threading
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+INDEX_FILE = "_index.jsonl"
+# Thread fields kept in the index, besides message_count
+INDEX_FIELDS = ("user_id", "user_identifier", "name", "created_at", "updated_at")
+# Rewrite the index once it holds this many more records than threads
+_COMPACT_SLACK = 1024
+
+
+def index_entry(data: dict[str, Any]) -> dict[str, Any]:
+    """Index fields of full thread data."""
+    return {
+        **{key: data.get(key) for key in INDEX_FIELDS},
+        # Pruned messages (folded into the summary) still count
+        "message_count": len(data.get("messages") or []) + int(data.get("pruned_messages") or 0),
+    }
+
+
+class ThreadIndex:
+    """Append-only index file, folded incrementally into entries by thread id."""
+
+    _open: dict[Path, ThreadIndex] = {}
+    _open_lock = threading.Lock()
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._inode: int | None = None
+        self._offset = 0
+        self._records = 0
+        self._lock = threading.RLock()
+
+    @classmethod
+    def for_path(cls, path: Path) -> ThreadIndex:
+        """The process-wide index object of an index file."""
+        key = path.resolve()
+        with cls._open_lock:
+            if key not in cls._open:
+                cls._open[key] = cls(key)
+            return cls._open[key]
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def entries(self) -> dict[str, dict[str, Any]]:
+        """Entries by thread id (shared; treat as read-only)."""
+        with self._lock:
+            self._refresh()
+            return self._entries
+
+    def update(self, thread_id: str, fields: dict[str, Any] | None = None, *, add_messages: int = 0) -> None:
+        """Record new field values and/or added messages of a thread."""
+        record: dict[str, Any] = {"id": thread_id}
+        if fields:
+            record["set"] = fields
+        if add_messages:
+            record["add_messages"] = add_messages
+        self._append(record)
+
+    def remove(self, thread_id: str) -> None:
+        self._append({"id": thread_id, "deleted": True})
+
+    def replace_all(self, entries: Iterable[tuple[str, dict[str, Any]]]) -> None:
+        """Rewrite the index with exactly ``entries``."""
+        lines = [
+            json.dumps({"id": thread_id, "set": fields}, ensure_ascii=False) + "\n" for thread_id, fields in entries
+        ]
+        with self._lock:
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            tmp.write_text("".join(lines), encoding="utf-8")
+            os.replace(tmp, self.path)
+            self._refresh()
+
+    def _append(self, record: dict[str, Any]) -> None:
+        with self._lock:
+            with self.path.open("ab") as f:
+                f.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+            self._refresh()
+            if self._records > len(self._entries) + _COMPACT_SLACK:
+                self.replace_all(
+                    (thread_id, {k: v for k, v in entry.items() if k != "id"})
+                    for thread_id, entry in list(self._entries.items())
+                )
+
+    def _refresh(self) -> None:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self._entries, self._inode, self._offset, self._records = {}, None, 0, 0
+            return
+        if st.st_ino != self._inode or st.st_size < self._offset:
+            # Rewritten (compacted or rebuilt) since the last read
+            self._entries, self._inode, self._offset, self._records = {}, st.st_ino, 0, 0
+        if st.st_size == self._offset:
+            return
+        with self.path.open("rb") as f:
+            f.seek(self._offset)
+            chunk = f.read(st.st_size - self._offset)
+        complete = chunk.rfind(b"\n") + 1  # Leave a partially written line for the next read
+        for line in chunk[:complete].splitlines():
+            self._apply(line)
+        self._offset += complete
+
+    def _apply(self, line: bytes) -> None:
+        try:
+            record = json.loads(line)
+            thread_id = record["id"]
+        except (ValueError, KeyError, TypeError):
+            return
+        self._records += 1
+        if record.get("deleted"):
+            self._entries.pop(thread_id, None)
+            return
+        entry = self._entries.setdefault(thread_id, {"id": thread_id, "message_count": 0})
+        entry.update(record.get("set") or {})
+        entry["message_count"] += record.get("add_messages", 0)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--storage-dir", type=Path, default=Path(__file__).parent / "sessions")
+    args = parser.parse_args(argv)
+
+    from .chainlit_data_layer import FileDataLayer
+
+    count = FileDataLayer(storage_dir=args.storage_dir).rebuild_index()
+    print(f"indexed: {count} threads  index: {args.storage_dir / INDEX_FILE}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
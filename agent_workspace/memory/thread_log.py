@@ -0,0 +1,266 @@
+"""Append-only event log of a thread, folded into its YAML snapshot.
+
+Every SessionMemory write (a message, a working step, facts, workflow state)
+is one JSON line appended to ``{thread_id}.log.jsonl`` next to the thread's
+``{thread_id}.yaml`` snapshot, so a write costs O(event) instead of re-parsing
+and re-dumping the whole thread. Readers load the snapshot and replay the
+events numbered after its ``log_seq``; once the log outgrows
+``FileDataLayer.compact_bytes`` it is folded into a fresh snapshot. Sequence
+numbers make the fold crash-safe: events already in the snapshot are skipped
+if the log could not be reset, and a torn last line is ignored. The marker
+left by a fold carries the snapshot's last ``TAIL_MESSAGES`` messages and its
+``TAIL_FIELDS``, so the recent conversation and the running summary can be read
+backwards from the log alone (``tail_messages``, ``tail_field``).
+
+Event shapes (``at`` becomes the thread's ``updated_at``)::
+
+    {"seq": 7, "op": "message", "item": {"role": ..., "content": ..., "timestamp": ...}, "at": ...}
+    {"seq": 8, "op": "step", "item": {"step_type": ..., "category": ..., ...}, "at": ...}
+    {"seq": 9, "op": "facts", "items": [{"fact": ..., "timestamp": ...}], "at": ...}
+    {"seq": 10, "op": "set", "fields": {"workflow_state": {...}}, "at": ...}
+    {"seq": 11, "op": "unset", "keys": ["workflow_state"], "at": ...}
+    {"seq": 12, "op": "prune", "messages": 20, "steps": 20, "facts": 0, "at": ...}  # Drop the oldest items
+    {"seq": 12, "op": "compacted", "message_count": 40, "messages": [...], "fields": {...}}  # First line after a fold
+
+Migrate an existing sessions directory (fold pending logs and rewrite legacy
+YAML, e.g. with ``!!python/object`` tags, as clean snapshots):
+
+    python -m agent_workspace.memory.thread_log --storage-dir agent_workspace/memory/sessions
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+LOG_SUFFIX = ".log.jsonl"
+# Snapshot key: sequence number of the last event folded into the snapshot
+LOG_SEQ_KEY = "log_seq"
+# Fold the log into the snapshot once it grows past this many bytes
+COMPACT_BYTES = 1 << 20
+# Most recent messages kept in the marker of a folded log
+TAIL_MESSAGES = 32
+# Thread fields kept in the marker of a folded log
+TAIL_FIELDS = ("summary",)
+# Thread key: messages pruned from the thread (folded into its summary)
+PRUNED_KEY = "pruned_messages"
+# List of the thread data each op appends to (see apply_event)
+APPENDED_LISTS = {"message": "messages", "step": "steps", "facts": "facts"}
+
+_READ_CHUNK = 64 * 1024
+
+
+def apply_event(data: dict[str, Any], event: dict[str, Any]) -> None:
+    """Apply one logged event to thread data in place."""
+    op = event.get("op")
+    if op == "message":
+        data.setdefault("messages", []).append(event["item"])
+    elif op == "step":
+        data.setdefault("steps", []).append(event["item"])
+    elif op == "facts":
+        # Facts refer to the conversation turn they were extracted at (unless given)
+        turn = len(data.get("messages") or []) + int(data.get(PRUNED_KEY) or 0)
+        data.setdefault("facts", []).extend({"source_turn": turn, **f} for f in event.get("items", []))
+    elif op == "set":
+        data.update(event.get("fields") or {})
+    elif op == "unset":
+        for key in event.get("keys") or []:
+            data.pop(key, None)
+    elif op == "prune":
+        for key in ("messages", "steps", "facts"):
+            if event.get(key):
+                data[key] = (data.get(key) or [])[event[key]:]
+    else:
+        return  # "compacted" markers and unknown ops carry no data
+    if event.get("at"):
+        data["updated_at"] = event["at"]
+
+
+def _parse_line(line: bytes) -> dict[str, Any] | None:
+    try:
+        event = json.loads(line)
+    except ValueError:
+        return None  # Torn write from a crash mid-append
+    if not isinstance(event, dict) or not isinstance(event.get("seq"), int):
+        return None
+    return event
+
+
+def read_events(path: Path, *, after_seq: int = 0) -> list[dict[str, Any]]:
+    """Events of the log numbered after ``after_seq``, oldest first."""
+    try:
+        raw = path.read_bytes()
+    except FileNotFoundError:
+        return []
+    events = []
+    for line in raw.splitlines():
+        event = _parse_line(line)
+        if event is not None and event["seq"] > after_seq:
+            events.append(event)
+    return events
+
+
+def _reverse_events(path: Path) -> Iterator[dict[str, Any]]:
+    """Complete events of the log, newest first, read in chunks from its end."""
+    try:
+        f = path.open("rb")
+    except FileNotFoundError:
+        return
+    with f:
+        pos = f.seek(0, os.SEEK_END)
+        partial = b""
+        while pos > 0:
+            size = min(_READ_CHUNK, pos)
+            pos -= size
+            f.seek(pos)
+            lines = (f.read(size) + partial).split(b"\n")
+            # The first piece may continue further back unless we reached the start
+            partial = lines.pop(0) if pos > 0 else b""
+            for line in reversed(lines):
+                event = _parse_line(line)
+                if event is not None:
+                    yield event
+
+
+def last_seq(path: Path) -> int | None:
+    """Sequence number of the last complete event, read from the end of the log.
+
+    Returns:
+        None when the log does not exist or holds no complete event
+    """
+    for event in _reverse_events(path):
+        return event["seq"]
+    return None
+
+
+def tail_messages(path: Path, n: int) -> list[dict[str, Any]] | None:
+    """Last ``n`` messages of the thread, read backwards from the end of the log.
+
+    Reads only the events logged since the last fold (and its marker), never
+    the snapshot.
+
+    Returns:
+        None when the log alone cannot tell (no fold marker with enough messages)
+    """
+    found: list[dict[str, Any]] = []
+    for event in _reverse_events(path):
+        op = event.get("op")
+        if op == "message":
+            found.append(event["item"])
+            if len(found) >= n:
+                break
+        elif op == "prune":
+            return None  # Older messages may have been pruned
+        elif op == "compacted":
+            recent = event.get("messages")
+            if recent is None:
+                return None  # Marker written before markers carried messages
+            found.extend(reversed(recent[-(n - len(found)):]))
+            if len(found) < n and len(recent) < event.get("message_count", 0):
+                return None
+            break
+    else:
+        return None  # Reached the start of a log that was never folded
+    found.reverse()
+    return found
+
+
+def tail_field(path: Path, key: str) -> tuple[bool, Any]:
+    """Current value of a ``TAIL_FIELDS`` thread field, read backwards from the end of the log.
+
+    Returns:
+        (True, value) with None for an unset field, or (False, None) when the log alone cannot tell
+    """
+    for event in _reverse_events(path):
+        op = event.get("op")
+        if op == "set" and key in (event.get("fields") or {}):
+            return True, event["fields"][key]
+        if op == "unset" and key in (event.get("keys") or []):
+            return True, None
+        if op == "compacted":
+            if "fields" not in event:
+                return False, None
+            return True, event["fields"].get(key)
+    return False, None
+
+
+def append_events(path: Path, events: list[dict[str, Any]], *, first_seq: int) -> int:
+    """Number ``events`` from ``first_seq`` and append them to the log.
+
+    Returns:
+        Size of the log in bytes after the append
+    """
+    lines = [
+        json.dumps({"seq": first_seq + i, **event}, ensure_ascii=False, separators=(",", ":"))
+        for i, event in enumerate(events)
+    ]
+    payload = ("\n".join(lines) + "\n").encode("utf-8")
+    with path.open("a+b") as f:
+        end = f.seek(0, os.SEEK_END)
+        if end:
+            f.seek(end - 1)
+            if f.read(1) != b"\n":
+                payload = b"\n" + payload  # Keep a torn last line from swallowing ours
+        f.write(payload)
+        return f.tell()
+
+
+def reset_log(
+    path: Path,
+    *,
+    seq: int,
+    messages: list[dict[str, Any]] | None = None,
+    fields: dict[str, Any] | None = None,
+    max_bytes: int = COMPACT_BYTES // 4,
+) -> None:
+    """Replace the log with a marker line once its events are in the snapshot.
+
+    The marker keeps the last sequence number, up to the last
+    ``TAIL_MESSAGES`` of the snapshot's ``messages`` (at most ``max_bytes``
+    of them) and its ``fields``, readable from the log alone.
+    """
+    marker: dict[str, Any] = {"seq": seq, "op": "compacted"}
+    if messages is not None:
+        kept, size = 0, 0
+        for message in reversed(messages[-TAIL_MESSAGES:]):
+            size += len(json.dumps(message, ensure_ascii=False).encode("utf-8")) + 1
+            if size > max_bytes:
+                break
+            kept += 1
+        marker["message_count"] = len(messages)
+        marker["messages"] = messages[len(messages) - kept :]
+    if fields is not None:
+        marker["fields"] = fields
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(marker, ensure_ascii=False) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--storage-dir", type=Path, default=Path(__file__).parent / "sessions")
+    args = parser.parse_args(argv)
+
+    from .chainlit_data_layer import FileDataLayer
+
+    layer = FileDataLayer(storage_dir=args.storage_dir)
+    migrated, skipped = 0, []
+    for path in sorted(layer._list_thread_files()):
+        thread_id = path.stem
+        data = layer._load_thread(thread_id)
+        if data is None:
+            skipped.append(thread_id)
+            continue
+        layer._save_thread(thread_id, data)
+        migrated += 1
+    print(f"migrated: {migrated}  skipped (unreadable): {len(skipped)}  dir: {args.storage_dir}")
+    for thread_id in skipped:
+        print(f"  skipped {thread_id}")
+    return 1 if skipped else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
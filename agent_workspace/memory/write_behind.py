@@ -0,0 +1,193 @@
+"""Write-behind persistence of SessionMemory events off the event loop.
+
+With ``SessionMemory(write_behind=True)`` a session keeps its thread in
+memory: reads are served from that state and writes are applied to it and
+handed to the process-wide ``WriteBehindWriter``. A dedicated thread persists
+them through the data layer, coalescing everything queued for the same thread
+into one append. ``submit`` never blocks, so it is safe on the event loop;
+back-pressure is applied between turns instead: once ``max_pending_events``
+events are waiting the writer is ``backlogged`` and producers wait in
+``wait_for_capacity`` (from a worker thread, see
+``SessionMemory.wait_for_writer``), so memory stays bounded when the disk is
+slower than the sessions.
+
+Deleting a thread is queued too (``submit_delete``), ordered after the writes
+already queued for it. Pending writes are done on ``drain()`` and at
+interpreter exit. A failed write is logged and retried, keeping its events
+queued.
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .chainlit_data_layer import FileDataLayer
+
+logger = logging.getLogger(__name__)
+
+# Events that may wait for the writer before producers wait for capacity
+MAX_PENDING_EVENTS = 10_000
+_RETRY_DELAY_S = 1.0
+
+
+@dataclass
+class _QueuedWrite:
+    """Writes queued for one thread: an optional delete, then events to append."""
+
+    layer: FileDataLayer
+    events: list[dict[str, Any]] = field(default_factory=list)
+    delete: bool = False
+
+    @property
+    def size(self) -> int:
+        """Pending count of the entry; a delete counts as one event."""
+        return len(self.events) + self.delete
+
+
+class WriteBehindWriter:
+    """Background thread appending queued events, coalesced per thread."""
+
+    def __init__(self, max_pending_events: int = MAX_PENDING_EVENTS) -> None:
+        self.max_pending_events = max_pending_events
+        self.writes = 0
+        self._queue: OrderedDict[tuple[str, str], _QueuedWrite] = OrderedDict()
+        self._writing: tuple[tuple[str, str], _QueuedWrite] | None = None
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def pending_events(self) -> int:
+        """Events submitted but not written yet."""
+        with self._cond:
+            return self._pending
+
+    @property
+    def backlogged(self) -> bool:
+        """Whether ``max_pending_events`` events are waiting to be written."""
+        with self._cond:
+            return self._pending >= self.max_pending_events
+
+    def submit(self, layer: FileDataLayer, thread_id: str, events: list[dict[str, Any]]) -> None:
+        """Queue events for a thread (without blocking; see ``wait_for_capacity``)."""
+        if not events:
+            return
+        key = (str(layer._get_thread_path(thread_id)), thread_id)
+        with self._cond:
+            self._ensure_started()
+            self._queue.setdefault(key, _QueuedWrite(layer)).events.extend(events)
+            self._pending += len(events)
+            self._cond.notify_all()
+
+    def submit_delete(self, layer: FileDataLayer, thread_id: str) -> None:
+        """Queue deleting a thread's files; events queued for it are dropped."""
+        key = (str(layer._get_thread_path(thread_id)), thread_id)
+        with self._cond:
+            self._ensure_started()
+            dropped = self._queue.pop(key, None)
+            if dropped is not None:
+                self._pending -= dropped.size
+            self._queue[key] = _QueuedWrite(layer, delete=True)
+            self._pending += 1
+            self._cond.notify_all()
+
+    def queued_blob(self, layer: FileDataLayer, thread_id: str, digest: str) -> str | None:
+        """Text of a blob still queued with a thread's step events, if any."""
+        key = (str(layer._get_thread_path(thread_id)), thread_id)
+        with self._cond:
+            writes = [self._queue.get(key)]
+            if self._writing is not None and self._writing[0] == key:
+                writes.append(self._writing[1])
+            for write in writes:
+                for event in write.events if write is not None else []:
+                    if event.get("blob") is not None and event["item"].get("content_ref") == digest:
+                        return event["blob"]
+        return None
+
+    def wait_for_capacity(self, timeout: float | None = None) -> bool:
+        """Wait while the writer is ``backlogged`` (blocking: call it off the event loop).
+
+        Returns:
+            False if ``timeout`` seconds passed first
+        """
+        return self._wait(lambda: self._pending < self.max_pending_events, timeout)
+
+    def drain(self, timeout: float | None = None) -> bool:
+        """Wait until every submitted event is written.
+
+        Returns:
+            False if ``timeout`` seconds passed first
+        """
+        return self._wait(lambda: not self._pending, timeout)
+
+    def _wait(self, done: Callable[[], bool], timeout: float | None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not done():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def _ensure_started(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="memory-write-behind", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                key, write = self._queue.popitem(last=False)
+                self._writing = (key, write)
+            try:
+                if write.delete:
+                    write.layer._delete_thread(key[1])
+                    write.delete = False
+                    with self._cond:
+                        self._pending -= 1
+                if write.events:
+                    write.layer._append_thread_events(key[1], write.events)
+            except Exception:
+                logger.exception("write-behind write to thread %s failed; retrying", key[1])
+                with self._cond:
+                    later = self._queue.pop(key, None)
+                    if later is not None and later.delete:
+                        # Deleted again meanwhile: the failed events are obsolete
+                        self._pending -= len(write.events)
+                        write = later
+                    elif later is not None:
+                        write.events.extend(later.events)
+                    self._queue[key] = write
+                    self._queue.move_to_end(key, last=False)
+                    self._writing = None
+                time.sleep(_RETRY_DELAY_S)
+                continue
+            with self._cond:
+                self._pending -= len(write.events)
+                self.writes += 1
+                self._writing = None
+                self._cond.notify_all()
+
+
+_writer: WriteBehindWriter | None = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> WriteBehindWriter:
+    """The process-wide writer shared by all write-behind sessions."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = WriteBehindWriter()
+            atexit.register(_writer.drain, 10.0)
+        return _writer
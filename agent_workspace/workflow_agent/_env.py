@@ -0,0 +1,30 @@
+"""Environment flag parsing shared by the workflow agent modules."""
+from __future__ import annotations
+
+import os
+
+
+def env_bool(name: str, *, default: bool = False) -> bool:
+    """Parse environment variable as boolean."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    cleaned = value.strip().lower()
+    if not cleaned:
+        return default
+    if cleaned in {"1", "true", "yes", "y", "on"}:
+        return True
+    if cleaned in {"0", "false", "no", "n", "off"}:
+        return False
+    return default
+
+
+def env_float(name: str, *, default: float) -> float:
+    """Parse environment variable as a float, falling back to ``default``."""
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return default
@@ -0,0 +1,234 @@
+"""Process-wide admission control for LLM calls.
+
+Every bridge call must be admitted before it reaches the provider. Per LLM
+client, the controller caps concurrent in-flight requests and enforces
+token buckets on requests and tokens per minute, so a burst of sessions
+queues locally instead of tripping provider rate limits (and the retries
+that amplify them). Waiting calls are served by priority: interactive
+phases the user is waiting on first, codegen retries last.
+
+Limits come from env vars (0 disables a bucket):
+
+- ``llm_max_concurrent``: in-flight requests per client (default 8)
+- ``llm_requests_per_minute``: request budget per client (default 0)
+- ``llm_tokens_per_minute``: token budget per client (default 0)
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any
+
+from ._env import env_float
+
+# Client used by every BAML function (see baml_src/clients.baml)
+DEFAULT_CLIENT = "OpenRouterChat"
+
+# Rough prompt size estimate used to charge the token bucket up front
+CHARS_PER_TOKEN = 4
+
+
+class Priority(IntEnum):
+    """Admission priority; lower values are served first."""
+
+    INTERACTIVE = 0  # plan, plan review, chat, respond: the user is waiting
+    CODEGEN = 1  # first codegen attempt
+    BACKGROUND = 2  # codegen retries
+
+
+def priority_for(function_name: str, inputs: dict[str, Any]) -> Priority:
+    """Pick the admission priority of a BAML call."""
+    if function_name != "WorkflowCodegen":
+        return Priority.INTERACTIVE
+    if int(inputs.get("attempt") or 1) > 1:
+        return Priority.BACKGROUND
+    return Priority.CODEGEN
+
+
+def estimate_tokens(inputs: dict[str, Any]) -> int:
+    """Estimate the prompt tokens of a call from the size of its arguments."""
+    return max(1, sum(len(str(value)) for value in inputs.values()) // CHARS_PER_TOKEN)
+
+
+@dataclass(frozen=True)
+class AdmissionLimits:
+    """Per-client limits; a rate of 0 means unlimited."""
+
+    max_concurrent: int = 8
+    requests_per_minute: float = 0
+    tokens_per_minute: float = 0
+
+    @classmethod
+    def from_env(cls) -> AdmissionLimits:
+        return cls(
+            max_concurrent=max(1, int(env_float("llm_max_concurrent", default=8))),
+            requests_per_minute=env_float("llm_requests_per_minute", default=0),
+            tokens_per_minute=env_float("llm_tokens_per_minute", default=0),
+        )
+
+
+class TokenBucket:
+    """Token bucket holding up to one minute of budget, refilled continuously."""
+
+    def __init__(self, per_minute: float, *, clock: Callable[[], float] = time.monotonic):
+        self.capacity = float(per_minute)
+        self._rate = self.capacity / 60.0
+        self._clock = clock
+        self._level = self.capacity
+        self._updated = clock()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` can be taken (0 when it can be taken now)."""
+        if self.unlimited:
+            return 0.0
+        self._refill()
+        missing = min(amount, self.capacity) - self._level
+        return max(0.0, missing / self._rate)
+
+    def take(self, amount: float) -> None:
+        """Take ``amount`` (may drive the level negative to record overuse)."""
+        if self.unlimited:
+            return
+        self._refill()
+        self._level -= amount
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self._rate)
+        self._updated = now
+
+
+class Admission:
+    """A granted admission; report actual usage with settle()."""
+
+    def __init__(self, gate: _ClientGate, *, tokens: int, wait_ms: float):
+        self._gate = gate
+        self._charged = tokens
+        self.wait_ms = wait_ms
+
+    def settle(self, actual_tokens: int | None) -> None:
+        """Correct the token bucket once the real token usage is known."""
+        if actual_tokens is not None:
+            self._gate.tokens.take(actual_tokens - self._charged)
+            self._charged = actual_tokens
+
+
+class _ClientGate:
+    """Concurrency slots, rate buckets and the priority queue of one client."""
+
+    def __init__(self, limits: AdmissionLimits, clock: Callable[[], float]):
+        self.limits = limits
+        self.in_flight = 0
+        self.requests = TokenBucket(limits.requests_per_minute, clock=clock)
+        self.tokens = TokenBucket(limits.tokens_per_minute, clock=clock)
+        self._waiters: list[tuple[int, int, asyncio.Future, int]] = []
+        self._seq = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+
+    def queued(self) -> int:
+        return sum(1 for _, _, future, _ in self._waiters if not future.done())
+
+    def enqueue(self, priority: Priority, tokens: int) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._seq), future, tokens))
+        self.dispatch()
+        return future
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self.dispatch()
+
+    def dispatch(self) -> None:
+        while self._waiters and self.in_flight < self.limits.max_concurrent:
+            _, _, future, tokens = self._waiters[0]
+            if future.done():  # cancelled while queued
+                heapq.heappop(self._waiters)
+                continue
+            delay = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+            if delay > 0:
+                self._schedule(delay)
+                return
+            heapq.heappop(self._waiters)
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            self.in_flight += 1
+            future.set_result(None)
+
+    def _schedule(self, delay: float) -> None:
+        if self._timer is not None and not self._timer.cancelled():
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self.dispatch()
+
+
+class AdmissionController:
+    """Admit LLM calls per client under concurrency and rate limits."""
+
+    def __init__(self, limits: AdmissionLimits | None = None, *, clock: Callable[[], float] = time.monotonic):
+        self.limits = limits or AdmissionLimits()
+        self._clock = clock
+        self._gates: dict[str, _ClientGate] = {}
+
+    def gate(self, client: str) -> _ClientGate:
+        gate = self._gates.get(client)
+        if gate is None:
+            gate = self._gates[client] = _ClientGate(self.limits, self._clock)
+        return gate
+
+    @asynccontextmanager
+    async def admit(
+        self, client: str = DEFAULT_CLIENT, *, priority: Priority = Priority.INTERACTIVE, tokens: int = 1
+    ) -> AsyncIterator[Admission]:
+        """Wait for admission, hold a concurrency slot for the block, then release it.
+
+        Args:
+            client: LLM client the call will be sent to
+            priority: Admission priority of the call
+            tokens: Estimated tokens charged to the token bucket up front
+
+        Yields:
+            Admission with the queue wait in milliseconds
+        """
+        gate = self.gate(client)
+        started = time.perf_counter()
+        future = gate.enqueue(priority, tokens)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                gate.release()  # Admitted just as the caller was cancelled
+            raise
+        try:
+            yield Admission(gate, tokens=tokens, wait_ms=(time.perf_counter() - started) * 1000)
+        finally:
+            gate.release()
+
+
+_controller: AdmissionController | None = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """Return the process-wide controller, configured from env on first use."""
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController(AdmissionLimits.from_env())
+    return _controller
+
+
+def configure_admission(controller: AdmissionController | None) -> None:
+    """Replace the process-wide controller (None re-reads the env on next use)."""
+    global _controller
+    _controller = controller
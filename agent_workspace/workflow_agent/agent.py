@@ -8,34 +8,81 @@ components directly from the sub_agents package.
 """
 from __future__ import annotations
 
+import asyncio
+import dataclasses
+import functools
 import json
-import os
+import time
 import uuid
+from collections.abc import AsyncIterator, Iterable
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
+from . import baml_bridge
+from ._env import env_bool as _env_bool
 from .baml_bridge import workflow_chat
+from .batch import BatchRequest, BatchResult
 from .code_executor import PythonCodeExecutor
 from .skill_registry import SkillRegistry
-from .sub_agents.executor import ExecutionResult, WorkflowExecutor, MultiTurnWorkflowExecutor
-from .sub_agents.planner import Plan, Planner
+from .sub_agents.executor import (
+    ExecutionResult,
+    MultiTurnWorkflowExecutor,
+    PartialCodeCallback,
+    PartialTextCallback,
+    WorkflowExecutor,
+    consume_stream,
+)
+from .sub_agents.planner import Plan, Planner, PlanningResult, plans_equivalent
+from .timing import phase, record_phases
 from .types import AgentResult, WorkflowExecuteResult, WorkflowState
 
 
-def _env_bool(name: str, *, default: bool = False) -> bool:
-    """Parse environment variable as boolean."""
-    value = os.getenv(name)
-    if value is None:
-        return default
-    cleaned = value.strip().lower()
-    if not cleaned:
-        return default
-    if cleaned in {"1", "true", "yes", "y", "on"}:
-        return True
-    if cleaned in {"0", "false", "no", "n", "off"}:
-        return False
-    return default
+def resolve_async_bridge(name: str):
+    """Return the async bridge function used for a BAML phase.
+
+    The async pipeline calls ``<name>_async`` from this module. When the sync
+    ``<name>`` entry point has been overridden here (tests, custom backends),
+    that override is honoured by running it in a worker thread instead.
+
+    Args:
+        name: Sync bridge function name, e.g. "workflow_codegen"
+
+    Returns:
+        Coroutine function accepting the bridge keyword arguments
+    """
+    module_globals = globals()
+    sync_fn = module_globals[name]
+    if sync_fn is not getattr(baml_bridge, name):
+        return functools.partial(asyncio.to_thread, sync_fn)
+    return module_globals[f"{name}_async"]
+
+
+def resolve_stream_bridge(name: str):
+    """Return the streaming bridge function used for a BAML phase.
+
+    Falls back to a single-item stream of the (possibly overridden) sync or
+    async entry point when either has been overridden on this module.
+
+    Args:
+        name: Sync bridge function name, e.g. "workflow_codegen"
+
+    Returns:
+        Async generator function yielding cumulative response text
+    """
+    module_globals = globals()
+    overridden = module_globals[name] is not getattr(baml_bridge, name) or (
+        module_globals[f"{name}_async"] is not getattr(baml_bridge, f"{name}_async")
+    )
+    if not overridden:
+        return module_globals[f"{name}_stream"]
+
+    call = resolve_async_bridge(name)
+
+    async def _single_item_stream(**kwargs):
+        yield await call(**kwargs)
+
+    return _single_item_stream
 
 
 class WorkflowAgent:
@@ -52,7 +99,13 @@ class WorkflowAgent:
     components directly from the sub_agents package.
     """
 
-    def __init__(self, max_attempts: int = 3, *, enable_workflow_plan_review: bool | None = None):
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        *,
+        enable_workflow_plan_review: bool | None = None,
+        enable_workflow_plan_pipelining: bool | None = None,
+    ):
         self.max_attempts = max(1, int(max_attempts))
         self.workspace_dir = Path(__file__).resolve().parents[1]
         self.skills_v2_dir = self.workspace_dir / "skills_v2"
@@ -71,6 +124,8 @@ class WorkflowAgent:
             default_tools_root=self.default_tools_root,
             default_docs_dir=self.default_docs_dir,
             max_attempts=self.max_attempts,
+            stream_codegen=_env_bool("enable_streaming_codegen", default=True),
+            template_responses=_env_bool("enable_template_response", default=True),
         )
         # Initialize multi-turn executor wrapper
         self._multi_turn_executor = MultiTurnWorkflowExecutor(self._workflow_executor)
@@ -79,6 +134,36 @@ class WorkflowAgent:
             enable_workflow_plan_review = _env_bool("enable_workflow_plan_review", default=False)
         self.enable_workflow_plan_review = bool(enable_workflow_plan_review)
 
+        # Speculatively start codegen for the proposed plan while the review runs
+        if enable_workflow_plan_pipelining is None:
+            enable_workflow_plan_pipelining = _env_bool("enable_workflow_plan_pipelining", default=False)
+        self.enable_workflow_plan_pipelining = bool(enable_workflow_plan_pipelining)
+
+        # UI: generate (and optionally dry-run validate) code while the user reviews the plan
+        self.enable_speculative_codegen = _env_bool("enable_speculative_codegen", default=True)
+        self.enable_speculative_dry_run = _env_bool("enable_speculative_dry_run", default=False)
+
+    def warm(self) -> dict[str, float]:
+        """Build the caches shared by all sessions, e.g. once at server start.
+
+        Indexes the skills, renders the tool contracts of every skill group,
+        primes the code executor and loads the BAML runtime.
+
+        Returns:
+            Milliseconds spent warming each component
+        """
+        timings: dict[str, float] = {}
+        for name, warm in [
+            ("skills", self.skills.warm),
+            ("tool_contracts", lambda: self._workflow_executor.warm(self.skills.list_skill_groups())),
+            ("executor", self.executor.warm),
+            ("baml_runtime", baml_bridge.warm),
+        ]:
+            started = time.perf_counter()
+            warm()
+            timings[name] = (time.perf_counter() - started) * 1000
+        return timings
+
     async def run(self, user_message: str, *, conversation_history: str = "") -> AgentResult:
         """Run the complete workflow.
 
@@ -90,31 +175,98 @@ class WorkflowAgent:
             conversation_history: Previous conversation context
 
         Returns:
-            AgentResult containing the final response and execution details
+            AgentResult containing the final response, execution details and
+            the time spent per phase
         """
-        # Phase 1: Planning
-        planning_result = self._planner.plan(
-            user_message=user_message,
-            conversation_history=conversation_history,
-            enable_review=self.enable_workflow_plan_review,
-        )
+        with record_phases() as phases:
+            result = await self._run(user_message, conversation_history=conversation_history)
+        return dataclasses.replace(result, phase_ms=phases)
+
+    async def run_many(
+        self, requests: Iterable[BatchRequest], *, concurrency: int = 4
+    ) -> AsyncIterator[BatchResult]:
+        """Run many requests with at most ``concurrency`` in flight.
+
+        Requests are pulled from ``requests`` lazily, so it can stream from a
+        large file. Each request moves through plan, codegen, execute and
+        respond independently of the others.
+
+        Args:
+            requests: Requests to run
+            concurrency: Maximum number of requests in flight
+
+        Yields:
+            BatchResult per request, in completion order
+        """
+        pending: set[asyncio.Task[BatchResult]] = set()
+        requests = iter(requests)
+
+        def start_next() -> bool:
+            request = next(requests, None)
+            if request is None:
+                return False
+            pending.add(asyncio.ensure_future(self._run_batch_request(request)))
+            return True
+
+        try:
+            while len(pending) < max(1, concurrency) and start_next():
+                pass
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    pending.discard(task)
+                    start_next()
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _run_batch_request(self, request: BatchRequest) -> BatchResult:
+        if request.error is not None:
+            return BatchResult.failed(request, error=ValueError(request.error), duration_ms=0.0)
+        started = time.perf_counter()
+        try:
+            result = await self.run(request.user_message, conversation_history=request.conversation_history)
+        except Exception as e:
+            return BatchResult.failed(request, error=e, duration_ms=(time.perf_counter() - started) * 1000)
+        return BatchResult.from_agent_result(request, result, duration_ms=(time.perf_counter() - started) * 1000)
+
+    async def _run(self, user_message: str, *, conversation_history: str = "") -> AgentResult:
+        # Phase 1: Planning (optionally pipelined with speculative codegen)
+        speculative_code = None
+        with phase("plan"):
+            if self.enable_workflow_plan_review and self.enable_workflow_plan_pipelining:
+                planning_result, speculative_code = await self._plan_with_speculative_codegen(
+                    user_message=user_message,
+                    conversation_history=conversation_history,
+                )
+            else:
+                planning_result = await self._planner.plan_async(
+                    user_message=user_message,
+                    conversation_history=conversation_history,
+                    enable_review=self.enable_workflow_plan_review,
+                )
         plan = planning_result.plan
         plan_json = planning_result.plan_json
         selected_skill = planning_result.selected_skill
 
         # Phase 2: Chat or Execute
         if plan.action == "chat":
-            final_response = self.chat(user_message=user_message, conversation_history=conversation_history)
+            with phase("chat"):
+                final_response = await self.chat_async(user_message=user_message, conversation_history=conversation_history)
             return AgentResult(final_response=final_response.strip(), plan_json=plan_json)
 
         skill_md = self.get_skill_md(plan=plan, selected_skill=selected_skill)
 
         # Phase 3: Execute with retries (Multi-turn aware)
-        execute_result = self.execute_multi_turn_workflow(
+        execute_result = await self.execute_multi_turn_workflow_async(
             user_message=user_message,
             plan_json=plan_json,
             skill_md=skill_md,
             conversation_history=conversation_history,
+            initial_code=speculative_code,
         )
 
         workflow_state = None
@@ -123,6 +275,7 @@ class WorkflowAgent:
                 session_id=str(uuid.uuid4()),
                 plan_json=plan_json,
                 collected_facts=execute_result.continuation_facts,
+                current_step=1,
             )
             max_turns = 2
             try:
@@ -133,14 +286,10 @@ class WorkflowAgent:
             except Exception:
                 max_turns = 2
 
+            # Each turn resumes after the last completed checkpoint
             turns = 1
             while execute_result.needs_continuation and turns < max_turns:
-                workflow_state = self.update_workflow_state(
-                    workflow_state,
-                    next_step=workflow_state.get("current_step", 0) + 1,
-                    facts=execute_result.continuation_facts,
-                )
-                execute_result = self.execute_multi_turn_workflow(
+                execute_result = await self.execute_multi_turn_workflow_async(
                     user_message=user_message,
                     plan_json=plan_json,
                     skill_md=skill_md,
@@ -148,19 +297,26 @@ class WorkflowAgent:
                     workflow_state=workflow_state,
                 )
                 turns += 1
+                if execute_result.needs_continuation:
+                    workflow_state = self.update_workflow_state(
+                        workflow_state,
+                        next_step=workflow_state.get("current_step", 0) + 1,
+                        facts=execute_result.continuation_facts,
+                    )
 
             if not execute_result.needs_continuation:
                 workflow_state = None
 
         # Phase 4: Generate response
-        final_response = self._workflow_executor.respond(
-            user_message=user_message,
-            plan_json=plan_json,
-            executed_code=execute_result.code,
-            exec_result=execute_result.exec_result,
-            attempts=execute_result.attempts_used,
-            conversation_history=conversation_history,
-        )
+        with phase("respond"):
+            final_response = await self._workflow_executor.respond_async(
+                user_message=user_message,
+                plan_json=plan_json,
+                executed_code=execute_result.code,
+                exec_result=execute_result.exec_result,
+                attempts=execute_result.attempts_used,
+                conversation_history=conversation_history,
+            )
 
         return AgentResult(
             final_response=final_response.strip(),
@@ -172,6 +328,59 @@ class WorkflowAgent:
             workflow_state=workflow_state,
         )
 
+    async def _plan_with_speculative_codegen(
+        self, *, user_message: str, conversation_history: str
+    ) -> tuple[PlanningResult, str | None]:
+        """Plan with review while speculatively generating code for the proposed plan.
+
+        Codegen for the proposed plan runs concurrently with the plan review.
+        The generated code is kept only when the reviewed plan is equivalent
+        to the proposed one; otherwise it is discarded and the caller
+        regenerates code for the reviewed plan.
+
+        Args:
+            user_message: The user's request
+            conversation_history: Previous conversation context
+
+        Returns:
+            Tuple of (PlanningResult, speculative code or None)
+        """
+        proposed = await self._planner.propose_async(
+            user_message=user_message,
+            conversation_history=conversation_history,
+        )
+        if not self._planner.needs_review(proposed):
+            return proposed, None
+
+        speculative = asyncio.create_task(
+            self._workflow_executor.codegen_async(
+                user_message=user_message,
+                plan_json=proposed.plan_json,
+                skill_md=self.get_skill_md(plan=proposed.plan, selected_skill=proposed.selected_skill),
+                conversation_history=conversation_history,
+            )
+        )
+        try:
+            reviewed = await self._planner.review_async(
+                proposed,
+                user_message=user_message,
+                conversation_history=conversation_history,
+            )
+        except BaseException:
+            speculative.cancel()
+            raise
+
+        if not plans_equivalent(proposed.plan, reviewed.plan):
+            speculative.cancel()
+            return reviewed, None
+
+        try:
+            code = await speculative
+        except Exception:
+            # Failed speculation falls back to the regular codegen attempt
+            return reviewed, None
+        return reviewed, code
+
     def plan(self, user_message: str, *, conversation_history: str = ""):
         """Create a plan from user message.
 
@@ -192,6 +401,15 @@ class WorkflowAgent:
         )
         return planning_result.plan, planning_result.plan_json, planning_result.selected_skill
 
+    async def plan_async(self, user_message: str, *, conversation_history: str = ""):
+        """Async variant of plan()."""
+        planning_result = await self._planner.plan_async(
+            user_message=user_message,
+            conversation_history=conversation_history,
+            enable_review=self.enable_workflow_plan_review,
+        )
+        return planning_result.plan, planning_result.plan_json, planning_result.selected_skill
+
     def codegen(
         self,
         user_message: str,
@@ -219,8 +437,7 @@ class WorkflowAgent:
         """
         from .sub_agents.executor import _extract_code_block
 
-        docs_registry = self._docs_registry_for_plan(plan_json=plan_json)
-        tool_contracts = docs_registry.render_tool_contracts()
+        tool_contracts = self._workflow_executor.tool_contracts(plan_json)
 
         code = workflow_codegen(
             user_message=user_message,
@@ -236,6 +453,47 @@ class WorkflowAgent:
         compile(extracted, "<generated>", "exec")
         return extracted
 
+    async def codegen_async(
+        self,
+        user_message: str,
+        plan_json: str,
+        skill_md: str,
+        *,
+        conversation_history: str = "",
+        attempt: int = 1,
+        previous_error: str = "",
+        previous_code: str = "",
+        on_partial: PartialCodeCallback | None = None,
+    ) -> str:
+        """Async variant of codegen().
+
+        When streaming codegen is enabled, ``on_partial`` receives the partial
+        code as it arrives and the response is validated incrementally.
+        """
+        return await self._workflow_executor.codegen_async(
+            user_message=user_message,
+            plan_json=plan_json,
+            skill_md=skill_md,
+            conversation_history=conversation_history,
+            attempt=attempt,
+            previous_error=previous_error,
+            previous_code=previous_code,
+            on_partial=on_partial,
+        )
+
+    def validate_code(self, code: str) -> list[str]:
+        """Dry-run validate generated code without executing it.
+
+        Args:
+            code: Python code to validate
+
+        Returns:
+            List of problems found; empty when the code looks runnable
+        """
+        from .sub_agents.executor import validate_generated_code
+
+        return validate_generated_code(code)
+
     def execute(self, code: str, *, plan_json: str | None = None) -> ExecutionResult:
         """Execute generated Python code.
 
@@ -253,6 +511,15 @@ class WorkflowAgent:
         raw_result = self.executor.run(code, extra_pythonpaths=extra)
         return ExecResult(stdout=raw_result.stdout, stderr=raw_result.stderr, exit_code=raw_result.exit_code)
 
+    async def execute_async(self, code: str, *, plan_json: str | None = None) -> ExecutionResult:
+        """Async variant of execute()."""
+        from .sub_agents.executor import ExecutionResult as ExecResult
+
+        tools_root = self._tools_root_for_plan(plan_json=plan_json)
+        extra = [tools_root] if tools_root and tools_root != self.default_tools_root else None
+        raw_result = await self.executor.run_async(code, extra_pythonpaths=extra)
+        return ExecResult(stdout=raw_result.stdout, stderr=raw_result.stderr, exit_code=raw_result.exit_code)
+
     def respond(
         self,
         user_message: str,
@@ -276,15 +543,35 @@ class WorkflowAgent:
         Returns:
             Final response string
         """
-        return workflow_respond(
+        return self._workflow_executor.respond(
+            user_message=user_message,
+            plan_json=plan_json,
+            executed_code=executed_code,
+            exec_result=exec_result,
+            attempts=attempts,
+            conversation_history=conversation_history,
+        )
+
+    async def respond_async(
+        self,
+        user_message: str,
+        plan_json: str,
+        executed_code: str,
+        exec_result: ExecutionResult,
+        *,
+        conversation_history: str = "",
+        attempts: int,
+        on_partial: PartialTextCallback | None = None,
+    ) -> str:
+        """Async variant of respond(); streams to ``on_partial`` when given."""
+        return await self._workflow_executor.respond_async(
             user_message=user_message,
             plan_json=plan_json,
             executed_code=executed_code,
-            exec_stdout=exec_result.stdout,
-            exec_stderr=exec_result.stderr,
-            exit_code=exec_result.exit_code,
+            exec_result=exec_result,
             attempts=attempts,
             conversation_history=conversation_history,
+            on_partial=on_partial,
         )
 
     def chat(self, user_message: str, *, conversation_history: str = "") -> str:
@@ -306,6 +593,24 @@ class WorkflowAgent:
             conversation_history=conversation_history,
         )
 
+    async def chat_async(
+        self,
+        user_message: str,
+        *,
+        conversation_history: str = "",
+        on_partial: PartialTextCallback | None = None,
+    ) -> str:
+        """Async variant of chat(); streams to ``on_partial`` when given."""
+        inputs = {
+            "user_message": user_message,
+            "skills_readme": self.skills.read_skills_readme(),
+            "custom_skill_md": self.custom_skill_md_path.read_text(encoding="utf-8"),
+            "conversation_history": conversation_history,
+        }
+        if on_partial is not None:
+            return await consume_stream(resolve_stream_bridge("workflow_chat")(**inputs), on_partial)
+        return await resolve_async_bridge("workflow_chat")(**inputs)
+
     def get_skill_md(self, plan: Plan, selected_skill) -> str:
         """Get the skill Markdown content.
 
@@ -353,6 +658,7 @@ class WorkflowAgent:
         *,
         conversation_history: str = "",
         workflow_state: dict | None = None,
+        initial_code: str | None = None,
     ) -> WorkflowExecuteResult:
         """Execute a workflow that may span multiple turns.
 
@@ -368,6 +674,7 @@ class WorkflowAgent:
             skill_md: The skill Markdown content
             conversation_history: Previous conversation context
             workflow_state: Optional existing workflow state to resume
+            initial_code: Already generated code to use for the first attempt
 
         Returns:
             WorkflowExecuteResult with continuation info if applicable
@@ -378,6 +685,7 @@ class WorkflowAgent:
             skill_md=skill_md,
             conversation_history=conversation_history,
             workflow_state=workflow_state,
+            initial_code=initial_code,
         )
 
         # Convert to WorkflowExecuteResult
@@ -390,11 +698,41 @@ class WorkflowAgent:
             continuation_facts=result.collected_facts,
         )
 
+    async def execute_multi_turn_workflow_async(
+        self,
+        user_message: str,
+        plan_json: str,
+        skill_md: str,
+        *,
+        conversation_history: str = "",
+        workflow_state: dict | None = None,
+        initial_code: str | None = None,
+    ) -> WorkflowExecuteResult:
+        """Async variant of execute_multi_turn_workflow()."""
+        result = await self._multi_turn_executor.execute_with_continuation_async(
+            user_message=user_message,
+            plan_json=plan_json,
+            skill_md=skill_md,
+            conversation_history=conversation_history,
+            workflow_state=workflow_state,
+            initial_code=initial_code,
+        )
+
+        return WorkflowExecuteResult(
+            code=result.code,
+            exec_result=result.exec_result,
+            attempts_used=result.attempts_used,
+            needs_continuation=result.needs_continuation,
+            workflow_state=None,
+            continuation_facts=result.collected_facts,
+        )
+
     @staticmethod
     def create_workflow_state(
         session_id: str,
         plan_json: str,
         collected_facts: dict[str, Any] | None = None,
+        current_step: int = 0,
     ) -> dict:
         """Create a new workflow state dictionary for multi-turn workflows.
 
@@ -402,6 +740,7 @@ class WorkflowAgent:
             session_id: The session/thread ID
             plan_json: The plan JSON for this workflow
             collected_facts: Optional initial facts from first turn
+            current_step: Number of plan checkpoints completed so far
 
         Returns:
             Dictionary representing the workflow state
@@ -409,7 +748,7 @@ class WorkflowAgent:
         return {
             "workflow_id": f"wf_{uuid.uuid4().hex[:8]}",
             "session_id": session_id,
-            "current_step": 0,
+            "current_step": current_step,
             "plan_json": plan_json,
             "collected_facts": collected_facts or {},
             "checkpoint_results": [],
@@ -521,19 +860,37 @@ def _infer_skill_group(skill_path: Path) -> str | None:
 # Tests may monkeypatch these at the agent module level
 from .baml_bridge import (
     workflow_chat,
+    workflow_chat_async,
+    workflow_chat_stream,
     workflow_codegen,
+    workflow_codegen_async,
+    workflow_codegen_stream,
     workflow_plan,
+    workflow_plan_async,
     workflow_plan_review,
+    workflow_plan_review_async,
     workflow_respond,
+    workflow_respond_async,
+    workflow_respond_stream,
 )
 
 __all__ = [
     "WorkflowAgent",
+    "resolve_async_bridge",
+    "resolve_stream_bridge",
     "workflow_plan",
     "workflow_plan_review",
     "workflow_codegen",
     "workflow_chat",
     "workflow_respond",
+    "workflow_plan_async",
+    "workflow_plan_review_async",
+    "workflow_codegen_async",
+    "workflow_chat_async",
+    "workflow_respond_async",
+    "workflow_codegen_stream",
+    "workflow_chat_stream",
+    "workflow_respond_stream",
     "_extract_logic_flow_steps",
     "_infer_skill_group",
     # Multi-turn types
@@ -1,29 +1,38 @@
 from __future__ import annotations
 
+from collections.abc import AsyncIterator, Callable
+from typing import Any
 
-def workflow_plan(
-    *, user_message: str, skills_readme: str, skill_names: list[str], skill_groups: list[str], conversation_history: str
-) -> dict:
+from .admission import DEFAULT_CLIENT, estimate_tokens, get_admission_controller, priority_for
+from .coalescing import SingleFlight, coalescing_enabled, request_key
+from .hedging import client_options, get_hedger, hedge_client, hedging_enabled
+from .replay import get_llm_backend
+from .telemetry import trace_llm_call
+
+_ACTION_MAP = {
+    "Chat": "chat",
+    "ExecuteSkill": "execute_skill",
+    "CustomScript": "custom_script",
+    "chat": "chat",
+    "execute_skill": "execute_skill",
+    "custom_script": "custom_script",
+}
+
+
+def warm() -> None:
+    """Load the BAML runtime and render one prompt, so the first request does not pay for it."""
+    import baml_client.async_client  # noqa: F401
     from baml_client.sync_client import b
 
-    plan = b.WorkflowPlan(
-        user_message=user_message,
-        skills_readme=skills_readme,
-        skill_names=skill_names,
-        skill_groups=skill_groups,
-        conversation_history=conversation_history,
-    )
+    try:
+        b.request.WorkflowChat(user_message="", skills_readme="", custom_skill_md="", conversation_history="")
+    except Exception:
+        pass  # e.g. provider env vars not set yet; the runtime itself is loaded
+
 
+def _plan_to_dict(plan) -> dict:
     action = getattr(plan.action, "value", plan.action)
-    action_map = {
-        "Chat": "chat",
-        "ExecuteSkill": "execute_skill",
-        "CustomScript": "custom_script",
-        "chat": "chat",
-        "execute_skill": "execute_skill",
-        "custom_script": "custom_script",
-    }
-    action_normalized = action_map.get(str(action), str(action))
+    action_normalized = _ACTION_MAP.get(str(action), str(action))
 
     return {
         "action": action_normalized,
@@ -36,36 +45,33 @@ def workflow_plan(
     }
 
 
-def workflow_plan_review(*, user_message: str, proposed_plan_json: str, selected_skill_md: str, conversation_history: str) -> dict:
+def workflow_plan(
+    *, user_message: str, skills_readme: str, skill_names: list[str], skill_groups: list[str], conversation_history: str
+) -> dict:
     from baml_client.sync_client import b
 
-    plan = b.WorkflowPlanReview(
-        user_message=user_message,
-        proposed_plan_json=proposed_plan_json,
-        selected_skill_md=selected_skill_md,
-        conversation_history=conversation_history,
-    )
+    with trace_llm_call("WorkflowPlan") as trace:
+        plan = b.with_options(**trace.options()).WorkflowPlan(
+            user_message=user_message,
+            skills_readme=skills_readme,
+            skill_names=skill_names,
+            skill_groups=skill_groups,
+            conversation_history=conversation_history,
+        )
+    return _plan_to_dict(plan)
 
-    action = getattr(plan.action, "value", plan.action)
-    action_map = {
-        "Chat": "chat",
-        "ExecuteSkill": "execute_skill",
-        "CustomScript": "custom_script",
-        "chat": "chat",
-        "execute_skill": "execute_skill",
-        "custom_script": "custom_script",
-    }
-    action_normalized = action_map.get(str(action), str(action))
 
-    return {
-        "action": action_normalized,
-        "skill_group": plan.skill_group,
-        "skill_name": plan.skill_name,
-        "intent": plan.intent,
-        "steps": list(plan.steps or []),
-        "requires_lookahead": bool(plan.requires_lookahead),
-        "checkpoints": list(plan.checkpoints or []),
-    }
+def workflow_plan_review(*, user_message: str, proposed_plan_json: str, selected_skill_md: str, conversation_history: str) -> dict:
+    from baml_client.sync_client import b
+
+    with trace_llm_call("WorkflowPlanReview") as trace:
+        plan = b.with_options(**trace.options()).WorkflowPlanReview(
+            user_message=user_message,
+            proposed_plan_json=proposed_plan_json,
+            selected_skill_md=selected_skill_md,
+            conversation_history=conversation_history,
+        )
+    return _plan_to_dict(plan)
 
 
 def workflow_codegen(
@@ -81,27 +87,29 @@ def workflow_codegen(
 ) -> str:
     from baml_client.sync_client import b
 
-    return b.WorkflowCodegen(
-        user_message=user_message,
-        plan_json=plan_json,
-        skill_md=skill_md,
-        tool_contracts=tool_contracts,
-        attempt=attempt,
-        previous_error=previous_error,
-        previous_code=previous_code,
-        conversation_history=conversation_history,
-    )
+    with trace_llm_call("WorkflowCodegen") as trace:
+        return b.with_options(**trace.options()).WorkflowCodegen(
+            user_message=user_message,
+            plan_json=plan_json,
+            skill_md=skill_md,
+            tool_contracts=tool_contracts,
+            attempt=attempt,
+            previous_error=previous_error,
+            previous_code=previous_code,
+            conversation_history=conversation_history,
+        )
 
 
 def workflow_chat(*, user_message: str, skills_readme: str, custom_skill_md: str, conversation_history: str) -> str:
     from baml_client.sync_client import b
 
-    result = b.WorkflowChat(
-        user_message=user_message,
-        skills_readme=skills_readme,
-        custom_skill_md=custom_skill_md,
-        conversation_history=conversation_history,
-    )
+    with trace_llm_call("WorkflowChat") as trace:
+        result = b.with_options(**trace.options()).WorkflowChat(
+            user_message=user_message,
+            skills_readme=skills_readme,
+            custom_skill_md=custom_skill_md,
+            conversation_history=conversation_history,
+        )
     return result.final_response
 
 
@@ -118,13 +126,287 @@ def workflow_respond(
 ) -> str:
     from baml_client.sync_client import b
 
-    return b.WorkflowRespond(
-        user_message=user_message,
-        plan_json=plan_json,
-        executed_code=executed_code,
-        exec_stdout=exec_stdout,
-        exec_stderr=exec_stderr,
-        exit_code=exit_code,
-        attempts=attempts,
-        conversation_history=conversation_history,
+    with trace_llm_call("WorkflowRespond") as trace:
+        return b.with_options(**trace.options()).WorkflowRespond(
+            user_message=user_message,
+            plan_json=plan_json,
+            executed_code=executed_code,
+            exec_stdout=exec_stdout,
+            exec_stderr=exec_stderr,
+            exit_code=exit_code,
+            attempts=attempts,
+            conversation_history=conversation_history,
+        )
+
+
+# --- Async variants (BamlAsyncClient) ---
+# These never block the event loop, so one process can serve many sessions.
+# Identical concurrent calls share one in-flight request (see coalescing.py),
+# every request waits for admission under the client limits (admission.py), and
+# slow plan/codegen requests can be hedged with a second request (hedging.py).
+
+_singleflight = SingleFlight()
+
+
+def _admit(client: str, function_name: str, inputs: dict[str, Any]):
+    return get_admission_controller().admit(
+        client, priority=priority_for(function_name, inputs), tokens=estimate_tokens(inputs)
+    )
+
+
+async def _request(
+    function_name: str, inputs: dict[str, Any], *, client: str = DEFAULT_CLIENT, hedge: bool = False
+) -> Any:
+    """Send one admitted, traced request for a BAML function to ``client``."""
+    from baml_client.async_client import b
+
+    backend = get_llm_backend()
+    with trace_llm_call(function_name, hedge=hedge) as trace:
+        async with _admit(client, function_name, inputs) as admission:
+            trace.mark_admitted(admission.wait_ms)
+            if backend.replaying:
+                return await backend.replay(function_name, inputs)
+            options = {**trace.options(), **client_options(client)}
+            result = await getattr(b.with_options(**options), function_name)(**inputs)
+            admission.settle(trace.total_tokens())
+            if backend.recording:
+                backend.cassette.record(function_name, inputs, result)
+            return result
+
+
+async def _request_stream(
+    function_name: str,
+    inputs: dict[str, Any],
+    *,
+    text_of: Callable[[Any], str | None],
+    client: str = DEFAULT_CLIENT,
+    hedge: bool = False,
+) -> AsyncIterator[str]:
+    """Streaming variant of _request(); yields the cumulative text, last item final."""
+    from baml_client.async_client import b
+
+    backend = get_llm_backend()
+    with trace_llm_call(function_name, hedge=hedge) as trace:
+        async with _admit(client, function_name, inputs) as admission:
+            trace.mark_admitted(admission.wait_ms)
+            if backend.replaying:
+                final = backend.cassette.lookup(function_name, inputs)
+                async for text in backend.replay_partials(text_of(final)):
+                    trace.mark_first_token()
+                    yield text
+            else:
+                options = {**trace.options(), **client_options(client)}
+                response = getattr(b.with_options(**options).stream, function_name)(**inputs)
+                async for partial in response:
+                    text = text_of(partial) if partial is not None else None
+                    if text:
+                        trace.mark_first_token()
+                        yield text
+                final = await response.get_final_response()
+                admission.settle(trace.total_tokens())
+                if backend.recording:
+                    backend.cassette.record(function_name, inputs, final)
+        yield text_of(final)
+
+
+async def _call_async(function_name: str, inputs: dict[str, Any]) -> Any:
+    """Call a BAML function on the async client, coalescing and hedging as configured."""
+
+    async def call() -> Any:
+        if hedging_enabled(function_name):
+            return await get_hedger().call(
+                function_name,
+                lambda: _request(function_name, inputs),
+                lambda: _request(function_name, inputs, client=hedge_client(), hedge=True),
+            )
+        return await _request(function_name, inputs)
+
+    if not coalescing_enabled(function_name):
+        return await call()
+    return await _singleflight.do(request_key(function_name, inputs), call)
+
+
+def _call_stream(
+    function_name: str, inputs: dict[str, Any], *, text_of: Callable[[Any], str | None] = lambda partial: partial
+) -> AsyncIterator[str]:
+    """Stream a BAML function, yielding the cumulative text (last item is final)."""
+
+    def stream() -> AsyncIterator[str]:
+        if hedging_enabled(function_name):
+            return get_hedger().stream(
+                function_name,
+                lambda: _request_stream(function_name, inputs, text_of=text_of),
+                lambda: _request_stream(function_name, inputs, text_of=text_of, client=hedge_client(), hedge=True),
+            )
+        return _request_stream(function_name, inputs, text_of=text_of)
+
+    if not coalescing_enabled(function_name):
+        return stream()
+    return _singleflight.stream(request_key(f"{function_name}:stream", inputs), stream)
+
+
+async def workflow_plan_async(
+    *, user_message: str, skills_readme: str, skill_names: list[str], skill_groups: list[str], conversation_history: str
+) -> dict:
+    plan = await _call_async(
+        "WorkflowPlan",
+        {
+            "user_message": user_message,
+            "skills_readme": skills_readme,
+            "skill_names": skill_names,
+            "skill_groups": skill_groups,
+            "conversation_history": conversation_history,
+        },
+    )
+    return _plan_to_dict(plan)
+
+
+async def workflow_plan_review_async(
+    *, user_message: str, proposed_plan_json: str, selected_skill_md: str, conversation_history: str
+) -> dict:
+    plan = await _call_async(
+        "WorkflowPlanReview",
+        {
+            "user_message": user_message,
+            "proposed_plan_json": proposed_plan_json,
+            "selected_skill_md": selected_skill_md,
+            "conversation_history": conversation_history,
+        },
+    )
+    return _plan_to_dict(plan)
+
+
+async def workflow_codegen_async(
+    *,
+    user_message: str,
+    plan_json: str,
+    skill_md: str,
+    tool_contracts: str,
+    attempt: int,
+    previous_error: str,
+    previous_code: str,
+    conversation_history: str,
+) -> str:
+    return await _call_async(
+        "WorkflowCodegen",
+        {
+            "user_message": user_message,
+            "plan_json": plan_json,
+            "skill_md": skill_md,
+            "tool_contracts": tool_contracts,
+            "attempt": attempt,
+            "previous_error": previous_error,
+            "previous_code": previous_code,
+            "conversation_history": conversation_history,
+        },
+    )
+
+
+async def workflow_chat_async(*, user_message: str, skills_readme: str, custom_skill_md: str, conversation_history: str) -> str:
+    result = await _call_async(
+        "WorkflowChat",
+        {
+            "user_message": user_message,
+            "skills_readme": skills_readme,
+            "custom_skill_md": custom_skill_md,
+            "conversation_history": conversation_history,
+        },
+    )
+    return result.final_response
+
+
+async def workflow_respond_async(
+    *,
+    user_message: str,
+    plan_json: str,
+    executed_code: str,
+    exec_stdout: str,
+    exec_stderr: str,
+    exit_code: int,
+    attempts: int,
+    conversation_history: str,
+) -> str:
+    return await _call_async(
+        "WorkflowRespond",
+        {
+            "user_message": user_message,
+            "plan_json": plan_json,
+            "executed_code": executed_code,
+            "exec_stdout": exec_stdout,
+            "exec_stderr": exec_stderr,
+            "exit_code": exit_code,
+            "attempts": attempts,
+            "conversation_history": conversation_history,
+        },
+    )
+
+
+# --- Streaming variants (BamlStreamClient) ---
+# Yield the cumulative response text as it arrives; the last item is final.
+
+
+def workflow_codegen_stream(
+    *,
+    user_message: str,
+    plan_json: str,
+    skill_md: str,
+    tool_contracts: str,
+    attempt: int,
+    previous_error: str,
+    previous_code: str,
+    conversation_history: str,
+) -> AsyncIterator[str]:
+    return _call_stream(
+        "WorkflowCodegen",
+        {
+            "user_message": user_message,
+            "plan_json": plan_json,
+            "skill_md": skill_md,
+            "tool_contracts": tool_contracts,
+            "attempt": attempt,
+            "previous_error": previous_error,
+            "previous_code": previous_code,
+            "conversation_history": conversation_history,
+        },
+    )
+
+
+def workflow_chat_stream(
+    *, user_message: str, skills_readme: str, custom_skill_md: str, conversation_history: str
+) -> AsyncIterator[str]:
+    return _call_stream(
+        "WorkflowChat",
+        {
+            "user_message": user_message,
+            "skills_readme": skills_readme,
+            "custom_skill_md": custom_skill_md,
+            "conversation_history": conversation_history,
+        },
+        text_of=lambda result: result.final_response,
+    )
+
+
+def workflow_respond_stream(
+    *,
+    user_message: str,
+    plan_json: str,
+    executed_code: str,
+    exec_stdout: str,
+    exec_stderr: str,
+    exit_code: int,
+    attempts: int,
+    conversation_history: str,
+) -> AsyncIterator[str]:
+    return _call_stream(
+        "WorkflowRespond",
+        {
+            "user_message": user_message,
+            "plan_json": plan_json,
+            "executed_code": executed_code,
+            "exec_stdout": exec_stdout,
+            "exec_stderr": exec_stderr,
+            "exit_code": exit_code,
+            "attempts": attempts,
+            "conversation_history": conversation_history,
+        },
     )
@@ -0,0 +1,182 @@
+"""Batch runs of WorkflowAgent over JSONL request files.
+
+Each input line is a JSON object with the user message (``message`` or
+``user_message``), an optional ``id`` and optional ``conversation_history``;
+a line that is not becomes an error result naming its line number.
+Requests run through ``WorkflowAgent.run_many`` with bounded concurrency;
+results are appended to the output JSONL file as each request finishes, and
+a latency report per phase is printed at the end:
+
+    python -m agent_workspace.workflow_agent.batch requests.jsonl --out results.jsonl --concurrency 8
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .telemetry import percentile
+
+if TYPE_CHECKING:
+    from .types import AgentResult
+
+# Pipeline phases in report order (see timing.py)
+PHASES = ("plan", "chat", "codegen", "execute", "respond")
+
+
+@dataclass(frozen=True)
+class BatchRequest:
+    """One request of a batch run."""
+
+    id: str
+    user_message: str
+    conversation_history: str = ""
+    error: str | None = None  # Why the input line is not a valid request
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any], *, default_id: str) -> BatchRequest:
+        message = data.get("user_message", data.get("message"))
+        if not isinstance(message, str) or not message.strip():
+            raise ValueError(f"request {data.get('id', default_id)!r} has no message")
+        return cls(
+            id=str(data.get("id") or default_id),
+            user_message=message,
+            conversation_history=str(data.get("conversation_history") or ""),
+        )
+
+
+@dataclass(frozen=True)
+class BatchResult:
+    """Outcome of one batch request.
+
+    Attributes:
+        id: Request id
+        user_message: The user's request
+        status: "ok", or "error" when the agent raised
+        final_response: The agent's response (empty on error)
+        error: Error message when status is "error"
+        attempts: Codegen/execute attempts used
+        exec_stderr: Stderr of the last execution
+        duration_ms: End-to-end latency of the request
+        phase_ms: Time spent per pipeline phase
+    """
+    id: str
+    user_message: str
+    status: str
+    final_response: str = ""
+    error: str | None = None
+    attempts: int | None = None
+    exec_stderr: str | None = None
+    duration_ms: float = 0.0
+    phase_ms: dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def from_agent_result(cls, request: BatchRequest, result: AgentResult, *, duration_ms: float) -> BatchResult:
+        return cls(
+            id=request.id,
+            user_message=request.user_message,
+            status="ok",
+            final_response=result.final_response,
+            attempts=result.attempts,
+            exec_stderr=result.exec_stderr,
+            duration_ms=round(duration_ms, 3),
+            phase_ms={name: round(ms, 3) for name, ms in result.phase_ms.items()},
+        )
+
+    @classmethod
+    def failed(cls, request: BatchRequest, *, error: Exception, duration_ms: float) -> BatchResult:
+        return cls(
+            id=request.id,
+            user_message=request.user_message,
+            status="error",
+            error=f"{type(error).__name__}: {error}",
+            duration_ms=round(duration_ms, 3),
+        )
+
+
+def read_requests(path: Path) -> Iterator[BatchRequest]:
+    """Stream requests from a JSONL file, skipping blank lines.
+
+    A line that is not a JSON object with a message yields a request with
+    ``error`` set (id: the line number), which runs as an error result, so
+    one bad line does not abort the batch.
+    """
+    with Path(path).open(encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+                if not isinstance(data, dict):
+                    raise ValueError("expected a JSON object")
+                yield BatchRequest.from_dict(data, default_id=str(line_no))
+            except ValueError as e:
+                yield BatchRequest(id=str(line_no), user_message="", error=f"{path}:{line_no}: {e}")
+
+
+def batch_report(results: Iterable[BatchResult]) -> dict[str, dict[str, float]]:
+    """Latency percentiles (ms) per phase, plus end-to-end ``total``.
+
+    Returns:
+        Mapping of phase to count, p50, p95 and p99
+    """
+    samples: dict[str, list[float]] = {}
+    for result in results:
+        for name, ms in result.phase_ms.items():
+            samples.setdefault(name, []).append(ms)
+        samples.setdefault("total", []).append(result.duration_ms)
+
+    ordered = [name for name in PHASES if name in samples]
+    ordered += sorted(name for name in samples if name not in PHASES and name != "total")
+    report: dict[str, dict[str, float]] = {}
+    for name in ordered + (["total"] if samples else []):
+        values = sorted(samples[name])
+        report[name] = {
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+        }
+    return report
+
+
+async def _run(input_path: Path, out_path: Path, *, concurrency: int) -> tuple[list[BatchResult], float]:
+    from ..main import build_agent
+
+    agent = build_agent()
+    agent.warm()
+    results: list[BatchResult] = []
+    started = time.perf_counter()
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with out_path.open("w", encoding="utf-8") as out:
+        async for result in agent.run_many(read_requests(input_path), concurrency=concurrency):
+            out.write(json.dumps(asdict(result), ensure_ascii=False) + "\n")
+            out.flush()
+            results.append(result)
+    return results, time.perf_counter() - started
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("requests", type=Path, help="JSONL file with one request per line")
+    parser.add_argument("--out", type=Path, default=Path(".metrics/batch_results.jsonl"))
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    results, wall = asyncio.run(_run(args.requests, args.out, concurrency=args.concurrency))
+    errors = sum(1 for r in results if r.status != "ok")
+    print(f"requests: {len(results)}  errors: {errors}  concurrency: {args.concurrency}  results: {args.out}")
+    print(f"wall: {wall:.2f}s  throughput: {len(results) / wall if wall else 0.0:.2f} req/s")
+    print(f"{'phase':<10} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, s in batch_report(results).items():
+        print(f"{name:<10} {s['count']:>6} {s['p50']:>9.0f} {s['p95']:>9.0f} {s['p99']:>9.0f}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
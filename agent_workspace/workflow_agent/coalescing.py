@@ -0,0 +1,143 @@
+"""Request coalescing (singleflight) for identical concurrent LLM calls.
+
+When several sessions send the exact same prompt at the same time (e.g. a
+scheduled onboarding run), only one LLM request is made and every caller
+receives its result. Calls are keyed by BAML function name plus a hash of all
+arguments; a key is only shared while its request is in flight.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import aclosing
+from typing import Any, TypeVar
+
+from ._env import env_bool
+
+T = TypeVar("T")
+
+# Phases whose output should differ per call (or per user) are never shared
+NON_COALESCED_FUNCTIONS = frozenset({"WorkflowRespond", "WorkflowChat"})
+
+
+def coalescing_enabled(function_name: str) -> bool:
+    """Whether calls to a BAML function may share an in-flight request."""
+    if function_name in NON_COALESCED_FUNCTIONS:
+        return False
+    return env_bool("enable_llm_coalescing", default=True)
+
+
+def request_key(function_name: str, inputs: dict[str, Any]) -> str:
+    """Build the coalescing key for a call.
+
+    Args:
+        function_name: BAML function name, e.g. "WorkflowPlan"
+        inputs: Keyword arguments of the call
+
+    Returns:
+        ``"<function_name>:<sha256 of the canonical JSON arguments>"``
+    """
+    payload = json.dumps(inputs, sort_keys=True, ensure_ascii=False, default=str)
+    return f"{function_name}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+class _Flight:
+    """A shared in-flight call and the number of callers waiting on it."""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.task: asyncio.Future | None = None
+        self.waiters = 0
+
+
+class _StreamFlight(_Flight):
+    """A shared in-flight stream; partials are buffered for late joiners."""
+
+    def __init__(self, key: str):
+        super().__init__(key)
+        self.items: list[str] = []
+        self.changed = asyncio.Event()
+
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers with the same key.
+
+    The shared call runs in its own task, so one caller being cancelled does
+    not cancel it for the others; it is cancelled once no caller is left.
+    """
+
+    def __init__(self) -> None:
+        self._flights: dict[str, _Flight] = {}
+        self.coalesced_calls = 0
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run ``fn`` once for all concurrent callers using ``key``."""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._start(_Flight(key), fn())
+        else:
+            self.coalesced_calls += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            self._leave(flight)
+
+    async def stream(self, key: str, fn: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """Like do(), for a stream: every caller receives every partial."""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _StreamFlight(key)
+            self._start(flight, _drain(fn(), flight))
+        else:
+            self.coalesced_calls += 1
+
+        flight.waiters += 1
+        try:
+            index = 0
+            while True:
+                while index < len(flight.items):
+                    yield flight.items[index]
+                    index += 1
+                if flight.task.done():
+                    if index == len(flight.items):
+                        flight.task.result()  # Re-raise a failed stream
+                        return
+                    continue
+                flight.changed.clear()
+                await flight.changed.wait()
+        finally:
+            self._leave(flight)
+
+    def _start(self, flight: _Flight, coro: Awaitable[Any]) -> _Flight:
+        flight.task = asyncio.ensure_future(coro)
+        flight.task.add_done_callback(lambda _: self._forget(flight))
+        self._flights[flight.key] = flight
+        return flight
+
+    def _forget(self, flight: _Flight) -> None:
+        if self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
+
+    def _leave(self, flight: _Flight) -> None:
+        flight.waiters -= 1
+        if flight.waiters == 0 and not flight.task.done():
+            # Nobody is waiting any more; new callers must start a fresh request
+            self._forget(flight)
+            flight.task.cancel()
+
+
+async def _drain(stream: AsyncIterator[str], flight: _StreamFlight) -> None:
+    try:
+        async with aclosing(stream):
+            async for item in stream:
+                flight.items.append(item)
+                flight.changed.set()
+    finally:
+        flight.changed.set()
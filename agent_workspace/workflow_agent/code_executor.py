@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import os
 import subprocess
 import sys
@@ -26,25 +27,11 @@ class PythonCodeExecutor:
             tmp_path = Path(tmpdir) / "generated.py"
             tmp_path.write_text(code, encoding="utf-8")
 
-            env = dict(os.environ)
-            pythonpaths: list[str] = []
-            seen: set[str] = set()
-            for p in (extra_pythonpaths or []) + self.extra_pythonpaths + [self.workspace_dir]:
-                s = str(p)
-                if s in seen:
-                    continue
-                seen.add(s)
-                pythonpaths.append(s)
-            existing = env.get("PYTHONPATH")
-            if existing:
-                pythonpaths.append(existing)
-            env["PYTHONPATH"] = os.pathsep.join(pythonpaths)
-
             try:
                 proc = subprocess.run(
                     [sys.executable, str(tmp_path)],
                     cwd=str(self.workspace_dir),
-                    env=env,
+                    env=self._build_env(extra_pythonpaths),
                     stdin=subprocess.DEVNULL,
                     text=True,
                     capture_output=True,
@@ -56,8 +43,74 @@ class PythonCodeExecutor:
                     exit_code=int(proc.returncode),
                 )
             except subprocess.TimeoutExpired:
-                return ExecutionResult(
-                    stdout="",
-                    stderr=f"Execution timed out after {self.timeout_seconds}s",
-                    exit_code=124,
-                )
+                return self._timeout_result()
+
+    async def run_async(self, code: str, *, extra_pythonpaths: list[Path] | None = None) -> ExecutionResult:
+        """Like run(), but awaits the subprocess without blocking the event loop."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmp_path = Path(tmpdir) / "generated.py"
+            tmp_path.write_text(code, encoding="utf-8")
+
+            proc = await asyncio.create_subprocess_exec(
+                sys.executable,
+                str(tmp_path),
+                cwd=str(self.workspace_dir),
+                env=self._build_env(extra_pythonpaths),
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            try:
+                stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=self.timeout_seconds)
+            except asyncio.TimeoutError:
+                return self._timeout_result()
+            finally:
+                # Also on cancellation of the awaiting task: never leave the script running
+                if proc.returncode is None:
+                    try:
+                        proc.kill()
+                    except ProcessLookupError:
+                        pass
+                    await proc.wait()
+            return ExecutionResult(
+                stdout=(stdout or b"").decode("utf-8", errors="replace"),
+                stderr=(stderr or b"").decode("utf-8", errors="replace"),
+                exit_code=int(proc.returncode),
+            )
+
+    def warm(self) -> ExecutionResult:
+        """Run one script that imports every tool module.
+
+        Generated scripts each run in a fresh interpreter, so there is no
+        process to keep warm; this writes the tool packages' bytecode caches
+        so the first real script does not pay for compiling them.
+        """
+        return self.run(
+            "import importlib, pkgutil\n"
+            "import mcp_tools\n"
+            "for module in pkgutil.iter_modules(mcp_tools.__path__):\n"
+            "    importlib.import_module('mcp_tools.' + module.name)\n"
+        )
+
+    def _build_env(self, extra_pythonpaths: list[Path] | None) -> dict[str, str]:
+        env = dict(os.environ)
+        pythonpaths: list[str] = []
+        seen: set[str] = set()
+        for p in (extra_pythonpaths or []) + self.extra_pythonpaths + [self.workspace_dir]:
+            s = str(p)
+            if s in seen:
+                continue
+            seen.add(s)
+            pythonpaths.append(s)
+        existing = env.get("PYTHONPATH")
+        if existing:
+            pythonpaths.append(existing)
+        env["PYTHONPATH"] = os.pathsep.join(pythonpaths)
+        return env
+
+    def _timeout_result(self) -> ExecutionResult:
+        return ExecutionResult(
+            stdout="",
+            stderr=f"Execution timed out after {self.timeout_seconds}s",
+            exit_code=124,
+        )
@@ -0,0 +1,243 @@
+"""Hedged LLM requests for tail-latency sensitive phases.
+
+If a ``WorkflowPlan`` or ``WorkflowCodegen`` request has not completed (or,
+for streams, produced its first token) by a percentile deadline of recently
+observed latencies, a second request is fired, optionally to an alternate
+model registered through a BAML ``ClientRegistry``. The first to finish wins
+and the other is cancelled. Deadlines come from the latencies of primary
+requests only: a hedge's latency says nothing about the primary's tail, and a
+primary cancelled after losing the race is recorded at the time it had run by
+then, a lower bound that keeps slow primaries in the tail. Hedge and win
+counts are kept per phase so the deadline can be tuned.
+
+Configured from env vars:
+
+- ``enable_llm_hedging``: turn hedging on (default off; hedges cost tokens)
+- ``llm_hedge_percentile``: latency percentile used as deadline (default 95)
+- ``llm_hedge_deadline_ms``: deadline used until enough samples exist (default 0 = don't hedge yet)
+- ``llm_hedge_model``: alternate OpenRouter model for hedges (default: same client)
+- ``llm_hedge_base_url``: OpenAI-compatible endpoint of ``llm_hedge_model`` (default OpenRouter)
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from ._env import env_bool, env_float
+from .admission import DEFAULT_CLIENT
+
+T = TypeVar("T")
+
+HEDGED_FUNCTIONS = frozenset({"WorkflowPlan", "WorkflowCodegen"})
+
+# Client name used for hedges sent to the alternate model
+HEDGE_CLIENT = "OpenRouterHedge"
+
+# Latency samples kept per phase, and samples needed before using the percentile
+LATENCY_WINDOW = 200
+MIN_SAMPLES = 20
+
+
+def hedging_enabled(function_name: str) -> bool:
+    return function_name in HEDGED_FUNCTIONS and env_bool("enable_llm_hedging", default=False)
+
+
+@dataclass
+class HedgeStats:
+    """Hedging counters for one phase.
+
+    Attributes:
+        calls: Calls eligible for hedging
+        hedged: Calls for which a hedge request was fired
+        hedge_wins: Hedged calls won by the hedge request
+    """
+    calls: int = 0
+    hedged: int = 0
+    hedge_wins: int = 0
+
+    @property
+    def hedge_rate(self) -> float:
+        return self.hedged / self.calls if self.calls else 0.0
+
+    @property
+    def win_rate(self) -> float:
+        return self.hedge_wins / self.hedged if self.hedged else 0.0
+
+
+class LatencyTracker:
+    """Rolling latency samples per key, used to derive hedge deadlines."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples: dict[str, deque[float]] = {}
+        self._window = window
+
+    def observe(self, key: str, seconds: float) -> None:
+        self._samples.setdefault(key, deque(maxlen=self._window)).append(seconds)
+
+    def percentile(self, key: str, pct: float) -> float | None:
+        samples = sorted(self._samples.get(key) or [])
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, max(0, math.ceil(pct / 100 * len(samples)) - 1))]
+
+
+class Hedger:
+    """Race a primary request against a late hedge request."""
+
+    def __init__(self) -> None:
+        self.latencies = LatencyTracker()
+        self._stats: dict[str, HedgeStats] = {}
+
+    def stats(self, function_name: str) -> HedgeStats:
+        return self._stats.setdefault(function_name, HedgeStats())
+
+    def _observe_primary(self, key: str, request: asyncio.Future, started: float) -> None:
+        """Record the latency of a primary request that just settled (failures are not latencies)."""
+        if not request.done():
+            return
+        if request.cancelled() or request.exception() is None or isinstance(request.exception(), StopAsyncIteration):
+            self.latencies.observe(key, time.perf_counter() - started)
+
+    def deadline(self, key: str) -> float | None:
+        """Seconds to wait before hedging, or None to never hedge this call."""
+        observed = self.latencies.percentile(key, env_float("llm_hedge_percentile", default=95))
+        if observed is not None:
+            return observed
+        fallback_ms = env_float("llm_hedge_deadline_ms", default=0)
+        return fallback_ms / 1000 if fallback_ms > 0 else None
+
+    async def call(
+        self,
+        function_name: str,
+        primary: Callable[[], Awaitable[T]],
+        hedge: Callable[[], Awaitable[T]],
+    ) -> T:
+        """Await ``primary``; fire ``hedge`` if it misses the deadline, first success wins."""
+        stats = self.stats(function_name)
+        stats.calls += 1
+        started = time.perf_counter()
+        tasks = [asyncio.ensure_future(primary())]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.deadline(function_name))
+            if not done:
+                stats.hedged += 1
+                tasks.append(asyncio.ensure_future(hedge()))
+            winner = await _first_success(tasks)
+            if winner == 1:
+                stats.hedge_wins += 1
+            return tasks[winner].result()
+        finally:
+            await _cancel_all(tasks)
+            self._observe_primary(function_name, tasks[0], started)
+
+    async def stream(
+        self,
+        function_name: str,
+        primary: Callable[[], AsyncIterator[str]],
+        hedge: Callable[[], AsyncIterator[str]],
+    ) -> AsyncIterator[str]:
+        """Like call(), for streams: the deadline applies to the first partial."""
+        key = f"{function_name}:ttft"
+        stats = self.stats(function_name)
+        stats.calls += 1
+        started = time.perf_counter()
+        streams = [primary()]
+        heads = [asyncio.ensure_future(anext(streams[0]))]
+        try:
+            done, _ = await asyncio.wait(heads, timeout=self.deadline(key))
+            if not done:
+                stats.hedged += 1
+                streams.append(hedge())
+                heads.append(asyncio.ensure_future(anext(streams[1])))
+            winner = await _first_success(heads)
+            if winner == 1:
+                stats.hedge_wins += 1
+            for i, stream in enumerate(streams):
+                if i != winner:
+                    await _cancel_all([heads[i]])
+                    await stream.aclose()
+            self._observe_primary(key, heads[0], started)
+            try:
+                first = heads[winner].result()
+            except StopAsyncIteration:
+                return
+            yield first
+            async for item in streams[winner]:
+                yield item
+        finally:
+            await _cancel_all(heads)
+            for stream in streams:
+                await stream.aclose()
+
+
+async def _first_success(tasks: list[asyncio.Future]) -> int:
+    """Index of the first task to complete successfully (StopAsyncIteration counts).
+
+    Raises the primary's exception when every task failed.
+    """
+    pending = set(tasks)
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in sorted(done, key=tasks.index):
+            exc = task.exception()
+            if exc is None or isinstance(exc, StopAsyncIteration):
+                return tasks.index(task)
+    tasks[0].result()  # Every request failed: surface the primary's error
+    raise RuntimeError("all hedged requests failed")
+
+
+async def _cancel_all(tasks: list[asyncio.Future]) -> None:
+    for task in tasks:
+        if not task.done():
+            task.cancel()
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+_registry = None
+
+
+def hedge_client() -> str:
+    """Client the hedge request is sent to (the alternate model when configured)."""
+    return HEDGE_CLIENT if os.getenv("llm_hedge_model", "").strip() else DEFAULT_CLIENT
+
+
+def client_options(client: str) -> dict[str, Any]:
+    """``with_options`` kwargs that route a call to ``client``."""
+    global _registry
+    if client != HEDGE_CLIENT:
+        return {}
+    if _registry is None:
+        from baml_py import ClientRegistry
+
+        registry = ClientRegistry()
+        registry.add_llm_client(
+            HEDGE_CLIENT,
+            "openai-generic",
+            {
+                "base_url": os.getenv("llm_hedge_base_url", "https://openrouter.ai/api/v1"),
+                "model": os.getenv("llm_hedge_model", "").strip(),
+                "api_key": os.getenv("open_router_api_key", ""),
+            },
+        )
+        registry.set_primary(HEDGE_CLIENT)
+        _registry = registry
+    return {"client_registry": _registry}
+
+
+_hedger = Hedger()
+
+
+def get_hedger() -> Hedger:
+    return _hedger
+
+
+def hedge_stats() -> dict[str, HedgeStats]:
+    """Hedging counters per phase for this process."""
+    return dict(_hedger._stats)
@@ -0,0 +1,179 @@
+"""Record/replay LLM backend for offline runs and benchmarks.
+
+In ``record`` mode every BAML response the bridge receives is appended to a
+JSONL cassette, keyed by function name and a hash of all arguments. In
+``replay`` mode the bridge answers from the cassette instead of calling the
+provider, with configurable synthetic latency and token rate. The rest of the
+pipeline (coalescing, admission, telemetry, code execution) runs unchanged,
+so plan -> codegen -> execute -> respond benchmarks are reproducible offline.
+
+Configured from env vars:
+
+- ``llm_backend``: ``live`` (default), ``record`` or ``replay``
+- ``llm_cassette_path``: cassette file (default ``.metrics/llm_cassette.jsonl``)
+- ``llm_replay_latency_ms``: latency before the first token (default 0)
+- ``llm_replay_tokens_per_second``: generation speed, 0 = instant (default 0)
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from ._env import env_float
+from .admission import CHARS_PER_TOKEN
+from .coalescing import request_key
+
+DEFAULT_CASSETTE_PATH = Path(".metrics/llm_cassette.jsonl")
+
+# Synthetic streams emit one partial per this many seconds of generation
+STREAM_STEP_SECONDS = 0.02
+
+
+class ReplayMiss(KeyError):
+    """Raised in replay mode when the cassette has no response for a call."""
+
+
+def _serialize(result: Any) -> dict[str, Any]:
+    if isinstance(result, str):
+        return {"type": "str", "value": result}
+    return {"type": type(result).__name__, "value": result.model_dump(mode="json")}
+
+
+def _deserialize(payload: dict[str, Any]) -> Any:
+    if payload["type"] == "str":
+        return payload["value"]
+    from baml_client import types
+
+    return getattr(types, payload["type"]).model_validate(payload["value"])
+
+
+class Cassette:
+    """JSONL store of recorded BAML responses keyed by call."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._entries: dict[str, dict[str, Any]] | None = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def lookup(self, function_name: str, inputs: dict[str, Any]) -> Any:
+        """Return the recorded response for a call.
+
+        Raises:
+            ReplayMiss: If the call was never recorded
+        """
+        key = request_key(function_name, inputs)
+        entry = self._load().get(key)
+        if entry is None:
+            raise ReplayMiss(f"no recorded {function_name} response for {key} in {self.path}")
+        return _deserialize(entry["response"])
+
+    def record(self, function_name: str, inputs: dict[str, Any], result: Any) -> None:
+        """Append a response to the cassette (later records win on lookup)."""
+        key = request_key(function_name, inputs)
+        entry = {"key": key, "function": function_name, "response": _serialize(result)}
+        with self._lock:
+            self._load()[key] = entry
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        if self._entries is None:
+            entries: dict[str, dict[str, Any]] = {}
+            if self.path.exists():
+                for line in self.path.read_text(encoding="utf-8").splitlines():
+                    if line.strip():
+                        entry = json.loads(line)
+                        entries[entry["key"]] = entry
+            self._entries = entries
+        return self._entries
+
+
+@dataclass(frozen=True)
+class ReplayTiming:
+    """Synthetic latency model for replayed responses."""
+
+    latency_ms: float = 0
+    tokens_per_second: float = 0
+
+    @classmethod
+    def from_env(cls) -> ReplayTiming:
+        return cls(
+            latency_ms=env_float("llm_replay_latency_ms", default=0),
+            tokens_per_second=env_float("llm_replay_tokens_per_second", default=0),
+        )
+
+    def generation_seconds(self, text: str) -> float:
+        if self.tokens_per_second <= 0:
+            return 0.0
+        return (len(text) / CHARS_PER_TOKEN) / self.tokens_per_second
+
+
+class LLMBackend:
+    """Decides whether bridge calls go live, are recorded, or are replayed."""
+
+    def __init__(self, mode: str = "live", *, cassette: Cassette | None = None, timing: ReplayTiming | None = None):
+        if mode not in {"live", "record", "replay"}:
+            raise ValueError(f"unknown llm_backend {mode!r} (expected live, record or replay)")
+        self.mode = mode
+        self.cassette = cassette or Cassette(DEFAULT_CASSETTE_PATH)
+        self.timing = timing or ReplayTiming()
+
+    @classmethod
+    def from_env(cls) -> LLMBackend:
+        return cls(
+            os.getenv("llm_backend", "live").strip().lower() or "live",
+            cassette=Cassette(Path(os.getenv("llm_cassette_path", "").strip() or DEFAULT_CASSETTE_PATH)),
+            timing=ReplayTiming.from_env(),
+        )
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    async def replay(self, function_name: str, inputs: dict[str, Any]) -> Any:
+        """Return the recorded response after the synthetic latency."""
+        result = self.cassette.lookup(function_name, inputs)
+        text = result if isinstance(result, str) else json.dumps(_serialize(result)["value"])
+        await asyncio.sleep(self.timing.latency_ms / 1000 + self.timing.generation_seconds(text))
+        return result
+
+    async def replay_partials(self, text: str) -> AsyncIterator[str]:
+        """Yield growing prefixes of ``text`` at the synthetic token rate."""
+        await asyncio.sleep(self.timing.latency_ms / 1000)
+        total = self.timing.generation_seconds(text)
+        steps = max(1, int(total / STREAM_STEP_SECONDS))
+        chunk = max(1, -(-len(text) // steps))
+        for end in range(chunk, len(text) + chunk, chunk):
+            await asyncio.sleep(total / steps)
+            yield text[:end]
+
+
+_backend: LLMBackend | None = None
+
+
+def get_llm_backend() -> LLMBackend:
+    """Return the process-wide backend, configured from env on first use."""
+    global _backend
+    if _backend is None:
+        _backend = LLMBackend.from_env()
+    return _backend
+
+
+def configure_llm_backend(backend: LLMBackend | None) -> None:
+    """Replace the process-wide backend (None re-reads the env on next use)."""
+    global _backend
+    _backend = backend
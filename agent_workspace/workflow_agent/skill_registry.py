@@ -59,11 +59,34 @@ class Skill:
         return steps
 
 
+@dataclass(frozen=True)
+class _SkillIndex:
+    """Immutable snapshot of a skills directory, safe to share across sessions."""
+    groups: tuple[str, ...]
+    skills: tuple[Skill, ...]
+    readme: str
+
+
 class SkillRegistry:
     def __init__(self, skills_dir: Path):
         self.skills_dir = skills_dir
+        self._index: _SkillIndex | None = None
+
+    def warm(self) -> None:
+        """Scan the skills directory once and serve later lookups from memory.
+
+        Call again to pick up skills edited on disk.
+        """
+        self._index = None
+        self._index = _SkillIndex(
+            groups=tuple(self.list_skill_groups()),
+            skills=tuple(self.list_skills()),
+            readme=self.read_skills_readme(),
+        )
 
     def list_skill_groups(self) -> list[str]:
+        if self._index is not None:
+            return list(self._index.groups)
         if not self.skills_dir.exists():
             return []
         groups: list[str] = []
@@ -74,6 +97,8 @@ class SkillRegistry:
         return groups
 
     def list_skills(self) -> list[Skill]:
+        if self._index is not None:
+            return list(self._index.skills)
         skills: list[Skill] = []
         if not self.skills_dir.exists():
             return skills
@@ -104,6 +129,8 @@ class SkillRegistry:
         return skills
 
     def read_skills_readme(self) -> str:
+        if self._index is not None:
+            return self._index.readme
         readme = self.skills_dir / "Readme.md"
         if not readme.exists():
             return ""
@@ -5,6 +5,6 @@ Contains specialized components for planning and execution.
 
 from ._execution_result import ExecutionResult
 from .executor import ExecuteResult, WorkflowExecutor
-from .planner import Plan, PlanningResult, Planner
+from .planner import Plan, PlanningResult, Planner, plans_equivalent
 
-__all__ = ["Plan", "PlanningResult", "Planner", "ExecutionResult", "ExecuteResult", "WorkflowExecutor"]
+__all__ = ["Plan", "PlanningResult", "Planner", "plans_equivalent", "ExecutionResult", "ExecuteResult", "WorkflowExecutor"]
@@ -4,8 +4,14 @@ Manages the iterative lifecycle of code generation and execution.
 """
 from __future__ import annotations
 
+import ast
+import io
 import json
 import re
+import sys
+import tokenize
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import aclosing
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import TYPE_CHECKING, Any
@@ -15,6 +21,7 @@ from typing import TYPE_CHECKING, Any
 from .. import agent as agent_module
 from .._execution_result import ExecutionResult
 from ..mcp_docs_registry import MCPDocsRegistry
+from ..timing import phase
 
 if TYPE_CHECKING:
     from ..code_executor import PythonCodeExecutor as ExecutorType
@@ -22,8 +29,22 @@ if TYPE_CHECKING:
 
 # Regex patterns for continuation signal detection
 CONTINUE_FACT_PATTERN = re.compile(r"CONTINUE_FACT:\s*(\w+)=(.+)")
+CONTINUE_FACT_JSON_PATTERN = re.compile(r"CONTINUE_FACT_JSON:\s*(\w+)=(.+)")
 CONTINUE_WORKFLOW_PATTERN = re.compile(r"CONTINUE_WORKFLOW:\s*(\w+)")
 
+# Summary block every generated script prints last (see baml_src/executor.baml)
+FINAL_SUMMARY_MARKER = "=== FINAL SUMMARY ==="
+
+# Longer summaries are left to the LLM responder to condense
+MAX_TEMPLATE_RESPONSE_CHARS = 2000
+
+# Log prefixes stripped from summary lines
+_LOG_PREFIX_PATTERN = re.compile(r"^\[(?:INFO|PROGRESS|OK|DONE)\]\s*")
+
+# Receives the partial text (or code, for codegen) received so far while an LLM call streams
+PartialTextCallback = Callable[[str], Awaitable[None]]
+PartialCodeCallback = PartialTextCallback
+
 
 @dataclass(frozen=True)
 class ExecuteResult:
@@ -67,12 +88,17 @@ class WorkflowExecutor:
         default_tools_root: Path,
         default_docs_dir: Path,
         max_attempts: int = 3,
+        stream_codegen: bool = False,
+        template_responses: bool = False,
     ):
         self._executor = executor
         self._skills_v2_dir = skills_v2_dir
         self._default_tools_root = default_tools_root
         self._default_docs_dir = default_docs_dir
         self.max_attempts = max(1, int(max_attempts))
+        self.stream_codegen = stream_codegen
+        self.template_responses = template_responses
+        self._contracts: dict[Path, str] | None = None
 
     def execute(
         self,
@@ -81,6 +107,7 @@ class WorkflowExecutor:
         skill_md: str,
         *,
         conversation_history: str = "",
+        initial_code: str | None = None,
     ) -> ExecuteResult:
         """Execute the workflow with retries.
 
@@ -89,6 +116,8 @@ class WorkflowExecutor:
             plan_json: JSON string representation of the plan
             skill_md: The skill Markdown content
             conversation_history: Previous conversation context
+            initial_code: Already generated code to use for the first attempt
+                (e.g. from speculative codegen) instead of calling codegen
 
         Returns:
             ExecuteResult with code, execution result, and attempts used
@@ -100,24 +129,29 @@ class WorkflowExecutor:
 
         for attempt in range(1, self.max_attempts + 1):
             attempts_used = attempt
-            try:
-                code = self._codegen(
-                    user_message=user_message,
-                    plan_json=plan_json,
-                    skill_md=skill_md,
-                    attempt=attempt,
-                    previous_error=last_error,
-                    previous_code=last_code,
-                    conversation_history=conversation_history,
-                )
-            except Exception as e:
-                last_code = last_code or ""
-                last_error = f"Code generation failed: {e}"
-                last_exec = ExecutionResult(stdout="", stderr=last_error, exit_code=1)
-                continue
+            if attempt == 1 and initial_code:
+                code = initial_code
+            else:
+                try:
+                    with phase("codegen"):
+                        code = self._codegen(
+                            user_message=user_message,
+                            plan_json=plan_json,
+                            skill_md=skill_md,
+                            attempt=attempt,
+                            previous_error=last_error,
+                            previous_code=last_code,
+                            conversation_history=conversation_history,
+                        )
+                except Exception as e:
+                    last_code = last_code or ""
+                    last_error = f"Code generation failed: {e}"
+                    last_exec = ExecutionResult(stdout="", stderr=last_error, exit_code=1)
+                    continue
 
             last_code = code
-            exec_result = self._execute(code=code, plan_json=plan_json)
+            with phase("execute"):
+                exec_result = self._execute(code=code, plan_json=plan_json)
             last_exec = exec_result
             if exec_result.exit_code == 0:
                 return ExecuteResult(code=code, exec_result=exec_result, attempts_used=attempts_used)
@@ -126,35 +160,187 @@ class WorkflowExecutor:
 
         return ExecuteResult(code=last_code, exec_result=last_exec, attempts_used=attempts_used)
 
-    def _codegen(
+    async def execute_async(
         self,
         user_message: str,
         plan_json: str,
         skill_md: str,
         *,
-        attempt: int,
-        previous_error: str,
-        previous_code: str,
-        conversation_history: str,
+        conversation_history: str = "",
+        initial_code: str | None = None,
+    ) -> ExecuteResult:
+        """Async variant of execute()."""
+        last_code = ""
+        last_error = ""
+        last_exec = ExecutionResult(stdout="", stderr="", exit_code=1)
+        attempts_used = 0
+
+        for attempt in range(1, self.max_attempts + 1):
+            attempts_used = attempt
+            if attempt == 1 and initial_code:
+                code = initial_code
+            else:
+                try:
+                    with phase("codegen"):
+                        code = await self.codegen_async(
+                            user_message=user_message,
+                            plan_json=plan_json,
+                            skill_md=skill_md,
+                            attempt=attempt,
+                            previous_error=last_error,
+                            previous_code=last_code,
+                            conversation_history=conversation_history,
+                        )
+                except Exception as e:
+                    last_error = f"Code generation failed: {e}"
+                    last_exec = ExecutionResult(stdout="", stderr=last_error, exit_code=1)
+                    continue
+
+            last_code = code
+            with phase("execute"):
+                exec_result = await self._execute_async(code=code, plan_json=plan_json)
+            last_exec = exec_result
+            if exec_result.exit_code == 0:
+                return ExecuteResult(code=code, exec_result=exec_result, attempts_used=attempts_used)
+
+            last_error = exec_result.stderr or f"Execution failed with exit_code={exec_result.exit_code}"
+
+        return ExecuteResult(code=last_code, exec_result=last_exec, attempts_used=attempts_used)
+
+    def codegen(
+        self,
+        user_message: str,
+        plan_json: str,
+        skill_md: str,
+        *,
+        conversation_history: str = "",
+        attempt: int = 1,
+        previous_error: str = "",
+        previous_code: str = "",
     ) -> str:
-        """Generate code using BAML."""
-        docs_registry = self._docs_registry_for_plan(plan_json=plan_json)
-        tool_contracts = docs_registry.render_tool_contracts()
+        """Generate and compile-check code for a single attempt.
 
-        code = agent_module.workflow_codegen(
+        Args:
+            user_message: The user's request
+            plan_json: JSON string representation of the plan
+            skill_md: The skill Markdown content
+            conversation_history: Previous conversation context
+            attempt: Current attempt number (for retry context)
+            previous_error: Error from previous attempt (for retry context)
+            previous_code: Code from previous attempt (for retry context)
+
+        Returns:
+            Extracted Python code as string
+        """
+        return self._codegen(
+            user_message=user_message,
+            plan_json=plan_json,
+            skill_md=skill_md,
+            attempt=attempt,
+            previous_error=previous_error,
+            previous_code=previous_code,
+            conversation_history=conversation_history,
+        )
+
+    async def codegen_async(
+        self,
+        user_message: str,
+        plan_json: str,
+        skill_md: str,
+        *,
+        conversation_history: str = "",
+        attempt: int = 1,
+        previous_error: str = "",
+        previous_code: str = "",
+        on_partial: PartialCodeCallback | None = None,
+    ) -> str:
+        """Async variant of codegen().
+
+        With ``stream_codegen`` enabled the response is streamed: each partial
+        is checked by an IncrementalCodeValidator (raising CodegenAborted as
+        soon as the output is clearly unusable, or once a prose response has
+        ended) and handed to ``on_partial``.
+        """
+        inputs = self._codegen_inputs(
             user_message=user_message,
             plan_json=plan_json,
             skill_md=skill_md,
-            tool_contracts=tool_contracts,
             attempt=attempt,
             previous_error=previous_error,
             previous_code=previous_code,
             conversation_history=conversation_history,
         )
+        if self.stream_codegen:
+            code = await self._stream_codegen(inputs, on_partial=on_partial)
+        else:
+            code = await agent_module.resolve_async_bridge("workflow_codegen")(**inputs)
         extracted = _extract_code_block(code)
         compile(extracted, "<generated>", "exec")
         return extracted
 
+    async def _stream_codegen(self, inputs: dict, *, on_partial: PartialCodeCallback | None) -> str:
+        """Consume the codegen stream, validating partial code as it arrives."""
+        validator = IncrementalCodeValidator()
+        text = ""
+        stream = agent_module.resolve_stream_bridge("workflow_codegen")(**inputs)
+        async with aclosing(stream):
+            async for text in stream:
+                partial_code = validator.feed(text)
+                if on_partial is not None:
+                    await on_partial(partial_code)
+        validator.finish(text)
+        return text
+
+    def _codegen(
+        self,
+        user_message: str,
+        plan_json: str,
+        skill_md: str,
+        *,
+        attempt: int,
+        previous_error: str,
+        previous_code: str,
+        conversation_history: str,
+    ) -> str:
+        """Generate code using BAML."""
+        code = agent_module.workflow_codegen(
+            **self._codegen_inputs(
+                user_message=user_message,
+                plan_json=plan_json,
+                skill_md=skill_md,
+                attempt=attempt,
+                previous_error=previous_error,
+                previous_code=previous_code,
+                conversation_history=conversation_history,
+            )
+        )
+        extracted = _extract_code_block(code)
+        compile(extracted, "<generated>", "exec")
+        return extracted
+
+    def _codegen_inputs(
+        self,
+        *,
+        user_message: str,
+        plan_json: str,
+        skill_md: str,
+        attempt: int,
+        previous_error: str,
+        previous_code: str,
+        conversation_history: str,
+    ) -> dict:
+        """Build the WorkflowCodegen arguments for a plan."""
+        return {
+            "user_message": user_message,
+            "plan_json": plan_json,
+            "skill_md": skill_md,
+            "tool_contracts": self.tool_contracts(plan_json),
+            "attempt": attempt,
+            "previous_error": previous_error,
+            "previous_code": previous_code,
+            "conversation_history": conversation_history,
+        }
+
     def _execute(self, code: str, *, plan_json: str | None = None) -> ExecutionResult:
         """Execute code in subprocess."""
         tools_root = self._tools_root_for_plan(plan_json=plan_json)
@@ -162,6 +348,31 @@ class WorkflowExecutor:
         raw_result = self._executor.run(code, extra_pythonpaths=extra)
         return ExecutionResult(stdout=raw_result.stdout, stderr=raw_result.stderr, exit_code=raw_result.exit_code)
 
+    async def _execute_async(self, code: str, *, plan_json: str | None = None) -> ExecutionResult:
+        """Execute code in subprocess without blocking the event loop."""
+        tools_root = self._tools_root_for_plan(plan_json=plan_json)
+        extra = [tools_root] if tools_root and tools_root != self._default_tools_root else None
+        raw_result = await self._executor.run_async(code, extra_pythonpaths=extra)
+        return ExecutionResult(stdout=raw_result.stdout, stderr=raw_result.stderr, exit_code=raw_result.exit_code)
+
+    def warm(self, skill_groups: list[str]) -> None:
+        """Render the tool contracts of every skill group once and serve them from memory.
+
+        Call again to pick up tool docs edited on disk.
+        """
+        contracts: dict[Path, str] = {}
+        for group in [None, *skill_groups]:
+            registry = self._docs_registry_for_plan(plan_json=json.dumps({"skill_group": group}))
+            if registry.docs_dir not in contracts:
+                contracts[registry.docs_dir] = registry.render_tool_contracts()
+        self._contracts = contracts
+
+    def tool_contracts(self, plan_json: str) -> str:
+        """Rendered tool contracts for the plan's skill group."""
+        registry = self._docs_registry_for_plan(plan_json=plan_json)
+        cached = self._contracts.get(registry.docs_dir) if self._contracts is not None else None
+        return cached if cached is not None else registry.render_tool_contracts()
+
     def _docs_registry_for_plan(self, *, plan_json: str) -> MCPDocsRegistry:
         """Get the appropriate MCP docs registry for the plan."""
         docs_dir = self._default_docs_dir
@@ -191,17 +402,92 @@ class WorkflowExecutor:
         conversation_history: str = "",
         attempts: int,
     ) -> str:
-        """Generate the final response after execution."""
+        """Generate the final response after execution.
+
+        With ``template_responses`` enabled, clean runs are answered with their
+        formatted FINAL SUMMARY block instead of an LLM call (see template_response()).
+        """
+        response = self._template_response(exec_result)
+        if response is not None:
+            return response
         return agent_module.workflow_respond(
+            **_respond_inputs(
+                user_message=user_message,
+                plan_json=plan_json,
+                executed_code=executed_code,
+                exec_result=exec_result,
+                attempts=attempts,
+                conversation_history=conversation_history,
+            )
+        )
+
+    async def respond_async(
+        self,
+        user_message: str,
+        plan_json: str,
+        executed_code: str,
+        exec_result: ExecutionResult,
+        *,
+        conversation_history: str = "",
+        attempts: int,
+        on_partial: PartialTextCallback | None = None,
+    ) -> str:
+        """Async variant of respond().
+
+        When ``on_partial`` is given the response is streamed and the callback
+        receives the cumulative text as it arrives.
+        """
+        response = self._template_response(exec_result)
+        if response is not None:
+            if on_partial is not None:
+                await on_partial(response)
+            return response
+        inputs = _respond_inputs(
             user_message=user_message,
             plan_json=plan_json,
             executed_code=executed_code,
-            exec_stdout=exec_result.stdout,
-            exec_stderr=exec_result.stderr,
-            exit_code=exec_result.exit_code,
+            exec_result=exec_result,
             attempts=attempts,
             conversation_history=conversation_history,
         )
+        if on_partial is not None:
+            return await consume_stream(agent_module.resolve_stream_bridge("workflow_respond")(**inputs), on_partial)
+        return await agent_module.resolve_async_bridge("workflow_respond")(**inputs)
+
+    def _template_response(self, exec_result: ExecutionResult) -> str | None:
+        return template_response(exec_result) if self.template_responses else None
+
+
+async def consume_stream(stream: AsyncIterator[str], on_partial: PartialTextCallback | None) -> str:
+    """Drain a bridge stream, reporting each partial, and return the final text."""
+    text = ""
+    async with aclosing(stream):
+        async for text in stream:
+            if on_partial is not None:
+                await on_partial(text)
+    return text
+
+
+def _respond_inputs(
+    *,
+    user_message: str,
+    plan_json: str,
+    executed_code: str,
+    exec_result: ExecutionResult,
+    attempts: int,
+    conversation_history: str,
+) -> dict:
+    """Build the WorkflowRespond arguments for an execution result."""
+    return {
+        "user_message": user_message,
+        "plan_json": plan_json,
+        "executed_code": executed_code,
+        "exec_stdout": exec_result.stdout,
+        "exec_stderr": exec_result.stderr,
+        "exit_code": exec_result.exit_code,
+        "attempts": attempts,
+        "conversation_history": conversation_history,
+    }
 
 
 def _extract_code_block(text: str) -> str:
@@ -218,6 +504,170 @@ def _extract_code_block(text: str) -> str:
     return code.strip()
 
 
+# Calls the codegen prompt forbids (generated scripts run non-interactively)
+FORBIDDEN_CALLS = frozenset({"input", "breakpoint"})
+ALLOWED_THIRD_PARTY_MODULES = frozenset({"mcp_tools"})
+
+
+def validate_generated_code(code: str) -> list[str]:
+    """Statically validate generated code without executing it (dry run).
+
+    Checks that the script compiles, only imports the standard library or
+    ``mcp_tools``, and does not use interactive input or ``sys.argv``.
+
+    Args:
+        code: Python source extracted from the codegen response
+
+    Returns:
+        List of problems found; empty when the code looks runnable
+    """
+    try:
+        tree = ast.parse(code, "<generated>")
+    except SyntaxError as e:
+        return [f"SyntaxError: {e.msg} (line {e.lineno})"]
+
+    problems: list[str] = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in FORBIDDEN_CALLS:
+            problems.append(f"Forbidden call {node.func.id}() on line {node.lineno}")
+        elif isinstance(node, ast.Attribute) and node.attr == "argv" and isinstance(node.value, ast.Name) and node.value.id == "sys":
+            problems.append(f"Forbidden use of sys.argv on line {node.lineno}")
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            if isinstance(node, ast.ImportFrom):
+                if node.level:
+                    continue
+                names = [node.module or ""]
+            else:
+                names = [alias.name for alias in node.names]
+            for name in names:
+                top = name.split(".", 1)[0]
+                if top not in sys.stdlib_module_names and top not in ALLOWED_THIRD_PARTY_MODULES:
+                    problems.append(f"Unsupported import {name!r} on line {node.lineno}")
+    return problems
+
+
+class CodegenAborted(ValueError):
+    """Raised when a streamed codegen response is clearly unusable."""
+
+
+def _partial_code_block(text: str) -> str:
+    """Extract the code written so far, tolerating an unclosed code fence."""
+    t = text.lstrip()
+    if "```" not in t:
+        return t
+    parts = t.split("```")
+    if len(parts) >= 3:
+        return _extract_code_block(t)
+    code = parts[1]
+    if "\n" not in code:
+        return ""  # still inside the opening fence line
+    return code.split("\n", 1)[1]
+
+
+# Top-level lines that continue the previous statement rather than start one
+_CONTINUATION_PREFIXES = ("else", "elif", "except", "finally", ")", "]", "}")
+
+
+def _completed_statements(code: str) -> str:
+    """Return the prefix of ``code`` made of completed top-level statements.
+
+    A top-level statement is complete once a later line starts at column 0,
+    so everything before the last such line can be parsed on its own.
+    """
+    lines = code.split("\n")[:-1]  # the last line may still be growing
+    cut = 0
+    previous_top_level = ""
+    for i, line in enumerate(lines):
+        if not line.strip() or line[0].isspace() or line.startswith("#"):
+            continue
+        if not line.startswith(_CONTINUATION_PREFIXES) and not previous_top_level.startswith("@"):
+            cut = i
+        previous_top_level = line
+    return "\n".join(lines[:cut])
+
+
+def _looks_like_prose(line: str) -> bool:
+    """Whether a response line is natural language rather than Python."""
+    stripped = line.strip()
+    if not stripped or stripped.startswith(("#", "```", "@", "'", '"')):
+        return False
+    if stripped[-1] in "([{,\\" or '"""' in stripped or "'''" in stripped:
+        return False  # an unfinished multi-line expression or string
+    for candidate in (stripped, f"{stripped}\n    pass"):
+        try:
+            ast.parse(candidate)
+            return False
+        except SyntaxError:
+            pass
+    return len(stripped.split()) >= 3
+
+
+class IncrementalCodeValidator:
+    """Validate a streamed codegen response as it arrives.
+
+    Completed top-level statements are parsed as soon as they are available,
+    so syntax errors, forbidden calls and unsupported imports abort the attempt
+    mid-stream instead of after the full response has been generated.
+
+    A response that opens with prose may still be a short preamble before a
+    code fence, so it is only checked once complete (``finish``).
+    """
+
+    # Leading lines of a complete response without a code fence that decide whether it is prose
+    PROSE_LINE_LIMIT = 3
+
+    def __init__(self) -> None:
+        self._validated = ""
+
+    def feed(self, text: str) -> str:
+        """Validate the cumulative response text received so far.
+
+        Args:
+            text: Cumulative codegen response text
+
+        Returns:
+            The partial code extracted from the response
+
+        Raises:
+            CodegenAborted: If the response is clearly not usable code
+        """
+        if "```" not in text:
+            first_line = next((line for line in text.split("\n")[:-1] if line.strip()), "")
+            if _looks_like_prose(first_line):
+                return ""  # A preamble before the code fence, or prose: see finish()
+
+        code = _partial_code_block(text)
+        prefix = _completed_statements(code)
+        if len(prefix) > len(self._validated) and _tokenizes_cleanly(prefix):
+            problems = validate_generated_code(prefix)
+            if problems:
+                raise CodegenAborted("; ".join(problems))
+            self._validated = prefix
+        return code
+
+    def finish(self, text: str) -> None:
+        """Check the complete response text.
+
+        Raises:
+            CodegenAborted: If the response is prose without a code fence
+        """
+        if "```" in text:
+            return
+        head = [line for line in text.split("\n") if line.strip()][: self.PROSE_LINE_LIMIT]
+        if head and all(_looks_like_prose(line) for line in head):
+            raise CodegenAborted("response is prose instead of a Python script")
+
+
+def _tokenizes_cleanly(code: str) -> bool:
+    """Whether ``code`` ends outside any open bracket or multi-line string."""
+    try:
+        for _ in tokenize.generate_tokens(io.StringIO(code).readline):
+            pass
+    except (tokenize.TokenError, SyntaxError):
+        return False
+    return True
+
+
 def detect_continuation_signals(stdout: str) -> tuple[bool, dict[str, Any]]:
     """Detect continuation signals in execution stdout.
 
@@ -236,6 +686,15 @@ def detect_continuation_signals(stdout: str) -> tuple[bool, dict[str, Any]]:
         value = match.group(2).strip()
         collected_facts[key] = value
 
+    # Structured facts keep their JSON type (lists, numbers, objects)
+    for match in CONTINUE_FACT_JSON_PATTERN.finditer(stdout):
+        key = match.group(1).strip()
+        value = match.group(2).strip()
+        try:
+            collected_facts[key] = json.loads(value)
+        except ValueError:
+            collected_facts[key] = value
+
     # Check for CONTINUE_WORKFLOW pattern
     for match in CONTINUE_WORKFLOW_PATTERN.finditer(stdout):
         signal = match.group(1).strip().lower()
@@ -245,6 +704,111 @@ def detect_continuation_signals(stdout: str) -> tuple[bool, dict[str, Any]]:
     return needs_continuation, collected_facts
 
 
+def template_response(exec_result: ExecutionResult) -> str | None:
+    """Format the FINAL SUMMARY block of a clean run as the user-facing response.
+
+    Args:
+        exec_result: The execution result
+
+    Returns:
+        The formatted summary, or None when the run needs the LLM responder:
+        a non-zero exit code, anything on stderr, a pending continuation, or
+        stdout without exactly one non-empty, reasonably short summary block
+    """
+    stdout = exec_result.stdout or ""
+    if exec_result.exit_code != 0 or (exec_result.stderr or "").strip():
+        return None
+    if stdout.count(FINAL_SUMMARY_MARKER) != 1 or detect_continuation_signals(stdout)[0]:
+        return None
+
+    lines = []
+    for line in stdout.split(FINAL_SUMMARY_MARKER, 1)[1].splitlines():
+        if not line.strip():
+            continue
+        if "[ERROR]" in line or line.lstrip().startswith("Traceback"):
+            return None
+        text = _LOG_PREFIX_PATTERN.sub("", line.rstrip())
+        stripped = text.lstrip()
+        if not stripped.startswith(("- ", "* ", "• ", "#")) and not re.match(r"\d+[.)] ", stripped):
+            text = text[: len(text) - len(stripped)] + "- " + stripped
+        lines.append(text)
+
+    response = "\n".join(lines)
+    if not response or len(response) > MAX_TEMPLATE_RESPONSE_CHARS:
+        return None
+    return "Done. Summary:\n\n" + response
+
+
+def completed_checkpoints(workflow_state: dict | None) -> int:
+    """Number of checkpoints completed before the turn that resumes ``workflow_state``.
+
+    A workflow state only exists once a checkpoint has completed, so states
+    saved with ``current_step`` 0 count as one completed checkpoint.
+    """
+    if not workflow_state:
+        return 0
+    return max(1, int(workflow_state.get("current_step") or 0))
+
+
+def continuation_plan_json(plan_json: str, workflow_state: dict | None) -> str:
+    """Plan JSON for the turn that resumes ``workflow_state``.
+
+    The plan's ``checkpoints`` mark step boundaries: steps up to and including
+    the last completed checkpoint move to ``completed_steps``, and only the
+    remaining steps and checkpoints are left to generate and run. The typed
+    ``collected_facts`` are attached as the inputs of the remaining steps;
+    this is the only way they reach codegen.
+
+    Returns:
+        The original ``plan_json`` when there is nothing to resume
+    """
+    if not workflow_state:
+        return plan_json
+    plan = json.loads(plan_json)
+    resumed = dict(plan)
+
+    steps = list(plan.get("steps") or [])
+    checkpoints = list(plan.get("checkpoints") or [])
+    done = min(completed_checkpoints(workflow_state), len(checkpoints))
+    resume_at = _checkpoint_boundaries(steps, checkpoints)[done - 1] if done else 0
+    if plan.get("requires_lookahead") and resume_at < len(steps):
+        resumed.update(
+            steps=steps[resume_at:],
+            checkpoints=checkpoints[done:],
+            requires_lookahead=done < len(checkpoints),
+            completed_steps=steps[:resume_at],
+        )
+    if workflow_state.get("collected_facts"):
+        resumed["collected_facts"] = workflow_state["collected_facts"]
+    if resumed == plan:
+        return plan_json
+    return json.dumps(resumed, ensure_ascii=False)
+
+
+def _checkpoint_boundaries(steps: list[str], checkpoints: list[str]) -> list[int]:
+    """Index of the first step after each checkpoint.
+
+    A checkpoint ends at the first following step sharing at least half of its
+    words; unmatched checkpoints end one step after the previous boundary.
+    """
+    boundaries: list[int] = []
+    start = 0
+    for checkpoint in checkpoints:
+        words = _words(checkpoint)
+        end = start + 1
+        for i in range(start, len(steps)):
+            if words and len(words & _words(steps[i])) * 2 >= len(words):
+                end = i + 1
+                break
+        boundaries.append(min(end, len(steps)))
+        start = boundaries[-1]
+    return boundaries
+
+
+def _words(text: str) -> set[str]:
+    return set(re.findall(r"[a-z0-9]+", str(text).lower()))
+
+
 class MultiTurnWorkflowExecutor:
     """Extended executor with multi-turn workflow support."""
 
@@ -259,6 +823,7 @@ class MultiTurnWorkflowExecutor:
         *,
         conversation_history: str = "",
         workflow_state: dict | None = None,
+        initial_code: str | None = None,
     ) -> MultiTurnExecuteResult:
         """Execute workflow with multi-turn support.
 
@@ -272,37 +837,58 @@ class MultiTurnWorkflowExecutor:
             skill_md: The skill Markdown content
             conversation_history: Previous conversation context
             workflow_state: Optional existing workflow state to resume
+            initial_code: Already generated code to use for the first attempt
 
         Returns:
             MultiTurnExecuteResult with continuation info if applicable
         """
-        # Parse plan to check for multi-turn
-        plan_data = json.loads(plan_json)
-        is_multi_turn = plan_data.get("requires_lookahead", False)
-
-        # Inject collected facts from previous turns into conversation history
-        enriched_history = conversation_history
-        if workflow_state and workflow_state.get("collected_facts"):
-            facts_section = "## Collected Facts from Previous Steps\n"
-            for key, value in workflow_state["collected_facts"].items():
-                facts_section += f"- {key}: {value}\n"
-            enriched_history = f"{facts_section}\n{conversation_history}"
-
-        # Run standard execution
+        is_multi_turn = _is_multi_turn(plan_json)
+
+        # Run standard execution of the steps left after the last completed checkpoint
         result = self._inner.execute(
             user_message=user_message,
-            plan_json=plan_json,
+            plan_json=continuation_plan_json(plan_json, workflow_state),
             skill_md=skill_md,
-            conversation_history=enriched_history,
+            conversation_history=conversation_history,
+            initial_code=initial_code,
         )
+        return _multi_turn_result(result, is_multi_turn=is_multi_turn)
 
-        # Check for continuation signals
-        needs_continuation, collected_facts = detect_continuation_signals(result.exec_result.stdout)
+    async def execute_with_continuation_async(
+        self,
+        user_message: str,
+        plan_json: str,
+        skill_md: str,
+        *,
+        conversation_history: str = "",
+        workflow_state: dict | None = None,
+        initial_code: str | None = None,
+    ) -> MultiTurnExecuteResult:
+        """Async variant of execute_with_continuation()."""
+        is_multi_turn = _is_multi_turn(plan_json)
 
-        return MultiTurnExecuteResult(
-            code=result.code,
-            exec_result=result.exec_result,
-            attempts_used=result.attempts_used,
-            needs_continuation=needs_continuation and is_multi_turn,
-            collected_facts=collected_facts,
+        result = await self._inner.execute_async(
+            user_message=user_message,
+            plan_json=continuation_plan_json(plan_json, workflow_state),
+            skill_md=skill_md,
+            conversation_history=conversation_history,
+            initial_code=initial_code,
         )
+        return _multi_turn_result(result, is_multi_turn=is_multi_turn)
+
+
+def _is_multi_turn(plan_json: str) -> bool:
+    return bool(json.loads(plan_json).get("requires_lookahead", False))
+
+
+def _multi_turn_result(result: ExecuteResult, *, is_multi_turn: bool) -> MultiTurnExecuteResult:
+    # Check for continuation signals
+    needs_continuation, collected_facts = detect_continuation_signals(result.exec_result.stdout)
+
+    return MultiTurnExecuteResult(
+        code=result.code,
+        exec_result=result.exec_result,
+        attempts_used=result.attempts_used,
+        needs_continuation=needs_continuation and is_multi_turn,
+        collected_facts=collected_facts,
+    )
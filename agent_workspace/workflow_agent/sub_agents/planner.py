@@ -78,71 +78,165 @@ class Planner:
         Returns:
             PlanningResult with plan, JSON, and selected skill
         """
-        skills_readme = self._registry.read_skills_readme()
+        proposed = self.propose(user_message=user_message, conversation_history=conversation_history)
+        if enable_review and self.needs_review(proposed):
+            return self.review(proposed, user_message=user_message, conversation_history=conversation_history)
+        return proposed
+
+    def propose(self, user_message: str, *, conversation_history: str = "") -> PlanningResult:
+        """Create the initial (unreviewed) plan from user message.
+
+        Args:
+            user_message: The user's request
+            conversation_history: Previous conversation context
+
+        Returns:
+            PlanningResult with the proposed plan, JSON, and selected skill
+        """
+        skills, inputs = self._plan_inputs(user_message=user_message, conversation_history=conversation_history)
+        plan_data = agent_module.workflow_plan(**inputs)
+        return _proposed_result(plan_data, skills)
+
+    async def propose_async(self, user_message: str, *, conversation_history: str = "") -> PlanningResult:
+        """Async variant of propose()."""
+        skills, inputs = self._plan_inputs(user_message=user_message, conversation_history=conversation_history)
+        plan_data = await agent_module.resolve_async_bridge("workflow_plan")(**inputs)
+        return _proposed_result(plan_data, skills)
+
+    async def plan_async(
+        self,
+        user_message: str,
+        *,
+        conversation_history: str = "",
+        enable_review: bool = False,
+    ) -> PlanningResult:
+        """Async variant of plan()."""
+        proposed = await self.propose_async(user_message=user_message, conversation_history=conversation_history)
+        if enable_review and self.needs_review(proposed):
+            return await self.review_async(proposed, user_message=user_message, conversation_history=conversation_history)
+        return proposed
+
+    def _plan_inputs(self, *, user_message: str, conversation_history: str) -> tuple[list[Skill], dict]:
         skills = self._registry.list_skills()
-        skill_groups = self._registry.list_skill_groups()
-
-        plan_data = agent_module.workflow_plan(
-            user_message=user_message,
-            skills_readme=skills_readme,
-            skill_names=[s.name for s in skills],
-            skill_groups=skill_groups,
-            conversation_history=conversation_history,
+        inputs = {
+            "user_message": user_message,
+            "skills_readme": self._registry.read_skills_readme(),
+            "skill_names": [s.name for s in skills],
+            "skill_groups": self._registry.list_skill_groups(),
+            "conversation_history": conversation_history,
+        }
+        return skills, inputs
+
+    @staticmethod
+    def needs_review(proposed: PlanningResult) -> bool:
+        """Whether a proposed plan is eligible for the review step."""
+        return proposed.selected_skill is not None
+
+    def review(
+        self,
+        proposed: PlanningResult,
+        *,
+        user_message: str,
+        conversation_history: str = "",
+    ) -> PlanningResult:
+        """Review a proposed plan against its selected skill manual.
+
+        Args:
+            proposed: The result of propose()
+            user_message: The user's request
+            conversation_history: Previous conversation context
+
+        Returns:
+            PlanningResult with the reviewed plan, JSON, and selected skill
+        """
+        if proposed.selected_skill is None:
+            return proposed
+
+        reviewed_plan_data = agent_module.workflow_plan_review(
+            **_review_inputs(proposed, user_message=user_message, conversation_history=conversation_history)
         )
+        return _reviewed_result(reviewed_plan_data, self._registry.list_skills())
 
-        plan = _plan_from_dict(plan_data, skills)
-        selected_skill: Skill | None = None
-
-        if plan.action == "execute_skill" and plan.skill_name:
-            selected_skill = _find_skill_by_name(plan.skill_name, skills)
-            if selected_skill:
-                skill_group = selected_skill.group
-                skill_steps = selected_skill.logic_flow_steps
-                plan = Plan(
-                    action=plan.action,
-                    skill_group=skill_group,
-                    skill_name=plan.skill_name,
-                    intent=plan.intent,
-                    steps=skill_steps or plan.steps,
-                    requires_lookahead=plan.requires_lookahead,
-                    checkpoints=plan.checkpoints,
-                )
-
-        proposed_plan_json = _plan_to_json(plan)
-
-        if selected_skill is not None and enable_review:
-            reviewed_plan_data = agent_module.workflow_plan_review(
-                user_message=user_message,
-                proposed_plan_json=proposed_plan_json,
-                selected_skill_md=selected_skill.content,
-                conversation_history=conversation_history,
-            )
-            reviewed_plan = _plan_from_dict(reviewed_plan_data, skills)
-            if reviewed_plan.action != "execute_skill":
-                plan = reviewed_plan
-                selected_skill = None
-            else:
-                plan = reviewed_plan
-                selected_skill = _find_skill_by_name(plan.skill_name, skills)
-                if selected_skill:
-                    skill_group = selected_skill.group
-                    skill_steps = selected_skill.logic_flow_steps
-                    plan = Plan(
-                        action=plan.action,
-                        skill_group=skill_group,
-                        skill_name=plan.skill_name,
-                        intent=plan.intent,
-                        steps=skill_steps or plan.steps,
-                        requires_lookahead=plan.requires_lookahead,
-                        checkpoints=plan.checkpoints,
-                    )
-
-        plan_json = _plan_to_json(plan)
-
-        if plan.action in {"chat", "custom_script"}:
-            return PlanningResult(plan=plan, plan_json=plan_json, selected_skill=None)
-
-        return PlanningResult(plan=plan, plan_json=plan_json, selected_skill=selected_skill)
+    async def review_async(
+        self,
+        proposed: PlanningResult,
+        *,
+        user_message: str,
+        conversation_history: str = "",
+    ) -> PlanningResult:
+        """Async variant of review()."""
+        if proposed.selected_skill is None:
+            return proposed
+
+        reviewed_plan_data = await agent_module.resolve_async_bridge("workflow_plan_review")(
+            **_review_inputs(proposed, user_message=user_message, conversation_history=conversation_history)
+        )
+        return _reviewed_result(reviewed_plan_data, self._registry.list_skills())
+
+
+def _proposed_result(plan_data: dict, skills: list[Skill]) -> PlanningResult:
+    plan = _plan_from_dict(plan_data, skills)
+    selected_skill: Skill | None = None
+    if plan.action == "execute_skill" and plan.skill_name:
+        selected_skill = _find_skill_by_name(plan.skill_name, skills)
+        if selected_skill:
+            plan = _with_skill_steps(plan, selected_skill)
+    return _planning_result(plan, selected_skill)
+
+
+def _review_inputs(proposed: PlanningResult, *, user_message: str, conversation_history: str) -> dict:
+    return {
+        "user_message": user_message,
+        "proposed_plan_json": proposed.plan_json,
+        "selected_skill_md": proposed.selected_skill.content,
+        "conversation_history": conversation_history,
+    }
+
+
+def _reviewed_result(plan_data: dict, skills: list[Skill]) -> PlanningResult:
+    plan = _plan_from_dict(plan_data, skills)
+    selected_skill: Skill | None = None
+    if plan.action == "execute_skill":
+        selected_skill = _find_skill_by_name(plan.skill_name, skills)
+        if selected_skill:
+            plan = _with_skill_steps(plan, selected_skill)
+    return _planning_result(plan, selected_skill)
+
+
+def plans_equivalent(a: Plan, b: Plan) -> bool:
+    """Whether code generated for one plan is valid for the other.
+
+    Plans are equivalent when they agree on action, skill and steps. The
+    multi-turn fields are compared too since they change the generated
+    script shape; intent wording is ignored.
+    """
+    return (
+        a.action == b.action
+        and a.skill_name == b.skill_name
+        and list(a.steps) == list(b.steps)
+        and a.requires_lookahead == b.requires_lookahead
+        and list(a.checkpoints) == list(b.checkpoints)
+    )
+
+
+def _with_skill_steps(plan: Plan, selected_skill: Skill) -> Plan:
+    """Align a plan with the skill group and Logic Flow steps of its skill."""
+    return Plan(
+        action=plan.action,
+        skill_group=selected_skill.group,
+        skill_name=plan.skill_name,
+        intent=plan.intent,
+        steps=selected_skill.logic_flow_steps or plan.steps,
+        requires_lookahead=plan.requires_lookahead,
+        checkpoints=plan.checkpoints,
+    )
+
+
+def _planning_result(plan: Plan, selected_skill: Skill | None) -> PlanningResult:
+    plan_json = _plan_to_json(plan)
+    if plan.action in {"chat", "custom_script"}:
+        return PlanningResult(plan=plan, plan_json=plan_json, selected_skill=None)
+    return PlanningResult(plan=plan, plan_json=plan_json, selected_skill=selected_skill)
 
 
 def _find_skill_by_name(skill_name: str, skills: list[Skill]) -> Skill | None:
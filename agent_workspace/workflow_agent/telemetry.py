@@ -0,0 +1,286 @@
+"""Per-call LLM telemetry for the BAML bridge.
+
+Every bridge call runs inside ``trace_llm_call(phase)``, which attaches a
+``baml_py.Collector`` to the call and, when it finishes, writes one
+``LLMCallMetrics`` record (tokens, time-to-first-token, latency, retries and
+the client that served it) to the configured metrics sink, keyed by session
+and phase.
+
+The sink is a JSONL file set via the ``llm_metrics_path`` env var; telemetry
+is disabled when it is unset. Summarize a metrics file with:
+
+    python -m agent_workspace.workflow_agent.telemetry .metrics/llm_calls.jsonl
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Protocol
+
+_current_session: ContextVar[str | None] = ContextVar("llm_telemetry_session", default=None)
+
+
+@dataclass(frozen=True)
+class LLMCallMetrics:
+    """Metrics for a single BAML function call.
+
+    Attributes:
+        session_id: Session the call was made for (None outside a session)
+        phase: BAML function name, e.g. "WorkflowCodegen"
+        client: Name of the LLM client that served the call
+        input_tokens: Prompt tokens reported by the provider
+        output_tokens: Completion tokens reported by the provider
+        cached_input_tokens: Prompt tokens served from the provider's cache
+        time_to_first_token_ms: Time until the first partial (streamed calls only)
+        duration_ms: Latency of the call once admitted
+        queue_wait_ms: Time spent waiting for admission (see admission.py)
+        retries: Number of extra LLM requests made (retries and fallbacks)
+        hedge: Whether this request was a hedge fired after the primary was slow
+        status: "ok", "error" or "cancelled"
+        timestamp: Unix time at which the call started
+    """
+    session_id: str | None
+    phase: str
+    client: str | None
+    input_tokens: int | None
+    output_tokens: int | None
+    cached_input_tokens: int | None
+    time_to_first_token_ms: float | None
+    duration_ms: float
+    queue_wait_ms: float
+    retries: int
+    hedge: bool
+    status: str
+    timestamp: float
+
+
+class MetricsSink(Protocol):
+    def write(self, metrics: LLMCallMetrics) -> None: ...
+
+
+class JsonlMetricsSink:
+    """Append metrics as JSON lines to a local file."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def write(self, metrics: LLMCallMetrics) -> None:
+        line = json.dumps(asdict(metrics), ensure_ascii=False)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+_sink: MetricsSink | None = None
+_sink_configured = False
+
+
+def configure_sink(sink: MetricsSink | None) -> None:
+    """Set the metrics sink (None disables telemetry)."""
+    global _sink, _sink_configured
+    _sink = sink
+    _sink_configured = True
+
+
+def get_sink() -> MetricsSink | None:
+    """Return the metrics sink, creating it from ``llm_metrics_path`` on first use."""
+    global _sink, _sink_configured
+    if not _sink_configured:
+        path = os.getenv("llm_metrics_path", "").strip()
+        _sink = JsonlMetricsSink(Path(path)) if path else None
+        _sink_configured = True
+    return _sink
+
+
+def set_session(session_id: str | None):
+    """Attribute subsequent LLM calls in this context to a session.
+
+    Returns:
+        Token that can be passed to ``reset_session``
+    """
+    return _current_session.set(session_id)
+
+
+def reset_session(token) -> None:
+    _current_session.reset(token)
+
+
+@contextmanager
+def session(session_id: str | None) -> Iterator[None]:
+    """Attribute LLM calls made inside the block to a session."""
+    token = set_session(session_id)
+    try:
+        yield
+    finally:
+        reset_session(token)
+
+
+class LLMCallTrace:
+    """Collects telemetry for one bridge call."""
+
+    def __init__(self, phase: str, *, enabled: bool, hedge: bool = False):
+        self.phase = phase
+        self.hedge = hedge
+        self.collector = _new_collector(phase) if enabled else None
+        self._started_at = time.time()
+        self._start = time.perf_counter()
+        self._first_token_ms: float | None = None
+        self._queue_wait_ms = 0.0
+
+    def options(self) -> dict[str, Any]:
+        """Keyword arguments for ``b.with_options`` that attach the collector."""
+        return {"collector": self.collector} if self.collector is not None else {}
+
+    def mark_admitted(self, queue_wait_ms: float) -> None:
+        """Record the admission wait; latency is measured from here on."""
+        self._queue_wait_ms = queue_wait_ms
+        self._start = time.perf_counter()
+
+    def total_tokens(self) -> int | None:
+        """Prompt plus completion tokens of the last call, when reported."""
+        usage = getattr(self.collector.last, "usage", None) if self.collector is not None else None
+        if usage is None or usage.input_tokens is None:
+            return None
+        return int(usage.input_tokens) + int(usage.output_tokens or 0)
+
+    def mark_first_token(self) -> None:
+        """Record time-to-first-token (call when the first partial arrives)."""
+        if self._first_token_ms is None:
+            self._first_token_ms = (time.perf_counter() - self._start) * 1000
+
+    def metrics(self, status: str) -> LLMCallMetrics:
+        log = self.collector.last if self.collector is not None else None
+        usage = getattr(log, "usage", None)
+        selected = getattr(log, "selected_call", None)
+        return LLMCallMetrics(
+            session_id=_current_session.get(),
+            phase=self.phase,
+            client=getattr(selected, "client_name", None),
+            input_tokens=getattr(usage, "input_tokens", None),
+            output_tokens=getattr(usage, "output_tokens", None),
+            cached_input_tokens=getattr(usage, "cached_input_tokens", None),
+            time_to_first_token_ms=self._first_token_ms,
+            duration_ms=round((time.perf_counter() - self._start) * 1000, 3),
+            queue_wait_ms=round(self._queue_wait_ms, 3),
+            retries=max(len(getattr(log, "calls", None) or []) - 1, 0),
+            hedge=self.hedge,
+            status=status,
+            timestamp=self._started_at,
+        )
+
+
+def _new_collector(phase: str):
+    from baml_py import Collector
+
+    return Collector(name=phase)
+
+
+@contextmanager
+def trace_llm_call(phase: str, *, hedge: bool = False) -> Iterator[LLMCallTrace]:
+    """Trace a BAML call and write its metrics to the sink when it finishes.
+
+    Args:
+        phase: BAML function name, used as the metrics key
+        hedge: Whether the call is a hedge request (see hedging.py)
+
+    Yields:
+        LLMCallTrace whose ``options()`` must be passed to ``b.with_options``
+    """
+    sink = get_sink()
+    trace = LLMCallTrace(phase, enabled=sink is not None, hedge=hedge)
+    status = "error"
+    try:
+        yield trace
+        status = "ok"
+    except (asyncio.CancelledError, GeneratorExit):
+        status = "cancelled"
+        raise
+    finally:
+        if sink is not None:
+            try:
+                sink.write(trace.metrics(status))
+            except Exception:
+                pass  # Telemetry must never fail an LLM call
+
+
+def summarize(path: Path) -> dict[str, dict[str, float]]:
+    """Aggregate a JSONL metrics file per phase.
+
+    Args:
+        path: Metrics file written by JsonlMetricsSink
+
+    Returns:
+        Mapping of phase to calls, errors, latency percentiles (ms), token totals
+        and the share of prompt tokens served from the provider's prefix cache
+    """
+    by_phase: dict[str, list[dict]] = {}
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        if line.strip():
+            record = json.loads(line)
+            by_phase.setdefault(record["phase"], []).append(record)
+
+    summary: dict[str, dict[str, float]] = {}
+    for phase, records in sorted(by_phase.items()):
+        durations = sorted(r["duration_ms"] for r in records)
+        ttfts = sorted(r["time_to_first_token_ms"] for r in records if r.get("time_to_first_token_ms") is not None)
+        summary[phase] = {
+            "calls": len(records),
+            "errors": sum(1 for r in records if r["status"] == "error"),
+            "p50_ms": percentile(durations, 50),
+            "p95_ms": percentile(durations, 95),
+            "total_ms": sum(durations),
+            "p50_ttft_ms": percentile(ttfts, 50) if ttfts else 0.0,
+            "p95_queue_ms": percentile(sorted(r.get("queue_wait_ms") or 0.0 for r in records), 95),
+            "input_tokens": sum(r.get("input_tokens") or 0 for r in records),
+            "output_tokens": sum(r.get("output_tokens") or 0 for r in records),
+            "cached_input_tokens": sum(r.get("cached_input_tokens") or 0 for r in records),
+            "cached_ratio": _ratio(
+                sum(r.get("cached_input_tokens") or 0 for r in records),
+                sum(r.get("input_tokens") or 0 for r in records),
+            ),
+            "retries": sum(r.get("retries") or 0 for r in records),
+            "hedges": sum(1 for r in records if r.get("hedge")),
+            "hedge_wins": sum(1 for r in records if r.get("hedge") and r["status"] == "ok"),
+        }
+    return summary
+
+
+def _ratio(part: float, whole: float) -> float:
+    return part / whole if whole else 0.0
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of ascending values (0.0 when empty)."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return float(sorted_values[index])
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = sys.argv[1:] if argv is None else argv
+    path = Path(args[0]) if args else Path(os.getenv("llm_metrics_path", ".metrics/llm_calls.jsonl"))
+    summary = summarize(path)
+    total_ms = sum(s["total_ms"] for s in summary.values()) or 1.0
+    print(f"{'phase':<20} {'calls':>6} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'share':>6} {'ttft':>8} {'queue95':>8} {'hedges':>7} {'in tok':>9} {'cached':>7} {'out tok':>9}")
+    for phase, s in summary.items():
+        print(
+            f"{phase:<20} {s['calls']:>6} {s['errors']:>4} {s['p50_ms']:>9.0f} {s['p95_ms']:>9.0f} "
+            f"{s['total_ms'] / total_ms:>6.0%} {s['p50_ttft_ms']:>8.0f} {s['p95_queue_ms']:>8.0f} {s['hedges']:>7} {s['input_tokens']:>9} {s['cached_ratio']:>7.0%} {s['output_tokens']:>9}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,40 @@
+"""Wall-clock time per pipeline phase of a request.
+
+``record_phases()`` collects, for the request running in the current context,
+the time spent in each ``phase(name)`` block (plan, chat, codegen, execute,
+respond). Repeated phases, e.g. codegen retries or continuation turns, add up.
+Outside ``record_phases()`` the ``phase`` blocks cost next to nothing.
+"""
+from __future__ import annotations
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current_phases: ContextVar[dict[str, float] | None] = ContextVar("phase_timings", default=None)
+
+
+@contextmanager
+def record_phases() -> Iterator[dict[str, float]]:
+    """Collect phase timings (milliseconds) of the request run inside the block."""
+    phases: dict[str, float] = {}
+    token = _current_phases.set(phases)
+    try:
+        yield phases
+    finally:
+        _current_phases.reset(token)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Attribute the time spent in the block to ``name``."""
+    phases = _current_phases.get()
+    if phases is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = phases.get(name, 0.0) + (time.perf_counter() - started) * 1000
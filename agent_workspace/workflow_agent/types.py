@@ -19,6 +19,8 @@ class AgentResult:
     exec_stdout: str | None = None
     exec_stderr: str | None = None
     attempts: int | None = None
+    workflow_state: dict | None = None
+    phase_ms: dict[str, float] = field(default_factory=dict)  # see timing.py
 
 
 @dataclass
@@ -0,0 +1,99 @@
+"""Throughput/latency benchmark of the full WorkflowAgent pipeline.
+
+Record a cassette once against the live provider, then replay it offline with
+a synthetic latency model (see agent_workspace/workflow_agent/replay.py):
+
+    python benchmarks/bench_pipeline.py --record
+    python benchmarks/bench_pipeline.py --concurrency 8 --repeat 5 --latency-ms 800 --tokens-per-second 60
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from agent_workspace.main import build_agent  # noqa: E402
+from agent_workspace.workflow_agent import replay  # noqa: E402
+from agent_workspace.workflow_agent.replay import Cassette, LLMBackend, ReplayTiming  # noqa: E402
+
+DEFAULT_MESSAGES = [
+    "Who are today's hires? Summarize names + managers.",
+    "Search employees for 'Engineering Manager'.",
+    "Create two Jira tickets in IT and list open IT tickets.",
+    "Run the Monday morning onboarding for engineers.",
+]
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+async def _run(messages: list[str], *, concurrency: int) -> tuple[list[float], int, float]:
+    agent = build_agent()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async def one(message: str) -> None:
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await agent.run(user_message=message)
+            except Exception as e:
+                errors += 1
+                print(f"error: {message!r}: {e}", file=sys.stderr)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(m) for m in messages))
+    return latencies, errors, time.perf_counter() - started
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cassette", type=Path, default=replay.DEFAULT_CASSETTE_PATH)
+    parser.add_argument("--record", action="store_true", help="call the live provider and record responses")
+    parser.add_argument("--messages", type=Path, help="file with one user message per line")
+    parser.add_argument("--repeat", type=int, default=1, help="run every message this many times")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=0, help="replayed time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0, help="replayed generation speed (0 = instant)")
+    args = parser.parse_args(argv)
+
+    messages = DEFAULT_MESSAGES
+    if args.messages:
+        messages = [line.strip() for line in args.messages.read_text(encoding="utf-8").splitlines() if line.strip()]
+    messages = messages * max(1, args.repeat)
+
+    # Repeated identical requests would otherwise be served by a single coalesced call
+    os.environ.setdefault("enable_llm_coalescing", "false")
+    replay.configure_llm_backend(
+        LLMBackend(
+            "record" if args.record else "replay",
+            cassette=Cassette(args.cassette),
+            timing=ReplayTiming(latency_ms=args.latency_ms, tokens_per_second=args.tokens_per_second),
+        )
+    )
+
+    latencies, errors, wall = asyncio.run(_run(messages, concurrency=args.concurrency))
+    print(f"requests: {len(messages)}  errors: {errors}  concurrency: {args.concurrency}")
+    print(f"wall: {wall:.2f}s  throughput: {len(messages) / wall:.2f} req/s")
+    print(
+        f"latency p50: {_percentile(latencies, 50):.3f}s  p95: {_percentile(latencies, 95):.3f}s  "
+        f"p99: {_percentile(latencies, 99):.3f}s"
+    )
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
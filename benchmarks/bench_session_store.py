@@ -0,0 +1,98 @@
+"""Session store serializer benchmark: dump/load time and size of thread snapshots.
+
+Builds a realistic thread (per turn: user and assistant messages, a plan, a
+few-kilobyte generated script and its execution output, facts) and compares
+the pure-Python YAML path the store used before with each ``memory_format``
+(see agent_workspace/memory/serializers.py):
+
+    python benchmarks/bench_session_store.py --turns 300 --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+import yaml  # noqa: E402
+
+from agent_workspace.memory import serializers  # noqa: E402
+
+CODE_LINE = 'result = client.call("hr.search_employees", {{"department": "Engineering", "page": {i}}})\n'
+STDOUT_LINE = "Employee {i}: John Smith <john.smith{i}@example.com> | Engineering | start 2024-03-{day:02d}\n"
+
+
+def build_thread(turns: int) -> dict:
+    messages, steps, facts = [], [], []
+    for t in range(turns):
+        at = f"2026-01-20T10:{t % 60:02d}:00"
+        messages.append({"role": "user", "content": f"List new hires in Engineering for week {t}", "timestamp": at})
+        plan = {"intent": "list_hires", "action": "execute_skill", "steps": [f"Fetch hires page {i}" for i in range(6)]}
+        steps.append({
+            "step_type": "plan", "category": "working", "content": json.dumps(plan, indent=2),
+            "metadata": {"intent": "list_hires", "action": "execute_skill"}, "timestamp": at,
+        })
+        code = "".join(CODE_LINE.format(i=i) for i in range(40))
+        steps.append({
+            "step_type": "codegen", "category": "working", "content": code,
+            "metadata": {"attempt": 1}, "timestamp": at,
+        })
+        stdout = "".join(STDOUT_LINE.format(i=i, day=i % 28 + 1) for i in range(30))
+        steps.append({
+            "step_type": "execute", "category": "working", "content": f"stdout: {stdout}\nstderr: ",
+            "metadata": {"exit_code": 0, "attempt": 1}, "timestamp": at,
+        })
+        messages.append({"role": "assistant", "content": "Found 30 new hires: " + stdout[:500], "timestamp": at})
+        facts.append({"fact": f"Reference: LR-{t}", "source_turn": len(messages), "timestamp": at})
+    return {
+        "session_id": "bench", "created_at": "2026-01-20T10:00:00+00:00", "updated_at": messages[-1]["timestamp"],
+        "user_id": "user-1", "user_identifier": "testuser", "name": "bench", "metadata": {}, "tags": [],
+        "messages": messages, "steps": steps, "facts": facts, "log_seq": 5 * turns,
+    }
+
+
+def _best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=200, help="turns in the benchmark thread")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement (best is reported)")
+    args = parser.parse_args(argv)
+
+    data = build_thread(args.turns)
+
+    def pure_yaml_dumps(value):
+        return yaml.dump(value, Dumper=yaml.Dumper, default_flow_style=False, allow_unicode=True, sort_keys=False)
+
+    candidates = [
+        ("yaml (pure Python, before)", lambda v: pure_yaml_dumps(v).encode("utf-8"),
+         lambda raw: yaml.load(raw.decode("utf-8"), Loader=yaml.SafeLoader)),
+    ]
+    for name, serializer in serializers.SERIALIZERS.items():
+        label = f"{name} (libyaml)" if name == "yaml" and yaml.__with_libyaml__ else name
+        candidates.append((label, serializer.dumps, serializers.loads))
+
+    print(f"thread: {args.turns} turns, {len(data['messages'])} messages, {len(data['steps'])} steps")
+    print(f"{'format':<28}{'dump ms':>10}{'load ms':>10}{'size KiB':>10}")
+    for label, dumps, loads in candidates:
+        raw = dumps(data)
+        assert loads(raw) == data, label
+        dump_ms = _best_ms(lambda: dumps(data), args.repeat)
+        load_ms = _best_ms(lambda: loads(raw), args.repeat)
+        print(f"{label:<28}{dump_ms:>10.1f}{load_ms:>10.1f}{len(raw) / 1024:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
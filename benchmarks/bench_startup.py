@@ -0,0 +1,85 @@
+"""Startup benchmark: time-to-ready of the shared agent and per-session cost.
+
+Compares what a new chat session used to pay (``build_agent()``: reload
+``.env`` and construct a fresh, cold ``WorkflowAgent``) with the shared,
+warmed agent from ``get_shared_agent()``, and shows the first-request cost of
+planner and codegen inputs on a cold versus a warmed agent:
+
+    python benchmarks/bench_startup.py --sessions 200
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+PLAN_JSON = '{"action": "execute_skill", "skill_group": "HR-scopes"}'
+
+
+def _ms(started: float) -> float:
+    return (time.perf_counter() - started) * 1000
+
+
+def _first_request_ms(agent) -> float:
+    """Time to build the planner and codegen inputs of one request."""
+    started = time.perf_counter()
+    agent.skills.list_skills()
+    agent.skills.read_skills_readme()
+    agent.skills.list_skill_groups()
+    agent._workflow_executor.tool_contracts(PLAN_JSON)
+    return _ms(started)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=100, help="sessions to create per strategy")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    from agent_workspace import main as agent_main
+    from agent_workspace.memory import SessionMemory
+
+    import_ms = _ms(started)
+
+    started = time.perf_counter()
+    cold = agent_main.build_agent()
+    build_ms = _ms(started)
+    cold_request_ms = _first_request_ms(cold)
+
+    started = time.perf_counter()
+    shared = agent_main.get_shared_agent()
+    ready_ms = _ms(started)
+    warm_request_ms = _first_request_ms(shared)
+    timings = shared.warm()  # Re-warm to report the per-component breakdown
+
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        for i in range(args.sessions):
+            agent_main.build_agent()
+            SessionMemory(session_id=f"bench_{i}", memory_dir=Path(tmp))
+        per_session_built_ms = _ms(started) / args.sessions
+
+        started = time.perf_counter()
+        for i in range(args.sessions):
+            agent_main.get_shared_agent()
+            SessionMemory(session_id=f"bench_{i}", memory_dir=Path(tmp))
+        per_session_shared_ms = _ms(started) / args.sessions
+
+    print(f"import: {import_ms:.1f} ms  build_agent: {build_ms:.1f} ms")
+    print(f"time-to-ready (build + warm): {ready_ms:.1f} ms")
+    print("  warm: " + "  ".join(f"{name} {ms:.1f} ms" for name, ms in timings.items()))
+    print(f"first request inputs: cold {cold_request_ms:.2f} ms  warmed {warm_request_ms:.2f} ms")
+    print(
+        f"per session ({args.sessions}): build_agent {per_session_built_ms:.3f} ms  "
+        f"shared {per_session_shared_ms:.3f} ms"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -7,15 +7,17 @@ import chainlit as cl
 import chainlit.data as cl_data
 from chainlit.types import ThreadDict
 
-from agent_workspace.memory import SessionMemory, StepType, StepCategory
-from agent_workspace.memory.chainlit_data_layer import FileDataLayer
+from agent_workspace.memory import SessionMemory, StepType, StepCategory, get_chainlit_data_layer
+from agent_workspace.workflow_agent import telemetry
+from agent_workspace.workflow_agent._env import env_bool, env_float
 from agent_workspace.workflow_agent.agent import WorkflowAgent
+from agent_workspace.workflow_agent.sub_agents.executor import continuation_plan_json
 from agent_workspace.workflow_agent.types import ExecutionResult
-from agent_workspace.main import build_agent, load_env
+from agent_workspace.main import get_shared_agent, load_env
 
-# Initialize the custom data layer for chat history
-cl_data._data_layer = FileDataLayer()
 load_env()
+# Initialize the custom data layer for chat history (memory_backend selects YAML or SQLite)
+cl_data._data_layer = get_chainlit_data_layer()
 if "CHAINLIT_AUTH_SECRET" not in os.environ:
     os.environ["CHAINLIT_AUTH_SECRET"] = secrets.token_urlsafe(32)
 
@@ -31,6 +33,13 @@ def auth_callback(username: str, password: str):
     return None
 
 
+async def _open_memory(thread_id: str) -> SessionMemory:
+    """Session memory for a thread, loaded off the event loop."""
+    memory = SessionMemory(session_id=thread_id, write_behind=env_bool("memory_write_behind", default=True))
+    await asyncio.to_thread(memory.preload)
+    return memory
+
+
 async def _ensure_thread_user(thread_id: str) -> None:
     user = cl.user_session.get("user")
     user_id = getattr(user, "id", None) if user else None
@@ -38,14 +47,19 @@ async def _ensure_thread_user(thread_id: str) -> None:
         await cl_data._data_layer.update_thread(thread_id, user_id=user_id)
 
 
+@cl.on_app_startup
+async def on_app_startup():
+    # Build and warm the agent shared by all sessions before the first chat
+    await asyncio.to_thread(get_shared_agent)
+
+
 @cl.on_chat_start
 async def on_chat_start():
-    load_env()
-    agent = build_agent()
+    agent = get_shared_agent()
 
     # Get thread_id from Chainlit context for session memory
     thread_id = cl.context.session.thread_id
-    memory = SessionMemory(session_id=thread_id)
+    memory = await _open_memory(thread_id)
 
     cl.user_session.set("agent", agent)
     cl.user_session.set("memory", memory)
@@ -56,12 +70,11 @@ async def on_chat_start():
 @cl.on_chat_resume
 async def on_chat_resume(thread: ThreadDict):
     """Resume a previous conversation from chat history."""
-    load_env()
-    agent = build_agent()
+    agent = get_shared_agent()
 
     # Load memory for the resumed thread
     thread_id = thread["id"]
-    memory = SessionMemory(session_id=thread_id)
+    memory = await _open_memory(thread_id)
 
     cl.user_session.set("agent", agent)
     cl.user_session.set("memory", memory)
@@ -76,32 +89,98 @@ async def on_chat_resume(thread: ThreadDict):
         ).send()
 
 
-def _enrich_history_with_facts(conversation_history: str, workflow_state: dict | None) -> str:
-    if not workflow_state:
-        return conversation_history
-    collected_facts = workflow_state.get("collected_facts") or {}
-    if not collected_facts:
-        return conversation_history
-    lines = ["## Collected Facts from Previous Steps"]
-    for key, value in collected_facts.items():
-        lines.append(f"- {key}: {value}")
-    lines.append("")
-    if conversation_history:
-        lines.append(conversation_history)
-    return "\n".join(lines).strip()
+async def _speculative_codegen(
+    agent: WorkflowAgent,
+    *,
+    user_message: str,
+    plan_json: str,
+    skill_md: str,
+    conversation_history: str,
+) -> str:
+    """Generate first-attempt code for a proposed plan (and optionally dry-run it)."""
+    code = await agent.codegen_async(
+        user_message=user_message,
+        plan_json=plan_json,
+        skill_md=skill_md,
+        conversation_history=conversation_history,
+        attempt=1,
+    )
+    if agent.enable_speculative_dry_run:
+        problems = await asyncio.to_thread(agent.validate_code, code)
+        if problems:
+            raise ValueError("dry-run validation failed: " + "; ".join(problems))
+    return code
+
+
+def _stream_code_to(step: cl.Step):
+    """Build an on_partial callback that renders streamed code into a step."""
+
+    async def on_partial(code: str) -> None:
+        await step.stream_token("```python\n" + code + "\n```", is_sequence=True)
+
+    return on_partial
+
+
+def _stream_text_to(message: cl.Message):
+    """Build an on_partial callback that streams response text into a message."""
+
+    async def on_partial(text: str) -> None:
+        if text.startswith(message.content):
+            await message.stream_token(text[len(message.content) :])
+        else:
+            await message.stream_token(text, is_sequence=True)
+
+    return on_partial
+
+
+def _start_speculative_codegen(agent: WorkflowAgent, **kwargs) -> asyncio.Task | None:
+    """Start codegen in the background while the user reviews the plan."""
+    if not agent.enable_speculative_codegen:
+        return None
+    return asyncio.create_task(_speculative_codegen(agent, **kwargs))
+
+
+def _cancel_speculation(task: asyncio.Task | None) -> None:
+    if task is None:
+        return
+    if not task.done():
+        task.cancel()
+    elif not task.cancelled():
+        task.exception()  # Mark a failed speculation as retrieved
+
+
+def _max_history_messages() -> int:
+    try:
+        return int(os.getenv("agent_memory_max_messages", "10") or "10")
+    except Exception:
+        return 10
 
 
 @cl.on_message
 async def on_message(message: cl.Message):
+    memory: SessionMemory = cl.user_session.get("memory")
+    # Back-pressure: let a backlogged write-behind writer catch up first
+    await memory.wait_for_writer()
+    # Commit the turn's memory writes at once (and before waiting on the user)
+    with memory.batch():
+        await _process_message(message)
+        keep_messages = int(env_float("memory_keep_messages", default=40))
+        if keep_messages > 0:
+            # Fold old turns into the running summary once the thread outgrows the window
+            memory.compact(
+                keep_messages=max(keep_messages, _max_history_messages()),
+                keep_steps=max(1, int(env_float("memory_keep_steps", default=40))),
+            )
+
+
+async def _process_message(message: cl.Message):
     agent: WorkflowAgent = cl.user_session.get("agent")
     memory: SessionMemory = cl.user_session.get("memory")
     user_input = message.content
+    # Key LLM call metrics for this message (and its background tasks) by session
+    telemetry.set_session(memory.session_id)
 
-    try:
-        max_history_messages = int(os.getenv("agent_memory_max_messages", "10") or "10")
-    except Exception:
-        max_history_messages = 10
-    conversation_history = memory.get_conversation_history(max_messages=max_history_messages)
+    conversation_history = memory.get_conversation_history(max_messages=_max_history_messages())
 
     # Store user message in memory (single write path - no duplication)
     memory.add_response("user", user_input)
@@ -119,10 +198,11 @@ async def on_message(message: cl.Message):
         return
 
     # 1. Planning phase with HITL gate
+    speculative: asyncio.Task | None = None
     while True:
         async with cl.Step(name="Plan") as step:
-            plan, plan_json, skill = await asyncio.to_thread(
-                agent.plan, user_message=user_input, conversation_history=conversation_history
+            plan, plan_json, skill = await agent.plan_async(
+                user_message=user_input, conversation_history=conversation_history
             )
             step.output = "```json\n" + plan_json.strip() + "\n```"
 
@@ -135,14 +215,30 @@ async def on_message(message: cl.Message):
         )
 
         if plan.action == "chat":
+            answer = cl.Message(content="")
             async with cl.Step(name="Respond") as step:
-                final = await asyncio.to_thread(agent.chat, user_message=user_input, conversation_history=conversation_history)
+                final = await agent.chat_async(
+                    user_message=user_input,
+                    conversation_history=conversation_history,
+                    on_partial=_stream_text_to(answer),
+                )
                 step.output = final
-            # Store assistant response in memory (single write)
+            # Store assistant response in memory (single write, once streaming is done)
             memory.add_response("assistant", final)
-            await cl.Message(content=final).send()
+            answer.content = final
+            await answer.send()
             return
 
+        # Start codegen for the proposed plan while the user decides
+        skill_md = await asyncio.to_thread(agent.get_skill_md, plan=plan, selected_skill=skill)
+        speculative = _start_speculative_codegen(
+            agent,
+            user_message=user_input,
+            plan_json=plan_json,
+            skill_md=skill_md,
+            conversation_history=conversation_history,
+        )
+
         # Human-in-the-loop: Approve Plan
         actions = [
             cl.Action(name="approve", payload={"value": "approve"}, label="Approve Plan"),
@@ -150,12 +246,17 @@ async def on_message(message: cl.Message):
             cl.Action(name="cancel", payload={"value": "cancel"}, label="Cancel Request"),
         ]
 
-        res = await cl.AskActionMessage(
-            content=f"Proposed Plan: **{plan.intent}**\n\nDo you want me to proceed with code generation and execution?",
-            actions=actions,
-            timeout=3600,
-            raise_on_timeout=False,
-        ).send()
+        memory.flush()  # Persist the turn so far before waiting on the user
+        try:
+            res = await cl.AskActionMessage(
+                content=f"Proposed Plan: **{plan.intent}**\n\nDo you want me to proceed with code generation and execution?",
+                actions=actions,
+                timeout=3600,
+                raise_on_timeout=False,
+            ).send()
+        except BaseException:
+            _cancel_speculation(speculative)
+            raise
 
         choice = None
         if isinstance(res, dict):
@@ -165,7 +266,10 @@ async def on_message(message: cl.Message):
 
         if choice == "approve":
             break
-        elif choice == "replan":
+
+        _cancel_speculation(speculative)
+        speculative = None
+        if choice == "replan":
             feedback = await cl.AskUserMessage(content="What should I change in the plan?").send()
             if feedback:
                 user_input += f"\n\n[User feedback on previous plan]: {feedback['output']}"
@@ -178,8 +282,6 @@ async def on_message(message: cl.Message):
             return
 
     # 2. Execution phase (Codegen + Run) with multi-turn support
-    skill_md = await asyncio.to_thread(agent.get_skill_md, plan=plan, selected_skill=skill)
-
     last_code = ""
     last_error = ""
     exec_result = ExecutionResult(stdout="", stderr="", exit_code=1)
@@ -191,16 +293,20 @@ async def on_message(message: cl.Message):
         attempts_used = attempt
         async with cl.Step(name=f"Codegen (attempt {attempt})") as step:
             try:
-                code = await asyncio.to_thread(
-                    agent.codegen,
-                    user_message=user_input,
-                    plan_json=plan_json,
-                    skill_md=skill_md,
-                    conversation_history=conversation_history,
-                    attempt=attempt,
-                    previous_error=last_error,
-                    previous_code=last_code,
-                )
+                if attempt == 1 and speculative is not None:
+                    # Usually already finished while the plan was awaiting approval
+                    code = await speculative
+                else:
+                    code = await agent.codegen_async(
+                        user_message=user_input,
+                        plan_json=plan_json,
+                        skill_md=skill_md,
+                        conversation_history=conversation_history,
+                        attempt=attempt,
+                        previous_error=last_error,
+                        previous_code=last_code,
+                        on_partial=_stream_code_to(step),
+                    )
                 last_code = code
                 step.output = "```python\n" + code.strip() + "\n```"
             except Exception as e:
@@ -218,7 +324,7 @@ async def on_message(message: cl.Message):
         )
 
         async with cl.Step(name=f"Execute (attempt {attempt})") as step:
-            exec_result = await asyncio.to_thread(agent.execute, code=last_code)
+            exec_result = await agent.execute_async(code=last_code)
             output = []
             if exec_result.stdout:
                 output.append("**Stdout**\n```text\n" + exec_result.stdout.strip() + "\n```")
@@ -251,6 +357,7 @@ async def on_message(message: cl.Message):
                 session_id=memory.session_id,
                 plan_json=plan_json,
                 collected_facts=collected_facts,
+                current_step=1,
             )
             memory.save_workflow_state(workflow_state)
 
@@ -275,22 +382,24 @@ async def on_message(message: cl.Message):
             )
             return
 
+    answer = cl.Message(content="")
     async with cl.Step(name="Respond") as step:
-        final = await asyncio.to_thread(
-            agent.respond,
+        final = await agent.respond_async(
             user_message=user_input,
             plan_json=plan_json,
             executed_code=last_code,
             exec_result=exec_result,
             attempts=attempts_used,
             conversation_history=conversation_history,
+            on_partial=_stream_text_to(answer),
         )
         step.output = final
 
     # Store assistant response in memory (single write - cl.Message for UI only)
     memory.add_response("assistant", final)
 
-    await cl.Message(content=final).send()
+    answer.content = final
+    await answer.send()
 
 
 async def _handle_continuation(
@@ -334,7 +443,9 @@ async def _handle_continuation(
         selected_skill=selected_skill,
     )
 
-    enriched_history = _enrich_history_with_facts(conversation_history, workflow_state)
+    # Only the steps after the last completed checkpoint are generated and run, with the
+    # collected facts as the plan's typed collected_facts
+    continuation_plan = continuation_plan_json(plan_json, workflow_state)
 
     # Execute the workflow with continuation support
     last_code = ""
@@ -345,15 +456,15 @@ async def _handle_continuation(
         attempts_used = attempt
         async with cl.Step(name=f"Continue (attempt {attempt})") as step:
             try:
-                code = await asyncio.to_thread(
-                    agent.codegen,
+                code = await agent.codegen_async(
                     user_message=user_input,
-                    plan_json=plan_json,
+                    plan_json=continuation_plan,
                     skill_md=skill_md,
-                    conversation_history=enriched_history,
+                    conversation_history=conversation_history,
                     attempt=attempt,
                     previous_error="",
                     previous_code=last_code,
+                    on_partial=_stream_code_to(step),
                 )
                 last_code = code
                 step.output = "```python\n" + code.strip() + "\n```"
@@ -371,7 +482,7 @@ async def _handle_continuation(
         )
 
         async with cl.Step(name=f"Execute (attempt {attempt})") as step:
-            exec_result = await asyncio.to_thread(agent.execute, code=last_code)
+            exec_result = await agent.execute_async(code=last_code)
             output = []
             if exec_result.stdout:
                 output.append("**Stdout**\n```text\n" + exec_result.stdout.strip() + "\n```")
@@ -425,17 +536,19 @@ async def _handle_continuation(
     # Final response - clear workflow state
     memory.clear_workflow_state()
 
+    answer = cl.Message(content="")
     async with cl.Step(name="Respond") as step:
-        final = await asyncio.to_thread(
-            agent.respond,
+        final = await agent.respond_async(
             user_message=user_input,
             plan_json=plan_json,
             executed_code=last_code,
             exec_result=exec_result,
             attempts=attempts_used,
-            conversation_history=enriched_history,
+            conversation_history=conversation_history,
+            on_partial=_stream_text_to(answer),
         )
         step.output = final
 
     memory.add_response("assistant", final)
-    await cl.Message(content=final).send()
+    answer.content = final
+    await answer.send()
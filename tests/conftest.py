@@ -1,2 +1,120 @@
+import asyncio
+from collections.abc import Callable
+from typing import Any
+
+import pytest
+
+
 def pytest_configure(config):
     config.addinivalue_line("markers", "integration: requires external services (skipped by default)")
+
+
+class FakeStream:
+    """Stands in for a BAML stream: yields the partials, then returns the final response."""
+
+    def __init__(self, partials: list[Any], final: Any, *, delay: float = 0.0):
+        self._partials = partials
+        self._final = final
+        self._delay = delay
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for partial in self._partials:
+            if self._delay:
+                await asyncio.sleep(self._delay)
+            yield partial
+
+    async def get_final_response(self):
+        return self._final
+
+
+class FakeBamlClient:
+    """Stands in for the generated BAML client ``b``.
+
+    ``functions`` maps BAML function names to handlers called as
+    ``handler(client, **inputs)``; async handlers make awaitable functions, as
+    on the async client. ``streams`` handlers serve ``b.stream.<name>`` and
+    return ``(partials, final)``. Clients returned by ``with_options`` carry
+    their ``options`` and share ``calls`` (per function, ``<name>:stream``
+    for streams) and ``options_log`` with the client they came from.
+    """
+
+    def __init__(
+        self,
+        functions: dict[str, Callable[..., Any]] | None = None,
+        streams: dict[str, Callable[..., tuple[list[Any], Any]]] | None = None,
+        *,
+        stream_delay: float = 0.0,
+        options: dict[str, Any] | None = None,
+        calls: dict[str, int] | None = None,
+        options_log: list[dict[str, Any]] | None = None,
+    ):
+        self._functions = functions or {}
+        self._streams = streams or {}
+        self._stream_delay = stream_delay
+        self.options = options or {}
+        self.calls = calls if calls is not None else {}
+        self.options_log = options_log if options_log is not None else []
+        self.stream = _FakeStreamClient(self)
+
+    def with_options(self, **options):
+        self.options_log.append(options)
+        return FakeBamlClient(
+            self._functions,
+            self._streams,
+            stream_delay=self._stream_delay,
+            options=options,
+            calls=self.calls,
+            options_log=self.options_log,
+        )
+
+    def _count(self, name: str) -> None:
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def __getattr__(self, name: str):
+        functions = self.__dict__.get("_functions", {})
+        if name not in functions:
+            raise AttributeError(name)
+
+        def call(**inputs):
+            self._count(name)
+            return functions[name](self, **inputs)
+
+        return call
+
+
+class _FakeStreamClient:
+    def __init__(self, client: FakeBamlClient):
+        self._client = client
+
+    def __getattr__(self, name: str):
+        client = self.__dict__["_client"]
+        if name not in client._streams:
+            raise AttributeError(name)
+
+        def call(**inputs):
+            client._count(f"{name}:stream")
+            partials, final = client._streams[name](client, **inputs)
+            return FakeStream(partials, final, delay=client._stream_delay)
+
+        return call
+
+
+@pytest.fixture
+def fake_baml(monkeypatch):
+    """Install a FakeBamlClient as both the sync and the async BAML client.
+
+    Call it with the FakeBamlClient arguments; returns the installed client.
+    """
+    import baml_client.async_client
+    import baml_client.sync_client
+
+    def install(functions=None, streams=None, **kwargs) -> FakeBamlClient:
+        fake = FakeBamlClient(functions, streams, **kwargs)
+        monkeypatch.setattr(baml_client.sync_client, "b", fake)
+        monkeypatch.setattr(baml_client.async_client, "b", fake)
+        return fake
+
+    return install
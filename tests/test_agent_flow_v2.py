@@ -173,3 +173,288 @@ def test_agent_v2_passes_conversation_history(monkeypatch):
     assert seen["codegen"] == history
     assert seen["respond"] == history
     assert seen["chat"] == history
+
+
+def test_agent_v2_validate_code_dry_run():
+    agent = WorkflowAgent()
+
+    assert agent.validate_code("import json\nimport mcp_tools.slack as slack\nprint(json.dumps({}))\n") == []
+
+    problems = agent.validate_code("import sys\nimport requests\nname = input('who?')\nprint(sys.argv)\n")
+    assert any("requests" in p for p in problems)
+    assert any("input()" in p for p in problems)
+    assert any("sys.argv" in p for p in problems)
+
+    assert agent.validate_code("print('unterminated")[0].startswith("SyntaxError")
+
+
+def test_agent_v2_async_bridge_serves_concurrent_runs_on_one_loop(monkeypatch):
+    import asyncio
+
+    in_flight = {"now": 0, "max": 0}
+
+    async def _llm_call(result):
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0.05)
+        in_flight["now"] -= 1
+        return result
+
+    async def fake_workflow_plan_async(**kwargs) -> dict:
+        return await _llm_call(
+            {"action": "custom_script", "skill_group": "HR-scopes", "skill_name": None, "intent": "do", "steps": ["x"]}
+        )
+
+    async def fake_workflow_codegen_async(**kwargs) -> str:
+        return await _llm_call("```python\nprint('ok')\n```")
+
+    async def fake_workflow_respond_async(**kwargs) -> str:
+        return await _llm_call(f"done: {kwargs['exec_stdout'].strip()}")
+
+    monkeypatch.setattr(agent_module, "workflow_plan_async", fake_workflow_plan_async)
+    monkeypatch.setattr(agent_module, "workflow_codegen_async", fake_workflow_codegen_async)
+    monkeypatch.setattr(agent_module, "workflow_respond_async", fake_workflow_respond_async)
+
+    agent = WorkflowAgent()
+
+    async def _main():
+        return await asyncio.gather(*(agent.run(user_message=f"request {i}") for i in range(4)))
+
+    results = asyncio.run(_main())
+    assert [r.final_response for r in results] == ["done: ok"] * 4
+    assert in_flight["max"] == 4
+
+
+def test_resolve_async_bridge_honours_sync_overrides(monkeypatch):
+    import asyncio
+
+    from agent_workspace.workflow_agent import baml_bridge
+
+    assert agent_module.resolve_async_bridge("workflow_chat") is baml_bridge.workflow_chat_async
+
+    def fake_workflow_chat(*, user_message: str, skills_readme: str, custom_skill_md: str, conversation_history: str) -> str:
+        return f"sync: {user_message}"
+
+    monkeypatch.setattr(agent_module, "workflow_chat", fake_workflow_chat)
+    call = agent_module.resolve_async_bridge("workflow_chat")
+    result = asyncio.run(call(user_message="hi", skills_readme="", custom_skill_md="", conversation_history=""))
+    assert result == "sync: hi"
+
+
+def test_agent_v2_streaming_codegen_aborts_prose_and_retries(monkeypatch):
+    import asyncio
+
+    seen_errors: list[str] = []
+
+    async def fake_workflow_plan_async(**kwargs) -> dict:
+        return {"action": "custom_script", "skill_group": "HR-scopes", "skill_name": None, "intent": "do", "steps": ["x"]}
+
+    async def fake_workflow_codegen_stream(**kwargs):
+        seen_errors.append(kwargs["previous_error"])
+        if kwargs["attempt"] == 1:
+            yield "I cannot write a script for this\n"
+            yield "I cannot write a script for this\nbecause the request is unclear\nso please rephrase it\n"
+            return
+        yield "```python\nprint('o"
+        yield "```python\nprint('ok')\n```"
+
+    async def fake_workflow_respond_async(**kwargs) -> str:
+        return f"done: {kwargs['exec_stdout'].strip()}"
+
+    monkeypatch.setattr(agent_module, "workflow_plan_async", fake_workflow_plan_async)
+    monkeypatch.setattr(agent_module, "workflow_codegen_stream", fake_workflow_codegen_stream)
+    monkeypatch.setattr(agent_module, "workflow_respond_async", fake_workflow_respond_async)
+
+    result = asyncio.run(WorkflowAgent().run(user_message="do it"))
+
+    assert result.final_response == "done: ok"
+    assert result.attempts == 2
+    assert seen_errors[0] == ""
+    assert "prose" in seen_errors[1]
+
+
+def test_agent_v2_streaming_codegen_reports_partials_and_catches_input(monkeypatch):
+    import asyncio
+
+    import pytest
+
+    from agent_workspace.workflow_agent.sub_agents.executor import CodegenAborted
+
+    responses = [
+        "```python\nimport json\n",
+        "```python\nimport json\nprint(json.dumps({}))\n",
+        "```python\nimport json\nprint(json.dumps({}))\n```",
+    ]
+
+    async def fake_workflow_codegen_stream(**kwargs):
+        for text in responses:
+            yield text
+
+    monkeypatch.setattr(agent_module, "workflow_codegen_stream", fake_workflow_codegen_stream)
+    agent = WorkflowAgent()
+    partials: list[str] = []
+
+    async def on_partial(code: str) -> None:
+        partials.append(code)
+
+    code = asyncio.run(agent.codegen_async(user_message="x", plan_json="{}", skill_md="", on_partial=on_partial))
+    assert code == "import json\nprint(json.dumps({}))"
+    assert partials[0] == "import json\n"
+    assert partials[-1] == code
+
+    responses[:] = ["```python\nname = input('who?')\nprint(name)\n", "```python\nunreachable\n```"]
+    with pytest.raises(CodegenAborted, match="input"):
+        asyncio.run(agent.codegen_async(user_message="x", plan_json="{}", skill_md=""))
+
+
+def test_streaming_codegen_accepts_a_prose_preamble_before_the_fence(monkeypatch):
+    import asyncio
+
+    from agent_workspace.workflow_agent.sub_agents.executor import IncrementalCodeValidator
+
+    response = (
+        "Here is the script for the request.\n"
+        "It lists the new hires in Engineering\n"
+        "and prints a short summary at the end.\n\n"
+        '```python\nimport json\nDOC = """\nNew hires\n"""\nprint(json.dumps({"doc": DOC}))\n```'
+    )
+    chunks = [response[:end] for end in range(20, len(response), 20)] + [response]
+
+    async def fake_workflow_codegen_stream(**kwargs):
+        for text in chunks:
+            yield text
+
+    monkeypatch.setattr(agent_module, "workflow_codegen_stream", fake_workflow_codegen_stream)
+    partials: list[str] = []
+
+    async def on_partial(code: str) -> None:
+        partials.append(code)
+
+    code = asyncio.run(WorkflowAgent().codegen_async(user_message="x", plan_json="{}", skill_md="", on_partial=on_partial))
+    assert code.startswith("import json\nDOC = ") and code.endswith('print(json.dumps({"doc": DOC}))')
+    assert "" in partials and not any("Engineering" in partial for partial in partials)  # Preamble held back
+
+    # An unfenced script opening a multi-line string is code, not prose
+    validator = IncrementalCodeValidator()
+    script = 'x = """\nsome text here\n"""\nprint(x)\n'
+    assert validator.feed(script) == script
+    validator.finish(script)
+
+
+def test_agent_v2_streams_respond_and_chat_to_on_partial(monkeypatch):
+    import asyncio
+
+    async def fake_workflow_respond_stream(**kwargs):
+        for text in ["Done", "Done: 3 hires", "Done: 3 hires onboarded."]:
+            yield text
+
+    def fake_workflow_chat(*, user_message: str, skills_readme: str, custom_skill_md: str, conversation_history: str) -> str:
+        return "Hello!"
+
+    monkeypatch.setattr(agent_module, "workflow_respond_stream", fake_workflow_respond_stream)
+    monkeypatch.setattr(agent_module, "workflow_chat", fake_workflow_chat)
+    agent = WorkflowAgent()
+    partials: list[str] = []
+
+    async def on_partial(text: str) -> None:
+        partials.append(text)
+
+    final = asyncio.run(
+        agent.respond_async(
+            user_message="x",
+            plan_json="{}",
+            executed_code="",
+            exec_result=ExecutionResult(stdout="", stderr="", exit_code=0),
+            attempts=1,
+            on_partial=on_partial,
+        )
+    )
+    assert final == "Done: 3 hires onboarded."
+    assert partials == ["Done", "Done: 3 hires", "Done: 3 hires onboarded."]
+
+    # A sync override still serves the streaming path as a single chunk
+    partials.clear()
+    assert asyncio.run(agent.chat_async(user_message="hi", on_partial=on_partial)) == "Hello!"
+    assert partials == ["Hello!"]
+
+
+def test_agent_v2_clean_summary_skips_respond_llm(monkeypatch):
+    import asyncio
+
+    def fail_workflow_respond(**kwargs) -> str:
+        raise AssertionError("clean runs must not call WorkflowRespond")
+
+    monkeypatch.setattr(agent_module, "workflow_respond", fail_workflow_respond)
+    agent = WorkflowAgent()
+    stdout = "[INFO] Fetching hires\n=== FINAL SUMMARY ===\n[INFO] Hires onboarded: 3\n- Tickets: IT-1, IT-2\n"
+    partials: list[str] = []
+
+    async def on_partial(text: str) -> None:
+        partials.append(text)
+
+    final = asyncio.run(
+        agent.respond_async(
+            user_message="x",
+            plan_json="{}",
+            executed_code="",
+            exec_result=ExecutionResult(stdout=stdout, stderr="", exit_code=0),
+            attempts=1,
+            on_partial=on_partial,
+        )
+    )
+    assert final == "Done. Summary:\n\n- Hires onboarded: 3\n- Tickets: IT-1, IT-2"
+    assert partials == [final]
+
+
+def test_agent_v2_respond_falls_back_to_llm_when_summary_unusable(monkeypatch):
+    calls: list[dict] = []
+
+    def fake_workflow_respond(**kwargs) -> str:
+        calls.append(kwargs)
+        return "llm"
+
+    monkeypatch.setattr(agent_module, "workflow_respond", fake_workflow_respond)
+    agent = WorkflowAgent()
+    summary = "=== FINAL SUMMARY ===\nHires onboarded: 3\n"
+    for exec_result in [
+        ExecutionResult(stdout="Hires onboarded: 3\n", stderr="", exit_code=0),
+        ExecutionResult(stdout=summary, stderr="", exit_code=1),
+        ExecutionResult(stdout=summary, stderr="Traceback (most recent call last):", exit_code=0),
+        ExecutionResult(stdout="=== FINAL SUMMARY ===\n[ERROR] no hires found\n", stderr="", exit_code=0),
+        ExecutionResult(stdout="=== FINAL SUMMARY ===\n\n", stderr="", exit_code=0),
+    ]:
+        assert agent.respond("x", "{}", "", exec_result, attempts=1) == "llm"
+    assert len(calls) == 5
+
+    monkeypatch.setenv("enable_template_response", "false")
+    agent = WorkflowAgent()
+    assert agent.respond("x", "{}", "", ExecutionResult(stdout=summary, stderr="", exit_code=0), attempts=1) == "llm"
+
+
+def test_shared_agent_is_built_and_warmed_once(monkeypatch):
+    from agent_workspace import main
+
+    built: list[WorkflowAgent] = []
+    timings: list[dict] = []
+
+    def fake_build_agent() -> WorkflowAgent:
+        agent = WorkflowAgent()
+        built.append(agent)
+        return agent
+
+    original_warm = WorkflowAgent.warm
+    monkeypatch.setattr(WorkflowAgent, "warm", lambda self: timings.append(original_warm(self)))
+    monkeypatch.setattr(main, "build_agent", fake_build_agent)
+    monkeypatch.setattr(main, "_shared_agent", None)
+
+    agent = main.get_shared_agent()
+    assert main.get_shared_agent() is agent
+    assert built == [agent]
+    assert set(timings[0]) == {"skills", "tool_contracts", "executor", "baml_runtime"}
+
+    # Warmed lookups are served from memory
+    assert agent.skills._index is not None
+    executor = agent._workflow_executor
+    docs_dir = executor._docs_registry_for_plan(plan_json='{"skill_group": "HR-scopes"}').docs_dir
+    executor._contracts[docs_dir] = "cached contracts"
+    assert executor.tool_contracts('{"skill_group": "HR-scopes"}') == "cached contracts"
@@ -0,0 +1,128 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from agent_workspace import main as agent_main
+from agent_workspace.workflow_agent import agent as agent_module
+from agent_workspace.workflow_agent import batch
+from agent_workspace.workflow_agent.agent import WorkflowAgent
+from agent_workspace.workflow_agent.batch import BatchRequest
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    in_flight = {"now": 0, "max": 0}
+
+    async def _llm_call(result, delay=0.02):
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(delay)
+        in_flight["now"] -= 1
+        return result
+
+    async def fake_workflow_plan_async(*, user_message: str, **kwargs) -> dict:
+        if user_message == "boom":
+            raise RuntimeError("provider down")
+        action = "chat" if user_message == "hi" else "custom_script"
+        return await _llm_call(
+            {"action": action, "skill_group": "HR-scopes", "skill_name": None, "intent": user_message, "steps": ["x"]}
+        )
+
+    async def fake_workflow_codegen_async(**kwargs) -> str:
+        return await _llm_call("```python\nprint('ok')\n```")
+
+    async def fake_workflow_respond_async(**kwargs) -> str:
+        return await _llm_call("done")
+
+    async def fake_workflow_chat_async(**kwargs) -> str:
+        return await _llm_call("hello")
+
+    monkeypatch.setattr(agent_module, "workflow_plan_async", fake_workflow_plan_async)
+    monkeypatch.setattr(agent_module, "workflow_codegen_async", fake_workflow_codegen_async)
+    monkeypatch.setattr(agent_module, "workflow_respond_async", fake_workflow_respond_async)
+    monkeypatch.setattr(agent_module, "workflow_chat_async", fake_workflow_chat_async)
+    monkeypatch.setenv("enable_streaming_codegen", "false")
+    return in_flight
+
+
+def test_run_reports_time_per_phase(fake_llm):
+    result = asyncio.run(WorkflowAgent().run(user_message="run it"))
+    assert set(result.phase_ms) == {"plan", "codegen", "execute", "respond"}
+    assert all(ms > 0 for ms in result.phase_ms.values())
+
+    chat = asyncio.run(WorkflowAgent().run(user_message="hi"))
+    assert set(chat.phase_ms) == {"plan", "chat"}
+
+
+def test_run_many_bounds_concurrency_and_reports_failures(fake_llm):
+    pulled: list[str] = []
+
+    def requests():
+        for i in range(6):
+            pulled.append(str(i))
+            yield BatchRequest(id=str(i), user_message="boom" if i == 3 else f"request {i}")
+
+    async def _main():
+        return [r async for r in WorkflowAgent().run_many(requests(), concurrency=2)]
+
+    results = asyncio.run(_main())
+
+    assert sorted(r.id for r in results) == [str(i) for i in range(6)]
+    assert fake_llm["max"] <= 2
+    failed = [r for r in results if r.status == "error"]
+    assert [r.id for r in failed] == ["3"]
+    assert "provider down" in failed[0].error
+    ok = [r for r in results if r.status == "ok"]
+    assert all(r.final_response == "done" and r.phase_ms["codegen"] > 0 for r in ok)
+
+    report = batch.batch_report(results)
+    assert list(report) == ["plan", "codegen", "execute", "respond", "total"]
+    assert report["total"]["count"] == 6
+    assert report["codegen"]["count"] == 5
+    assert report["total"]["p50"] <= report["total"]["p95"] <= report["total"]["p99"]
+
+
+def test_batch_cli_streams_jsonl_results(fake_llm, monkeypatch, tmp_path: Path, capsys):
+    requests_path = tmp_path / "requests.jsonl"
+    requests_path.write_text(
+        "\n".join(
+            [
+                json.dumps({"id": "a", "message": "run it"}),
+                "",
+                json.dumps({"user_message": "hi", "conversation_history": "user: earlier"}),
+            ]
+        ),
+        encoding="utf-8",
+    )
+    out_path = tmp_path / "out" / "results.jsonl"
+    monkeypatch.setattr(agent_main, "build_agent", WorkflowAgent)
+
+    assert batch.main([str(requests_path), "--out", str(out_path), "--concurrency", "2"]) == 0
+
+    rows = [json.loads(line) for line in out_path.read_text(encoding="utf-8").splitlines()]
+    assert sorted((r["id"], r["final_response"]) for r in rows) == [("3", "hello"), ("a", "done")]
+    report = capsys.readouterr().out
+    assert "requests: 2  errors: 0" in report
+    assert "total" in report
+
+
+def test_invalid_request_lines_become_error_results(fake_llm, tmp_path: Path):
+    path = tmp_path / "requests.jsonl"
+    path.write_text(
+        "\n".join([json.dumps({"id": "x"}), "{not json", "[1, 2]", json.dumps({"id": "ok", "message": "hi"})]) + "\n",
+        encoding="utf-8",
+    )
+    requests = list(batch.read_requests(path))
+    assert [r.id for r in requests] == ["1", "2", "3", "ok"]
+    assert "no message" in requests[0].error and f"{path}:3: expected a JSON object" == requests[2].error
+    assert requests[3].error is None
+
+    async def run_all():
+        return [r async for r in WorkflowAgent().run_many(requests, concurrency=2)]
+
+    results = {r.id: r for r in asyncio.run(run_all())}
+    assert results["ok"].status == "ok"
+    assert [results[i].status for i in ("1", "2", "3")] == ["error"] * 3
+    assert results["2"].error.startswith(f"ValueError: {path}:2: ")
@@ -0,0 +1,110 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import chainlit_app_v2 as app
+from agent_workspace.memory import SessionMemory
+from agent_workspace.workflow_agent.agent import WorkflowAgent
+
+
+class _FakeStep:
+    def __init__(self, name: str):
+        self.name = name
+        self.output = ""
+        self.streamed: list[str] = []
+
+    async def __aenter__(self):
+        _ui.steps.append(self)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def stream_token(self, token: str, is_sequence: bool = False) -> None:
+        self.streamed.append(token)
+
+
+class _FakeMessage:
+    def __init__(self, content: str = "", **kwargs):
+        self.content = content
+
+    async def stream_token(self, token: str, is_sequence: bool = False) -> None:
+        self.content = token if is_sequence else self.content + token
+
+    async def send(self):
+        _ui.sent.append(self.content)
+        return self
+
+
+class _FakeAskAction:
+    def __init__(self, **kwargs):
+        pass
+
+    async def send(self):
+        return {"payload": {"value": "approve"}}
+
+
+_ui = SimpleNamespace(steps=[], sent=[])
+
+
+def _install_fake_chainlit(monkeypatch, session: dict) -> None:
+    _ui.steps.clear()
+    _ui.sent.clear()
+    fake_cl = SimpleNamespace(
+        Step=lambda name, **kwargs: _FakeStep(name),
+        Message=_FakeMessage,
+        Action=lambda **kwargs: kwargs,
+        AskActionMessage=_FakeAskAction,
+        user_session=SimpleNamespace(get=session.get, set=session.__setitem__),
+    )
+    monkeypatch.setattr(app, "cl", fake_cl)
+
+
+def test_on_message_runs_speculative_codegen_and_continuation_against_fake_baml(monkeypatch, tmp_path, fake_baml):
+    monkeypatch.setenv("enable_speculative_codegen", "true")
+    monkeypatch.setenv("enable_template_response", "false")
+    codegen_plans: list[dict] = []
+
+    async def workflow_plan(client, **inputs):
+        return SimpleNamespace(
+            action="custom_script",
+            skill_group=None,
+            skill_name=None,
+            intent="Count the new hires",
+            steps=["count new hires", "report the count"],
+            requires_lookahead=True,
+            checkpoints=["count new hires"],
+        )
+
+    def workflow_codegen(client, **inputs):
+        plan = json.loads(inputs["plan_json"])
+        codegen_plans.append(plan)
+        if "collected_facts" in plan:
+            script = "print('reported', 3)\n"
+        else:
+            script = "print('CONTINUE_FACT: count=3')\nprint('CONTINUE_WORKFLOW: checkpoint_complete')\n"
+        text = "```python\n" + script + "```"
+        return [text[:12], text], text
+
+    fake = fake_baml(
+        {"WorkflowPlan": workflow_plan},
+        {
+            "WorkflowCodegen": workflow_codegen,
+            "WorkflowRespond": lambda client, **inputs: (["Reported", "Reported 3 hires"], "Reported 3 hires."),
+        },
+    )
+    agent = WorkflowAgent()
+    memory = SessionMemory(session_id="t1", memory_dir=tmp_path)
+    _install_fake_chainlit(monkeypatch, {"agent": agent, "memory": memory})
+
+    asyncio.run(app.on_message(SimpleNamespace(content="How many new hires?")))
+
+    # First attempt came from the speculation started during plan approval
+    assert fake.calls["WorkflowCodegen:stream"] == 2
+    assert "collected_facts" not in codegen_plans[0]
+    assert codegen_plans[1]["collected_facts"] == {"count": "3"}
+    continue_step = next(step for step in _ui.steps if step.name == "Continue (attempt 1)")
+    assert continue_step.streamed and continue_step.streamed[-1].startswith("```python\nprint('reported', 3)")
+    assert _ui.sent[-1] == "Reported 3 hires."
+    assert memory.get_workflow_state() is None
+    assert memory.get_messages()[-1].content == "Reported 3 hires."
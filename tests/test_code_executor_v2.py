@@ -23,3 +23,33 @@ print(len(hires))
     normalized = result.stdout.replace("\\", "/")
     assert "agent_workspace/tools/mcp_tools" in normalized
     assert "\n3\n" in result.stdout or result.stdout.strip().endswith("3")
+
+
+def test_code_executor_v2_run_async_kills_the_script_when_cancelled(tmp_path, monkeypatch):
+    import asyncio
+
+    import pytest
+
+    from agent_workspace.workflow_agent import code_executor
+
+    procs = []
+    create_subprocess_exec = asyncio.create_subprocess_exec
+
+    async def tracking_create_subprocess_exec(*args, **kwargs):
+        proc = await create_subprocess_exec(*args, **kwargs)
+        procs.append(proc)
+        return proc
+
+    monkeypatch.setattr(code_executor.asyncio, "create_subprocess_exec", tracking_create_subprocess_exec)
+    executor = PythonCodeExecutor(tmp_path, timeout_seconds=60)
+
+    async def main():
+        task = asyncio.create_task(executor.run_async("import time\ntime.sleep(60)\n"))
+        while not procs:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert procs[0].returncode is not None
@@ -0,0 +1,105 @@
+import asyncio
+
+from agent_workspace.workflow_agent.admission import (
+    AdmissionController,
+    AdmissionLimits,
+    Priority,
+    TokenBucket,
+    priority_for,
+)
+
+
+def test_priority_for_phases():
+    assert priority_for("WorkflowRespond", {}) == Priority.INTERACTIVE
+    assert priority_for("WorkflowPlan", {}) == Priority.INTERACTIVE
+    assert priority_for("WorkflowCodegen", {"attempt": 1}) == Priority.CODEGEN
+    assert priority_for("WorkflowCodegen", {"attempt": 3}) == Priority.BACKGROUND
+
+
+def test_token_bucket_refills_per_minute():
+    now = [0.0]
+    bucket = TokenBucket(60, clock=lambda: now[0])
+
+    bucket.take(60)
+    assert bucket.wait_time(1) == 1.0
+    now[0] = 0.5
+    assert bucket.wait_time(1) == 0.5
+    now[0] = 120.0
+    assert bucket.wait_time(60) == 0.0
+    assert TokenBucket(0).wait_time(10**9) == 0.0
+
+
+def test_admission_caps_concurrent_requests_per_client():
+    controller = AdmissionController(AdmissionLimits(max_concurrent=2))
+    in_flight = {"now": 0, "max": 0}
+
+    async def call(client: str):
+        async with controller.admit(client):
+            in_flight["now"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["now"])
+            await asyncio.sleep(0.02)
+            in_flight["now"] -= 1
+
+    async def _main():
+        await asyncio.gather(*(call("OpenRouterChat") for _ in range(5)))
+        assert in_flight["max"] == 2
+        in_flight["max"] = 0
+        # Each client has its own slots
+        await asyncio.gather(*(call(name) for name in ["a", "a", "b", "b"]))
+        assert in_flight["max"] == 4
+
+    asyncio.run(_main())
+
+
+def test_admission_serves_interactive_before_background_retries():
+    controller = AdmissionController(AdmissionLimits(max_concurrent=1))
+    order: list[str] = []
+
+    async def call(name: str, priority: Priority):
+        async with controller.admit(priority=priority):
+            order.append(name)
+
+    async def _main():
+        async with controller.admit():
+            waiting = [
+                asyncio.create_task(call("codegen retry", Priority.BACKGROUND)),
+                asyncio.create_task(call("codegen", Priority.CODEGEN)),
+                asyncio.create_task(call("respond", Priority.INTERACTIVE)),
+            ]
+            await asyncio.sleep(0.01)
+            assert controller.gate("OpenRouterChat").queued() == 3
+        await asyncio.gather(*waiting)
+
+    asyncio.run(_main())
+    assert order == ["respond", "codegen", "codegen retry"]
+
+
+def test_admission_waits_for_token_budget_and_reports_queue_wait():
+    controller = AdmissionController(AdmissionLimits(max_concurrent=4, tokens_per_minute=600))
+
+    async def _main():
+        async with controller.admit(tokens=600) as first:
+            pass
+        async with controller.admit(tokens=1) as second:
+            pass
+        return first.wait_ms, second.wait_ms
+
+    first_wait, second_wait = asyncio.run(_main())
+    assert first_wait < 50
+    assert second_wait >= 80  # 600 tokens/minute refills one token every 100ms
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    controller = AdmissionController(AdmissionLimits(max_concurrent=1))
+
+    async def _main():
+        async with controller.admit():
+            waiter = asyncio.create_task(controller.admit().__aenter__())
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+        async with controller.admit() as admission:
+            return admission.wait_ms, controller.gate("OpenRouterChat").in_flight
+
+    wait_ms, in_flight = asyncio.run(_main())
+    assert wait_ms < 50
+    assert in_flight == 1
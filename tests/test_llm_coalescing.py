@@ -0,0 +1,123 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from agent_workspace.workflow_agent import baml_bridge
+from agent_workspace.workflow_agent.coalescing import SingleFlight, request_key
+
+
+async def _plan(client, **kwargs):
+    await asyncio.sleep(0.02)
+    return SimpleNamespace(
+        action="CustomScript",
+        skill_group=None,
+        skill_name=None,
+        intent=kwargs["user_message"],
+        steps=["x"],
+        requires_lookahead=False,
+        checkpoints=[],
+    )
+
+
+async def _respond(client, **kwargs):
+    await asyncio.sleep(0.02)
+    return "done"
+
+
+@pytest.fixture
+def fake_client(fake_baml, monkeypatch):
+    monkeypatch.delenv("enable_llm_coalescing", raising=False)
+    return fake_baml(
+        {"WorkflowPlan": _plan, "WorkflowRespond": _respond},
+        {"WorkflowCodegen": lambda client, **kwargs: (["print(", "print(1)"], "print(1)\n")},
+        stream_delay=0.01,
+    )
+
+
+_PLAN_INPUTS = dict(skills_readme="", skill_names=[], skill_groups=[], conversation_history="")
+_RESPOND_INPUTS = dict(
+    user_message="x", plan_json="{}", executed_code="", exec_stdout="", exec_stderr="", exit_code=0, attempts=1
+)
+
+
+def test_identical_concurrent_plans_share_one_request(fake_client):
+    async def _main():
+        return await asyncio.gather(
+            baml_bridge.workflow_plan_async(user_message="onboard", **_PLAN_INPUTS),
+            baml_bridge.workflow_plan_async(user_message="onboard", **_PLAN_INPUTS),
+            baml_bridge.workflow_plan_async(user_message="onboard", **_PLAN_INPUTS),
+            baml_bridge.workflow_plan_async(user_message="other", **_PLAN_INPUTS),
+        )
+
+    plans = asyncio.run(_main())
+    assert [p["intent"] for p in plans] == ["onboard", "onboard", "onboard", "other"]
+    assert fake_client.calls["WorkflowPlan"] == 2
+
+
+def test_respond_is_never_coalesced(fake_client):
+    async def _main():
+        return await asyncio.gather(
+            baml_bridge.workflow_respond_async(conversation_history="", **_RESPOND_INPUTS),
+            baml_bridge.workflow_respond_async(conversation_history="", **_RESPOND_INPUTS),
+        )
+
+    assert asyncio.run(_main()) == ["done", "done"]
+    assert fake_client.calls["WorkflowRespond"] == 2
+
+
+def test_coalescing_can_be_disabled(fake_client, monkeypatch):
+    monkeypatch.setenv("enable_llm_coalescing", "false")
+
+    async def _main():
+        return await asyncio.gather(*(baml_bridge.workflow_plan_async(user_message="a", **_PLAN_INPUTS) for _ in range(2)))
+
+    asyncio.run(_main())
+    assert fake_client.calls["WorkflowPlan"] == 2
+
+
+def test_identical_concurrent_codegen_streams_share_partials(fake_client):
+    inputs = dict(
+        user_message="x",
+        plan_json="{}",
+        skill_md="",
+        tool_contracts="",
+        attempt=1,
+        previous_error="",
+        previous_code="",
+        conversation_history="",
+    )
+
+    async def _consume():
+        return [text async for text in baml_bridge.workflow_codegen_stream(**inputs)]
+
+    async def _main():
+        return await asyncio.gather(_consume(), _consume())
+
+    first, second = asyncio.run(_main())
+    assert first == second == ["print(", "print(1)", "print(1)\n"]
+    assert fake_client.calls["WorkflowCodegen:stream"] == 1
+
+
+def test_singleflight_survives_one_caller_cancelling():
+    flight = SingleFlight()
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "shared"
+
+    async def _main():
+        key = request_key("WorkflowPlan", {"user_message": "x"})
+        leader = asyncio.create_task(flight.do(key, slow))
+        follower = asyncio.create_task(flight.do(key, slow))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        result = await follower
+        return result, leader.cancelled()
+
+    assert asyncio.run(_main()) == ("shared", True)
+    assert len(calls) == 1
+    assert flight.coalesced_calls == 1
+    assert flight.in_flight() == 0
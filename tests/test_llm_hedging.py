@@ -0,0 +1,148 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from agent_workspace.workflow_agent import baml_bridge, hedging
+from agent_workspace.workflow_agent.hedging import MIN_SAMPLES, Hedger
+
+
+@pytest.fixture(autouse=True)
+def hedge_env(monkeypatch):
+    monkeypatch.setenv("enable_llm_hedging", "true")
+    monkeypatch.setenv("llm_hedge_deadline_ms", "20")
+    monkeypatch.delenv("llm_hedge_model", raising=False)
+    monkeypatch.setattr(hedging, "_hedger", Hedger())
+    monkeypatch.setattr(hedging, "_registry", None)
+
+
+async def _after(seconds: float, value, log: list | None = None):
+    try:
+        await asyncio.sleep(seconds)
+    except asyncio.CancelledError:
+        if log is not None:
+            log.append(f"cancelled {value}")
+        raise
+    return value
+
+
+def test_slow_primary_is_hedged_and_hedge_wins():
+    hedger = Hedger()
+    log: list[str] = []
+
+    result = asyncio.run(
+        hedger.call("WorkflowPlan", lambda: _after(1.0, "primary", log), lambda: _after(0.01, "hedge", log))
+    )
+
+    assert result == "hedge"
+    assert log == ["cancelled primary"]
+    stats = hedger.stats("WorkflowPlan")
+    assert (stats.calls, stats.hedged, stats.hedge_wins) == (1, 1, 1)
+    assert stats.hedge_rate == stats.win_rate == 1.0
+
+
+def test_fast_primary_is_not_hedged():
+    hedger = Hedger()
+    hedges = []
+
+    async def hedge():
+        hedges.append(1)
+        return "hedge"
+
+    assert asyncio.run(hedger.call("WorkflowPlan", lambda: _after(0, "primary"), hedge)) == "primary"
+    assert hedges == []
+    assert hedger.stats("WorkflowPlan").hedged == 0
+
+
+def test_failed_hedge_falls_back_to_primary():
+    hedger = Hedger()
+
+    async def failing_hedge():
+        raise RuntimeError("rate limited")
+
+    assert asyncio.run(hedger.call("WorkflowPlan", lambda: _after(0.05, "primary"), failing_hedge)) == "primary"
+    assert hedger.stats("WorkflowPlan").hedge_wins == 0
+
+
+def test_only_primary_latencies_are_observed(monkeypatch):
+    hedger = Hedger()
+    observed: list[float] = []
+    monkeypatch.setattr(hedger.latencies, "observe", lambda key, seconds: observed.append(seconds))
+
+    async def failing_primary():
+        await asyncio.sleep(0.04)
+        raise RuntimeError("provider down")
+
+    # The primary failed and the slow hedge won: no latency of either is a primary latency
+    assert asyncio.run(hedger.call("WorkflowPlan", failing_primary, lambda: _after(0.15, "hedge"))) == "hedge"
+    assert observed == []
+
+    # The primary won after the hedge was fired: its own latency, not the hedge's
+    assert asyncio.run(hedger.call("WorkflowPlan", lambda: _after(0.05, "primary"), lambda: _after(1.0, "hedge"))) == "primary"
+    assert len(observed) == 1 and 0.05 <= observed[0] < 0.5
+
+
+def test_deadline_follows_observed_percentile(monkeypatch):
+    monkeypatch.setenv("llm_hedge_percentile", "90")
+    hedger = Hedger()
+    assert hedger.deadline("WorkflowCodegen") == 0.02  # fallback until enough samples
+    for i in range(MIN_SAMPLES):
+        hedger.latencies.observe("WorkflowCodegen", (i + 1) / 10)
+    assert hedger.deadline("WorkflowCodegen") == pytest.approx(1.8)
+
+    monkeypatch.setenv("llm_hedge_deadline_ms", "0")
+    assert hedger.deadline("WorkflowPlan") is None
+
+
+def test_stream_hedges_on_time_to_first_token():
+    hedger = Hedger()
+    closed: list[str] = []
+
+    async def stream(name: str, first_delay: float):
+        try:
+            await asyncio.sleep(first_delay)
+            yield f"{name} 1"
+            yield f"{name} 2"
+        finally:
+            closed.append(name)
+
+    async def _consume():
+        return [
+            text
+            async for text in hedger.stream("WorkflowCodegen", lambda: stream("primary", 1.0), lambda: stream("hedge", 0.01))
+        ]
+
+    assert asyncio.run(_consume()) == ["hedge 1", "hedge 2"]
+    assert sorted(closed) == ["hedge", "primary"]
+    assert hedger.stats("WorkflowCodegen").hedge_wins == 1
+
+
+def test_bridge_hedges_plan_to_alternate_model(fake_baml, monkeypatch):
+    monkeypatch.setenv("llm_hedge_model", "fast/model")
+    monkeypatch.setenv("enable_llm_coalescing", "false")
+    requests: list[bool] = []
+
+    async def plan(client, **kwargs):
+        hedged = "client_registry" in client.options
+        requests.append(hedged)
+        await asyncio.sleep(0.01 if hedged else 1.0)
+        return SimpleNamespace(
+            action="Chat",
+            skill_group=None,
+            skill_name=None,
+            intent="hedge" if hedged else "primary",
+            steps=[],
+            requires_lookahead=False,
+            checkpoints=[],
+        )
+
+    fake_baml({"WorkflowPlan": plan})
+    plan = asyncio.run(
+        baml_bridge.workflow_plan_async(
+            user_message="x", skills_readme="", skill_names=[], skill_groups=[], conversation_history=""
+        )
+    )
+
+    assert plan["intent"] == "hedge"
+    assert requests == [False, True]
+    assert hedging.hedge_stats()["WorkflowPlan"].hedge_wins == 1
@@ -0,0 +1,108 @@
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+from agent_workspace.workflow_agent import replay
+from agent_workspace.workflow_agent.agent import WorkflowAgent
+from agent_workspace.workflow_agent.replay import Cassette, LLMBackend, ReplayMiss, ReplayTiming
+
+
+class _RecordingClient:
+    """Fake live BAML client used while recording a cassette."""
+
+    def __init__(self):
+        self.calls = 0
+        self.stream = self
+
+    def with_options(self, **options):
+        return self
+
+    async def WorkflowPlan(self, **kwargs):
+        from baml_client import types
+
+        self.calls += 1
+        return types.Plan(
+            action="custom_script", intent="count hires", steps=["count"], requires_lookahead=False, checkpoints=[]
+        )
+
+    def WorkflowCodegen(self, **kwargs):
+        self.calls += 1
+        return _Stream(["```python\nprint('3 hires')\n```"])
+
+    async def WorkflowRespond(self, **kwargs):
+        self.calls += 1
+        return f"There are {kwargs['exec_stdout'].strip()}."
+
+
+class _Stream:
+    def __init__(self, partials):
+        self._partials = partials
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for partial in self._partials:
+            yield partial
+
+    async def get_final_response(self):
+        return self._partials[-1]
+
+
+class _OfflineClient:
+    def with_options(self, **options):
+        raise AssertionError("replay mode must not reach the provider")
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    yield
+    replay.configure_llm_backend(None)
+
+
+def test_agent_run_replays_recorded_responses_offline(monkeypatch, tmp_path: Path, backend):
+    import baml_client.async_client
+
+    cassette_path = tmp_path / "cassette.jsonl"
+    live = _RecordingClient()
+    monkeypatch.setattr(baml_client.async_client, "b", live)
+    replay.configure_llm_backend(LLMBackend("record", cassette=Cassette(cassette_path)))
+    recorded = asyncio.run(WorkflowAgent().run(user_message="How many hires today?"))
+    assert recorded.final_response == "There are 3 hires."
+    assert live.calls == 3
+
+    monkeypatch.setattr(baml_client.async_client, "b", _OfflineClient())
+    replay.configure_llm_backend(
+        LLMBackend("replay", cassette=Cassette(cassette_path), timing=ReplayTiming(latency_ms=30))
+    )
+    started = time.perf_counter()
+    replayed = asyncio.run(WorkflowAgent().run(user_message="How many hires today?"))
+    assert replayed.final_response == recorded.final_response
+    assert replayed.generated_code == recorded.generated_code
+    assert time.perf_counter() - started >= 0.09  # three replayed calls at 30ms each
+
+    with pytest.raises(ReplayMiss):
+        asyncio.run(WorkflowAgent().run(user_message="Something never recorded"))
+
+
+def test_replay_partials_follow_token_rate():
+    backend = LLMBackend("replay", timing=ReplayTiming(latency_ms=10, tokens_per_second=1000))
+    text = "x" * 400  # ~100 tokens -> ~100ms of generation
+
+    async def _consume():
+        return [partial async for partial in backend.replay_partials(text)]
+
+    started = time.perf_counter()
+    partials = asyncio.run(_consume())
+    elapsed = time.perf_counter() - started
+    assert partials[-1] == text
+    assert len(partials) > 1
+    assert all(text.startswith(p) for p in partials)
+    assert 0.1 <= elapsed < 0.5
+
+
+def test_unknown_backend_mode_is_rejected():
+    with pytest.raises(ValueError):
+        LLMBackend("mock")
@@ -0,0 +1,104 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from agent_workspace.workflow_agent import baml_bridge, telemetry
+
+
+@pytest.fixture
+def metrics_path(tmp_path: Path):
+    path = tmp_path / "llm_calls.jsonl"
+    telemetry.configure_sink(telemetry.JsonlMetricsSink(path))
+    yield path
+    telemetry.configure_sink(None)
+
+
+def _records(path: Path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_bridge_calls_attach_collector_and_write_metrics(fake_baml, metrics_path: Path):
+    fake = fake_baml(
+        {"WorkflowCodegen": lambda client, **kwargs: "```python\nprint('ok')\n```"},
+        {"WorkflowRespond": lambda client, **kwargs: (["Do", "Done"], "Done.")},
+    )
+
+    codegen_inputs = dict(
+        user_message="x",
+        plan_json="{}",
+        skill_md="",
+        tool_contracts="",
+        attempt=1,
+        previous_error="",
+        previous_code="",
+        conversation_history="",
+    )
+    with telemetry.session("thread-1"):
+        baml_bridge.workflow_codegen(**codegen_inputs)
+
+    async def _stream():
+        return [
+            text
+            async for text in baml_bridge.workflow_respond_stream(
+                user_message="x",
+                plan_json="{}",
+                executed_code="",
+                exec_stdout="",
+                exec_stderr="",
+                exit_code=0,
+                attempts=1,
+                conversation_history="",
+            )
+        ]
+
+    assert asyncio.run(_stream()) == ["Do", "Done", "Done."]
+
+    assert fake.options_log and all("collector" in options for options in fake.options_log)
+    codegen, respond = _records(metrics_path)
+    assert codegen["session_id"] == "thread-1"
+    assert codegen["phase"] == "WorkflowCodegen"
+    assert codegen["status"] == "ok"
+    assert codegen["time_to_first_token_ms"] is None
+    assert respond["session_id"] is None
+    assert respond["phase"] == "WorkflowRespond"
+    assert respond["time_to_first_token_ms"] is not None
+    assert respond["time_to_first_token_ms"] <= respond["duration_ms"]
+
+
+def test_failed_calls_are_recorded_and_summarized(metrics_path: Path):
+    with pytest.raises(RuntimeError):
+        with telemetry.trace_llm_call("WorkflowPlan"):
+            raise RuntimeError("provider down")
+    with telemetry.trace_llm_call("WorkflowPlan"):
+        pass
+
+    assert [r["status"] for r in _records(metrics_path)] == ["error", "ok"]
+    summary = telemetry.summarize(metrics_path)
+    assert summary["WorkflowPlan"]["calls"] == 2
+    assert summary["WorkflowPlan"]["errors"] == 1
+
+
+def test_telemetry_disabled_without_sink(monkeypatch):
+    monkeypatch.delenv("llm_metrics_path", raising=False)
+    monkeypatch.setattr(telemetry, "_sink_configured", False)
+    with telemetry.trace_llm_call("WorkflowChat") as trace:
+        assert trace.options() == {}
+    telemetry.configure_sink(None)
+
+
+def test_summary_reports_cached_prompt_ratio(tmp_path: Path):
+    path = tmp_path / "llm_calls.jsonl"
+    base = {"phase": "WorkflowCodegen", "duration_ms": 10.0, "status": "ok", "output_tokens": 50}
+    path.write_text(
+        "\n".join(
+            json.dumps({**base, "input_tokens": tokens, "cached_input_tokens": cached})
+            for tokens, cached in [(1000, 0), (1000, 800), (2000, None)]
+        ),
+        encoding="utf-8",
+    )
+
+    summary = telemetry.summarize(path)["WorkflowCodegen"]
+    assert summary["cached_input_tokens"] == 800
+    assert summary["cached_ratio"] == pytest.approx(0.2)
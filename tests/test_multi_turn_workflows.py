@@ -9,6 +9,7 @@ import pytest
 from agent_workspace.workflow_agent import agent as agent_module
 from agent_workspace.workflow_agent.agent import WorkflowAgent
 from agent_workspace.workflow_agent.sub_agents.executor import (
+    continuation_plan_json,
     detect_continuation_signals,
     MultiTurnExecuteResult,
     MultiTurnWorkflowExecutor,
@@ -108,6 +109,91 @@ class TestWorkflowState:
         assert len(updated["checkpoint_results"]) == 1
 
 
+class TestCheckpointContinuation:
+    """Tests for resuming a workflow after its last completed checkpoint."""
+
+    PLAN = {
+        "action": "custom_script",
+        "intent": "Assign Mr.Davis to interview candidates in his domain",
+        "steps": [
+            "Look up Mr. Davis and his domain expertise",
+            "Search candidates in that domain",
+            "Assign Davis as interviewer",
+        ],
+        "requires_lookahead": True,
+        "checkpoints": ["lookup_davis_expertise", "search_domain_candidates"],
+    }
+
+    def test_json_facts_keep_their_type(self):
+        stdout = """
+CONTINUE_FACT: expert_domain=DevOps
+CONTINUE_FACT_JSON: candidate_ids=[201, 202]
+CONTINUE_FACT_JSON: note=not json
+CONTINUE_WORKFLOW: checkpoint_complete
+"""
+        needs_continuation, facts = detect_continuation_signals(stdout)
+        assert needs_continuation is True
+        assert facts == {"expert_domain": "DevOps", "candidate_ids": [201, 202], "note": "not json"}
+
+    def test_continuation_plan_keeps_only_remaining_steps(self):
+        plan_json = json.dumps(self.PLAN)
+        state = WorkflowAgent.create_workflow_state(
+            session_id="s", plan_json=plan_json, collected_facts={"expert_domain": "DevOps"}, current_step=1
+        )
+
+        resumed = json.loads(continuation_plan_json(plan_json, state))
+        assert resumed["completed_steps"] == self.PLAN["steps"][:1]
+        assert resumed["steps"] == self.PLAN["steps"][1:]
+        assert resumed["checkpoints"] == ["search_domain_candidates"]
+        assert resumed["requires_lookahead"] is True
+        assert resumed["collected_facts"] == {"expert_domain": "DevOps"}
+
+        state = WorkflowAgent.update_workflow_state(state, next_step=2, facts={"candidate_ids": [201]})
+        resumed = json.loads(continuation_plan_json(plan_json, state))
+        assert resumed["steps"] == ["Assign Davis as interviewer"]
+        assert resumed["checkpoints"] == []
+        assert resumed["requires_lookahead"] is False
+        assert resumed["collected_facts"] == {"expert_domain": "DevOps", "candidate_ids": [201]}
+
+    def test_continuation_plan_without_state_or_lookahead_is_unchanged(self):
+        plan_json = json.dumps(self.PLAN)
+        assert continuation_plan_json(plan_json, None) == plan_json
+        flat = json.dumps({**self.PLAN, "requires_lookahead": False})
+        assert continuation_plan_json(flat, {"current_step": 1}) == flat
+
+    def test_run_resumes_each_turn_after_last_checkpoint(self, monkeypatch):
+        seen_plans = []
+
+        def fake_workflow_plan(**kwargs) -> dict:
+            return dict(self.PLAN)
+
+        def fake_workflow_codegen(*, plan_json: str, **kwargs) -> str:
+            plan = json.loads(plan_json)
+            seen_plans.append(plan)
+            if plan["steps"] == self.PLAN["steps"]:
+                body = 'print("CONTINUE_FACT: expert_domain=DevOps")'
+            elif plan["checkpoints"]:
+                body = 'print("CONTINUE_FACT_JSON: candidate_ids=[201, 202]")'
+            else:
+                facts = plan["collected_facts"]
+                return f"```python\nprint('assigned', {facts['candidate_ids']!r})\nprint('=== FINAL SUMMARY ===')\n```"
+            return f"```python\n{body}\nprint('CONTINUE_WORKFLOW: checkpoint_complete')\n```"
+
+        monkeypatch.setattr(agent_module, "workflow_plan", fake_workflow_plan)
+        monkeypatch.setattr(agent_module, "workflow_codegen", fake_workflow_codegen)
+        monkeypatch.setattr(agent_module, "workflow_respond", lambda **kwargs: "done")
+
+        import asyncio
+
+        result = asyncio.run(WorkflowAgent().run(user_message="Assign Mr.Davis to his domain's candidates"))
+
+        assert [len(p["steps"]) for p in seen_plans] == [3, 2, 1]
+        assert "completed_steps" not in seen_plans[0]
+        assert seen_plans[2]["completed_steps"] == self.PLAN["steps"][:2]
+        assert "assigned [201, 202]" in result.exec_stdout
+        assert result.workflow_state is None
+
+
 class TestMultiTurnAgentExecution:
     """Tests for multi-turn execution with mocked BAML responses."""
 
@@ -235,9 +321,10 @@ class TestBackwardCompatibility:
 class TestExecutorIntegration:
     """Integration tests for the multi-turn executor."""
 
-    def test_execute_with_continuation_injects_facts(self, monkeypatch):
-        """Test that collected facts from previous turns are injected into conversation history."""
+    def test_execute_with_continuation_passes_facts_on_the_plan(self, monkeypatch):
+        """Collected facts from previous turns reach codegen as the plan's typed collected_facts only."""
         seen_histories = []
+        seen_plans = []
 
         def fake_workflow_codegen(
             *,
@@ -251,6 +338,7 @@ class TestExecutorIntegration:
             conversation_history: str,
         ) -> str:
             seen_histories.append(conversation_history)
+            seen_plans.append(json.loads(plan_json))
             # Return final summary code (no continuation signal)
             return """```python
 print("Using collected facts to complete the task")
@@ -267,7 +355,7 @@ print("=== FINAL SUMMARY ===")
             user_message="Assign Mr.Davis to interview candidates",
             plan_json='{"action": "custom_script", "requires_lookahead": true}',
             skill_md="",
-            conversation_history="",
+            conversation_history="User: Assign Mr.Davis",
             workflow_state={
                 "workflow_id": "wf_test",
                 "session_id": "test",
@@ -276,12 +364,9 @@ print("=== FINAL SUMMARY ===")
             },
         )
 
-        # Verify that the conversation history was enriched with collected facts
-        assert len(seen_histories) == 1
-        history = seen_histories[0]
-        assert "Collected Facts from Previous Steps" in history
-        assert "expert_domain: DevOps" in history
-        assert "employee_name: Charlie Davis" in history
+        # The facts are sent once, on the plan, and the history is passed through unchanged
+        assert seen_histories == ["User: Assign Mr.Davis"]
+        assert seen_plans[0]["collected_facts"] == {"expert_domain": "DevOps", "employee_name": "Charlie Davis"}
 
         # Should not need continuation (no CONTINUE signals in output)
         assert result.needs_continuation is False
@@ -302,7 +387,8 @@ class TestOrganicMultiTurnScenario:
             previous_code: str,
             conversation_history: str,
         ) -> str:
-            if "Collected Facts from Previous Steps" not in conversation_history:
+            facts = json.loads(plan_json).get("collected_facts")
+            if not facts:
                 return """```python
 import mcp_tools.bamboo_hr as bamboo_hr
 
@@ -320,12 +406,10 @@ print("CONTINUE_WORKFLOW: checkpoint_complete")
 ```"""
 
             return f"""```python
-import re
 import mcp_tools.candidate_tracker as candidate_tracker
 
-history = {json.dumps(conversation_history)}
-m = re.search(r"expert_domain:\\s*(.+)", history)
-domain = m.group(1).strip() if m else "Unknown"
+FACTS = {facts!r}
+domain = FACTS.get("expert_domain", "Unknown")
 
 candidates = candidate_tracker.search_candidates(domain)
 print("domain", domain)
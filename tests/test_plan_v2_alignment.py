@@ -108,3 +108,89 @@ def test_workflow_plan_review_enabled_via_env(monkeypatch):
     assert plan.action == "custom_script"
     assert selected_skill is None
     assert json.loads(plan_json)["action"] == "custom_script"
+
+
+def _pipelining_fakes(monkeypatch, *, review_result):
+    calls: list[tuple[str, str]] = []
+
+    def fake_workflow_plan(
+        *, user_message: str, skills_readme: str, skill_names: list[str], skill_groups: list[str], conversation_history: str
+    ) -> dict:
+        return {
+            "action": "execute_skill",
+            "skill_group": "HR-scopes",
+            "skill_name": "Onboard New Hires",
+            "intent": "Onboard new hires",
+            "steps": ["placeholder step"],
+        }
+
+    def fake_workflow_plan_review(
+        *, user_message: str, proposed_plan_json: str, selected_skill_md: str, conversation_history: str
+    ) -> dict:
+        return review_result(json.loads(proposed_plan_json))
+
+    def fake_workflow_codegen(
+        *,
+        user_message: str,
+        plan_json: str,
+        skill_md: str,
+        tool_contracts: str,
+        attempt: int,
+        previous_error: str,
+        previous_code: str,
+        conversation_history: str,
+    ) -> str:
+        action = json.loads(plan_json)["action"]
+        calls.append(("codegen", action))
+        return f"```python\nprint('generated for {action}')\n```"
+
+    def fake_workflow_respond(
+        *,
+        user_message: str,
+        plan_json: str,
+        executed_code: str,
+        exec_stdout: str,
+        exec_stderr: str,
+        exit_code: int,
+        attempts: int,
+        conversation_history: str,
+    ) -> str:
+        return exec_stdout
+
+    monkeypatch.setattr(agent_module, "workflow_plan", fake_workflow_plan)
+    monkeypatch.setattr(agent_module, "workflow_plan_review", fake_workflow_plan_review)
+    monkeypatch.setattr(agent_module, "workflow_codegen", fake_workflow_codegen)
+    monkeypatch.setattr(agent_module, "workflow_respond", fake_workflow_respond)
+    return calls
+
+
+def test_pipelined_review_keeps_speculative_code_when_review_agrees(monkeypatch):
+    calls = _pipelining_fakes(monkeypatch, review_result=lambda proposed: {**proposed, "intent": "Reworded intent"})
+
+    agent = WorkflowAgent(enable_workflow_plan_review=True, enable_workflow_plan_pipelining=True)
+    result = __import__("asyncio").run(agent.run(user_message="Onboard new hires"))
+
+    assert calls == [("codegen", "execute_skill")]
+    assert json.loads(result.plan_json)["intent"] == "Reworded intent"
+    assert "generated for execute_skill" in result.final_response
+    assert result.attempts == 1
+
+
+def test_pipelined_review_regenerates_when_review_changes_plan(monkeypatch):
+    calls = _pipelining_fakes(
+        monkeypatch,
+        review_result=lambda proposed: {
+            "action": "custom_script",
+            "skill_group": "HR-scopes",
+            "skill_name": None,
+            "intent": "Minimal onboarding",
+            "steps": ["Send a Slack DM only."],
+        },
+    )
+
+    agent = WorkflowAgent(enable_workflow_plan_review=True, enable_workflow_plan_pipelining=True)
+    result = __import__("asyncio").run(agent.run(user_message="Onboard new hires"))
+
+    assert ("codegen", "custom_script") in calls
+    assert json.loads(result.plan_json)["action"] == "custom_script"
+    assert "generated for custom_script" in result.final_response
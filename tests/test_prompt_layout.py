@@ -0,0 +1,83 @@
+"""Prompts keep static context first so provider prefix caches can reuse it."""
+import os
+
+import pytest
+
+from baml_client.sync_client import b
+
+SKILL_MD = "# Onboarding skill\n" + "Step details.\n" * 50
+TOOL_CONTRACTS = "bamboo_hr.get_new_hires_today() -> list[dict]\n" * 50
+
+
+@pytest.fixture(autouse=True)
+def _provider_env(monkeypatch):
+    monkeypatch.setenv("open_router_api_key", os.getenv("open_router_api_key") or "test-key")
+    monkeypatch.setenv("open_router_model_name", os.getenv("open_router_model_name") or "test-model")
+
+
+def _prompt(request) -> str:
+    return "".join(str(m["content"]) for m in request.body.json()["messages"])
+
+
+def _common_prefix(*prompts: str) -> str:
+    return os.path.commonprefix(list(prompts))
+
+
+def _codegen(user_message: str, *, attempt: int = 1, previous_error: str = "", history: str = "") -> str:
+    return _prompt(
+        b.request.WorkflowCodegen(
+            user_message=user_message,
+            plan_json=f'{{"intent": "{user_message}"}}',
+            skill_md=SKILL_MD,
+            tool_contracts=TOOL_CONTRACTS,
+            conversation_history=history,
+            attempt=attempt,
+            previous_error=previous_error,
+            previous_code="print('x')" if attempt > 1 else "",
+        )
+    )
+
+
+def test_codegen_prefix_is_stable_across_requests_and_attempts():
+    first = _codegen("Onboard today's hires", history="user: hi")
+    other_request = _codegen("List open IT tickets", history="user: hi\nassistant: hello")
+    retry = _codegen("Onboard today's hires", attempt=2, previous_error="NameError", history="user: hi")
+
+    for prompt in (other_request, retry):
+        prefix = _common_prefix(first, prompt)
+        assert SKILL_MD in prefix
+        assert TOOL_CONTRACTS in prefix
+        assert "### Constraints:" in prefix
+
+
+def test_plan_prefix_is_stable_across_requests():
+    def plan(user_message: str, history: str) -> str:
+        return _prompt(
+            b.request.WorkflowPlan(
+                user_message=user_message,
+                skills_readme=SKILL_MD,
+                skill_names=["onboarding", "jira_triage"],
+                skill_groups=["hr", "it"],
+                conversation_history=history,
+            )
+        )
+
+    prefix = _common_prefix(plan("Who started today?", ""), plan("Close stale tickets", "user: hi"))
+    assert SKILL_MD in prefix
+    assert "jira_triage" in prefix
+
+
+def test_chat_prefix_is_stable_across_requests():
+    def chat(user_message: str, history: str) -> str:
+        return _prompt(
+            b.request.WorkflowChat(
+                user_message=user_message,
+                skills_readme=SKILL_MD,
+                custom_skill_md=TOOL_CONTRACTS,
+                conversation_history=history,
+            )
+        )
+
+    prefix = _common_prefix(chat("hello", ""), chat("what can you do?", "user: hello"))
+    assert SKILL_MD in prefix
+    assert TOOL_CONTRACTS in prefix
@@ -0,0 +1,639 @@
+import asyncio
+import json
+import os
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+import yaml
+
+from agent_workspace.memory import SessionMemory, StepCategory, StepType
+from agent_workspace.memory import chainlit_data_layer, session_memory, thread_index, thread_log, write_behind
+from agent_workspace.memory.chainlit_data_layer import FileDataLayer
+from agent_workspace.memory.thread_cache import ThreadCache
+
+
+def _fill(memory: SessionMemory, turns: int) -> None:
+    for i in range(turns):
+        memory.add_response("user", f"question {i}")
+        memory.add_working_step(StepType.PLAN, f'{{"intent": "q{i}"}}', StepCategory.WORKING)
+        memory.add_response("assistant", f"answer {i}")
+
+
+def test_writes_append_to_log_without_rewriting_snapshot(tmp_path: Path):
+    memory = SessionMemory(session_id="t1", memory_dir=tmp_path)
+    memory.add_response("user", "hello")
+    snapshot = memory.file_path.read_bytes()
+
+    _fill(memory, 3)
+    memory.add_facts(["Person mentioned: John Smith"])
+    memory.save_workflow_state({"workflow_id": "w1", "is_multi_turn": True})
+
+    assert memory.file_path.read_bytes() == snapshot
+    log_lines = (tmp_path / "t1.log.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["seq"] for line in log_lines] == list(range(1, 13))
+
+    assert [m.content for m in memory.get_messages()][:2] == ["hello", "question 0"]
+    assert len(memory.get_messages()) == 7
+    assert [s.step_type for s in memory.get_working_steps()] == ["plan"] * 3
+    assert memory.get_facts()[0].source_turn == 7
+    assert memory.has_pending_workflow() is True
+
+    memory.clear_workflow_state()
+    assert memory.get_workflow_state() is None
+
+
+def test_log_is_folded_into_snapshot_and_fold_is_crash_safe(tmp_path: Path):
+    memory = SessionMemory(session_id="t1", memory_dir=tmp_path)
+    memory._data_layer.compact_bytes = 600
+    _fill(memory, 10)
+
+    log_path = tmp_path / "t1.log.jsonl"
+    assert log_path.stat().st_size <= 600 + 200
+    snapshot = yaml.safe_load(memory.file_path.read_text(encoding="utf-8"))
+    assert snapshot["log_seq"] > 0
+    assert len(snapshot["messages"]) < 20
+    assert [m.content for m in memory.get_messages()] == [
+        text for i in range(10) for text in (f"question {i}", f"answer {i}")
+    ]
+
+    # A crash between writing the snapshot and resetting the log replays nothing twice
+    stale_log = log_path.read_bytes()
+    memory._data_layer._compact_thread("t1")
+    log_path.write_bytes(stale_log)
+    assert len(memory.get_messages()) == 20
+
+    memory.add_response("user", "after crash")
+    assert memory.get_messages()[-1].content == "after crash"
+    assert len(memory.get_messages()) == 21
+
+
+def test_torn_last_line_is_ignored(tmp_path: Path):
+    memory = SessionMemory(session_id="t1", memory_dir=tmp_path)
+    memory.add_response("user", "hello")
+    with (tmp_path / "t1.log.jsonl").open("a", encoding="utf-8") as f:
+        f.write('{"seq": 2, "op": "message", "item": {"role": "us')
+
+    assert [m.content for m in memory.get_messages()] == ["hello"]
+    memory.add_response("assistant", "hi")
+    assert [m.content for m in memory.get_messages()] == ["hello", "hi"]
+
+
+def test_migrator_rewrites_legacy_yaml_as_clean_snapshots(tmp_path: Path):
+    (tmp_path / "legacy.yaml").write_text(
+        "\n".join(
+            [
+                "session_id: legacy",
+                "created_at: '2026-01-20T13:40:35.998801+00:00'",
+                "messages:",
+                "- role: user",
+                "  content: hi",
+                "  timestamp: '2026-01-20T13:40:36'",
+                "steps:",
+                "- step_type: !!python/object/apply:agent_workspace.memory.session_memory.StepType",
+                "  - plan",
+                "  category: working",
+                "  content: '{}'",
+                "facts: []",
+                "",
+            ]
+        ),
+        encoding="utf-8",
+    )
+    memory = SessionMemory(session_id="legacy", memory_dir=tmp_path)
+    memory.add_response("assistant", "hello")
+
+    assert thread_log.main(["--storage-dir", str(tmp_path)]) == 0
+
+    data = yaml.safe_load((tmp_path / "legacy.yaml").read_text(encoding="utf-8"))
+    assert data["steps"][0]["step_type"] == "plan"
+    assert [m["content"] for m in data["messages"]] == ["hi", "hello"]
+    assert thread_log.read_events(tmp_path / "legacy.log.jsonl", after_seq=data["log_seq"]) == []
+    assert [m.content for m in memory.get_messages()] == ["hi", "hello"]
+
+
+def test_clear_deletes_snapshot_and_log(tmp_path: Path):
+    memory = SessionMemory(session_id="t1", memory_dir=tmp_path)
+    _fill(memory, 1)
+    memory.clear()
+
+    assert not memory.file_path.exists()
+    assert not (tmp_path / "t1.log.jsonl").exists()
+    assert FileDataLayer(storage_dir=tmp_path)._load_thread("t1") is None
+
+
+def _count_parses(monkeypatch) -> list[int]:
+    parses = [0]
+    real_load = chainlit_data_layer.yaml.load
+
+    def counting_load(*args, **kwargs):
+        parses[0] += 1
+        return real_load(*args, **kwargs)
+
+    monkeypatch.setattr(chainlit_data_layer.yaml, "load", counting_load)
+    return parses
+
+
+def test_turn_reads_thread_from_disk_at_most_once(tmp_path: Path, monkeypatch):
+    _fill(SessionMemory(session_id="t1", memory_dir=tmp_path), 3)
+    chainlit_data_layer.shared_thread_cache.clear()
+    parses = _count_parses(monkeypatch)
+
+    # The reads and writes of one on_message turn, through a fresh SessionMemory
+    memory = SessionMemory(session_id="t1", memory_dir=tmp_path)
+    memory.get_conversation_history(max_messages=10)
+    memory.add_response("user", "next")
+    memory.get_workflow_state()
+    memory.add_working_step(StepType.PLAN, "{}", StepCategory.WORKING)
+    memory.add_working_step(StepType.CODEGEN, "print(1)", StepCategory.WORKING, metadata={"attempt": 1})
+    memory.add_working_step(StepType.EXECUTE, "stdout: 1", StepCategory.WORKING, metadata={"exit_code": 0})
+    memory.add_response("assistant", "done")
+    messages = memory.get_messages()
+
+    assert parses[0] == 1
+    assert [m.content for m in messages[-2:]] == ["next", "done"]
+    assert len(memory.get_working_steps()) == 6
+
+
+def test_cache_detects_files_changed_by_another_process(tmp_path: Path):
+    memory = SessionMemory(session_id="t1", memory_dir=tmp_path)
+    memory.add_response("user", "hello")
+    assert [m.content for m in memory.get_messages()] == ["hello"]
+
+    # Another writer appends to the log behind this process's back
+    other = FileDataLayer(storage_dir=tmp_path, cache=ThreadCache())
+    other._append_thread_events(
+        "t1", [{"op": "message", "item": {"role": "assistant", "content": "hi"}, "at": "2026-01-01T00:00:00"}]
+    )
+    assert [m.content for m in memory.get_messages()] == ["hello", "hi"]
+
+    # ... or replaces the snapshot (new inode)
+    data = yaml.safe_load(memory.file_path.read_text(encoding="utf-8"))
+    data["name"] = "renamed"
+    replacement = tmp_path / "replacement.yaml"
+    replacement.write_text(yaml.safe_dump(data), encoding="utf-8")
+    os.replace(replacement, memory.file_path)
+    assert memory._data_layer._read_thread("t1")["name"] == "renamed"
+
+    # Callers that modify loaded data do not corrupt the cache
+    loaded = memory._data_layer._load_thread("t1")
+    loaded["messages"].clear()
+    assert len(memory.get_messages()) == 2
+
+
+def test_write_through_does_not_change_lists_readers_hold(tmp_path: Path):
+    layer = FileDataLayer(storage_dir=tmp_path, cache=ThreadCache())
+    layer._append_thread_events("t1", [{"op": "message", "item": {"role": "user", "content": "hello"}}])
+    held = layer._read_thread("t1")
+    messages = held["messages"]
+
+    layer._append_thread_events("t1", [{"op": "message", "item": {"role": "assistant", "content": "hi"}}])
+    assert [m["content"] for m in messages] == ["hello"]
+    assert [m["content"] for m in layer._read_thread("t1")["messages"]] == ["hello", "hi"]
+
+
+def test_thread_cache_is_bounded_lru(tmp_path: Path):
+    cache = ThreadCache(max_entries=2)
+    layer = FileDataLayer(storage_dir=tmp_path, cache=cache)
+    for thread_id in ("a", "b", "c"):
+        SessionMemory(session_id=thread_id, memory_dir=tmp_path).add_response("user", thread_id)
+        layer._read_thread(thread_id)
+    layer._read_thread("b")
+
+    assert cache.hits == 1
+    layer._read_thread("a")  # Evicted as least recently used
+    assert cache.hits == 1
+    layer._read_thread("b")
+    assert cache.hits == 2
+
+
+def _list(layer, **filters):
+    return asyncio.run(
+        layer.list_threads(
+            pagination=SimpleNamespace(cursor=filters.pop("cursor", None), first=filters.pop("first", 20)),
+            filters=SimpleNamespace(userId=filters.get("user_id"), userIdentifier=filters.get("user_identifier")),
+        )
+    )
+
+
+def test_sidebar_is_served_from_index_without_opening_threads(tmp_path: Path, monkeypatch):
+    layer = FileDataLayer(storage_dir=tmp_path)
+    layer._save_users({"testuser": {"id": "user-1", "identifier": "testuser"}})
+    for i in range(4):
+        asyncio.run(layer.update_thread(f"thread-{i}", user_id="user-1" if i % 2 else None, name=f"t{i}"))
+        _fill(SessionMemory(session_id=f"thread-{i}", memory_dir=tmp_path), i)
+    asyncio.run(layer.delete_thread("thread-3"))
+
+    def no_thread_reads(self, thread_id):
+        raise AssertionError(f"opened {thread_id}")
+
+    monkeypatch.setattr(FileDataLayer, "_read_thread", no_thread_reads)
+    assert sorted(t["id"] for t in _list(layer).data) == ["thread-0", "thread-1", "thread-2"]
+    assert [t["name"] for t in _list(layer, user_identifier="testuser").data] == ["t1"]
+    first = _list(layer, first=2)
+    assert first.pageInfo.hasNextPage is True
+    assert len(_list(layer, first=2, cursor=first.pageInfo.endCursor).data) == 1
+    assert asyncio.run(layer.get_thread_author("thread-1")) == "testuser"
+    assert asyncio.run(layer.get_thread_author("thread-0")) == ""
+
+    entries = layer._index.entries()
+    assert entries["thread-2"]["message_count"] == 4
+    assert entries["thread-2"]["updated_at"] > entries["thread-2"]["created_at"]
+
+
+def test_index_is_built_for_existing_stores_and_rebuildable(tmp_path: Path):
+    _fill(SessionMemory(session_id="a", memory_dir=tmp_path), 2)
+    _fill(SessionMemory(session_id="b", memory_dir=tmp_path), 1)
+    index_path = tmp_path / "_index.jsonl"
+
+    # A store from before the index: built on first use
+    index_path.unlink()
+    assert {t["id"] for t in _list(FileDataLayer(storage_dir=tmp_path)).data} == {"a", "b"}
+
+    # Threads written behind the index's back show up after a rebuild
+    data = yaml.safe_load((tmp_path / "a.yaml").read_text(encoding="utf-8"))
+    (tmp_path / "c.yaml").write_text(yaml.safe_dump({**data, "session_id": "c", "name": "copied"}), encoding="utf-8")
+    assert thread_index.main(["--storage-dir", str(tmp_path)]) == 0
+    entries = FileDataLayer(storage_dir=tmp_path)._index.entries()
+    assert sorted(entries) == ["a", "b", "c"]
+    assert entries["a"]["message_count"] == 4
+    assert entries["c"]["name"] == "copied"
+
+
+def test_index_compacts_stale_records(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(thread_index, "_COMPACT_SLACK", 10)
+    memory = SessionMemory(session_id="t1", memory_dir=tmp_path)
+    for i in range(30):
+        memory.add_response("user", f"message {i}")
+
+    lines = (tmp_path / "_index.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(lines) <= 11
+    assert memory._data_layer._index.entries()["t1"]["message_count"] == 30
+
+
+def _count_appends(monkeypatch) -> list[int]:
+    appends = [0]
+    real_append = FileDataLayer._append_thread_events
+
+    def counting_append(self, thread_id, events):
+        appends[0] += 1
+        return real_append(self, thread_id, events)
+
+    monkeypatch.setattr(FileDataLayer, "_append_thread_events", counting_append)
+    return appends
+
+
+def test_batch_commits_a_turn_as_one_append(tmp_path: Path, monkeypatch):
+    appends = _count_appends(monkeypatch)
+    memory = SessionMemory(session_id="t1", memory_dir=tmp_path, max_batch_delay=60)
+    other_process = SessionMemory(session_id="t1", memory_dir=tmp_path)
+
+    with memory.batch():
+        memory.add_response("user", "hello")
+        memory.save_workflow_state({"workflow_id": "w1", "is_multi_turn": True})
+        with memory.batch():
+            memory.add_working_step(StepType.PLAN, "{}", StepCategory.WORKING)
+        memory.add_facts(["Reference: LR-123"])
+
+        # Reads in the batch see the buffered writes; nothing is on disk yet
+        assert [m.content for m in memory.get_messages()] == ["hello"]
+        assert memory.has_pending_workflow() is True
+        assert memory.get_facts()[0].source_turn == 1
+        assert other_process.get_messages() == []
+        assert appends[0] == 0
+
+    assert appends[0] == 1
+    assert [m.content for m in other_process.get_messages()] == ["hello"]
+    assert len(other_process.get_working_steps()) == 1
+    assert other_process.get_facts()[0].source_turn == 1
+
+
+def test_batch_flushes_on_error_explicitly_and_after_max_delay(tmp_path: Path, monkeypatch):
+    appends = _count_appends(monkeypatch)
+    memory = SessionMemory(session_id="t1", memory_dir=tmp_path, max_batch_delay=60)
+    reader = SessionMemory(session_id="t1", memory_dir=tmp_path)
+
+    try:
+        with memory.batch():
+            memory.add_response("user", "hello")
+            raise RuntimeError("agent failed")
+    except RuntimeError:
+        pass
+    assert [m.content for m in reader.get_messages()] == ["hello"]
+
+    with memory.batch():
+        memory.add_response("user", "again")
+        memory.flush()
+        assert [m.content for m in reader.get_messages()] == ["hello", "again"]
+        memory.max_batch_delay = 0
+        memory.add_response("assistant", "late")
+        assert [m.content for m in reader.get_messages()][-1] == "late"
+    assert appends[0] == 3
+
+
+def test_write_behind_session_serves_reads_from_memory(tmp_path: Path, monkeypatch):
+    memory = SessionMemory(session_id="t1", memory_dir=tmp_path, write_behind=True)
+    memory.add_response("user", "before")
+    write_behind.get_writer().drain()
+    memory = SessionMemory(session_id="t1", memory_dir=tmp_path, write_behind=True)
+    memory.preload()
+
+    def no_disk(self, thread_id):
+        raise AssertionError("read from disk")
+
+    monkeypatch.setattr(FileDataLayer, "_read_thread", no_disk)
+    with memory.batch():
+        memory.add_response("user", "hello")
+        memory.save_workflow_state({"workflow_id": "w1", "is_multi_turn": True})
+        memory.add_facts(["Reference: LR-123"])
+    memory.add_response("assistant", "hi")
+    assert [m.content for m in memory.get_messages()] == ["before", "hello", "hi"]
+    assert memory.has_pending_workflow() is True
+    assert memory.get_facts()[0].source_turn == 2
+    monkeypatch.undo()
+
+    assert write_behind.get_writer().drain(timeout=5)
+    on_disk = SessionMemory(session_id="t1", memory_dir=tmp_path)
+    assert [m.content for m in on_disk.get_messages()] == ["before", "hello", "hi"]
+    assert on_disk.get_facts()[0].source_turn == 2
+
+    memory.add_response("user", "queued")
+    memory.clear()  # Queued behind the pending append, without waiting for it
+    assert memory.get_messages() == []
+    assert write_behind.get_writer().drain(timeout=5)
+    assert not memory.file_path.exists()
+
+
+def test_concurrent_writers_of_a_thread_do_not_lose_events(tmp_path: Path):
+    layer = FileDataLayer(storage_dir=tmp_path, compact_bytes=2048)
+    other = FileDataLayer(storage_dir=tmp_path)  # Same files, e.g. Chainlit's own data layer
+
+    def append(writer, name):
+        for i in range(100):
+            writer._append_thread_events(
+                "t1", [{"op": "message", "item": {"role": "user", "content": f"{name}{i}"}, "at": "2026-01-01T00:00:00"}]
+            )
+
+    threads = [threading.Thread(target=append, args=(w, n)) for w, n in ((layer, "a"), (other, "b"))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    asyncio.run(other.update_thread("t1", name="renamed"))
+
+    chainlit_data_layer.shared_thread_cache.clear()
+    contents = [m["content"] for m in layer._read_thread("t1")["messages"]]
+    assert sorted(contents) == sorted([f"a{i}" for i in range(100)] + [f"b{i}" for i in range(100)])
+    seqs = [e["seq"] for e in thread_log.read_events(layer._get_log_path("t1"))]
+    assert len(seqs) == len(set(seqs))
+    assert layer._read_thread("t1")["name"] == "renamed"
+
+
+def test_wait_for_writer_waits_off_the_event_loop(tmp_path: Path, monkeypatch):
+    writer = write_behind.WriteBehindWriter(max_pending_events=1)
+    monkeypatch.setattr(session_memory, "get_writer", lambda: writer)
+    gate = threading.Event()
+    real_append = FileDataLayer._append_thread_events
+
+    def gated_append(self, thread_id, events):
+        gate.wait(5)
+        return real_append(self, thread_id, events)
+
+    monkeypatch.setattr(FileDataLayer, "_append_thread_events", gated_append)
+    memory = SessionMemory(session_id="t1", memory_dir=tmp_path, write_behind=True)
+    memory.add_response("user", "hello")
+    memory.add_response("assistant", "hi")  # Over capacity, yet submitting does not block
+
+    async def turn():
+        ticks = 0
+        waiting = asyncio.create_task(memory.wait_for_writer())
+        while not waiting.done():
+            ticks += 1
+            if ticks == 3:
+                gate.set()
+            await asyncio.sleep(0.01)
+        return ticks
+
+    assert asyncio.run(turn()) >= 3  # The loop kept running while the writer caught up
+    assert not writer.backlogged
+    assert writer.drain(timeout=5)
+
+
+def test_writer_coalesces_per_thread_and_applies_back_pressure(tmp_path: Path, monkeypatch):
+    gate = threading.Event()
+    appended: list[tuple[str, int]] = []
+    real_append = FileDataLayer._append_thread_events
+
+    def gated_append(self, thread_id, events):
+        gate.wait(5)
+        appended.append((thread_id, len(events)))
+        return real_append(self, thread_id, events)
+
+    monkeypatch.setattr(FileDataLayer, "_append_thread_events", gated_append)
+    layer = FileDataLayer(storage_dir=tmp_path)
+    writer = write_behind.WriteBehindWriter(max_pending_events=4)
+
+    def event(i):
+        return {"op": "message", "item": {"role": "user", "content": str(i)}, "at": "2026-01-01T00:00:00"}
+
+    writer.submit(layer, "a", [event(0)])  # The writer blocks on the gate
+    for i in range(1, 5):
+        writer.submit(layer, "a" if i != 2 else "b", [event(i)])  # Never blocks
+    assert writer.backlogged
+    assert not writer.wait_for_capacity(timeout=0.2)  # Queue is full: producers wait for the writer
+
+    gate.set()
+    assert writer.wait_for_capacity(timeout=5)
+    assert writer.drain(timeout=5)
+    assert sum(n for _, n in appended) == 5
+    assert len(appended) <= 4  # Later writes to "a" were coalesced into one append
+    assert [m["content"] for m in layer._read_thread("a")["messages"]] == ["0", "1", "3", "4"]
+
+
+def test_large_step_contents_are_stored_once_as_blobs(tmp_path: Path):
+    code = "\n".join(f"print({i})" for i in range(1000))
+    first = SessionMemory(session_id="t1", memory_dir=tmp_path)
+    first.add_working_step(StepType.CODEGEN, code, StepCategory.WORKING, metadata={"attempt": 1})
+    first.add_working_step(StepType.CODEGEN, code, StepCategory.WORKING, metadata={"attempt": 2})
+    first.add_working_step(StepType.PLAN, "{}", StepCategory.WORKING)
+    SessionMemory(session_id="t2", memory_dir=tmp_path).add_working_step(
+        StepType.CODEGEN, code, StepCategory.WORKING
+    )
+
+    assert len(list((tmp_path / "_blobs").rglob("*.z"))) == 1  # Deduplicated across steps and sessions
+    assert "print(999)" not in first.file_path.read_text(encoding="utf-8")
+    assert "print(999)" not in first._data_layer._get_log_path("t1").read_text(encoding="utf-8")
+
+    steps = SessionMemory(session_id="t1", memory_dir=tmp_path).get_working_steps()
+    assert steps[0].content_ref is not None and steps[0].content.startswith("print(0)")
+    assert len(steps[0].content) < 300
+    assert first.load_step_content(steps[1]) == code
+    assert steps[2].content_ref is None and first.load_step_content(steps[2]) == "{}"
+
+
+def test_blobs_are_written_with_their_step_event(tmp_path: Path, monkeypatch):
+    code = "\n".join(f"print({i})" for i in range(1000))
+    memory = SessionMemory(session_id="t1", memory_dir=tmp_path)
+    with memory.batch():
+        memory.add_working_step(StepType.CODEGEN, code, StepCategory.WORKING)
+        assert not (tmp_path / "_blobs").exists()  # Not written on the caller's path
+        assert memory.load_step_content(memory.get_working_steps()[0]) == code
+    assert len(list((tmp_path / "_blobs").rglob("*.z"))) == 1
+
+    writer = write_behind.WriteBehindWriter()
+    monkeypatch.setattr(session_memory, "get_writer", lambda: writer)
+    gate = threading.Event()
+    real_append = FileDataLayer._append_thread_events
+
+    def gated_append(self, thread_id, events):
+        gate.wait(5)
+        return real_append(self, thread_id, events)
+
+    monkeypatch.setattr(FileDataLayer, "_append_thread_events", gated_append)
+    behind = SessionMemory(session_id="t2", memory_dir=tmp_path, write_behind=True)
+    other = code.replace("print", "log")
+    behind.add_working_step(StepType.CODEGEN, other, StepCategory.WORKING)
+    assert len(list((tmp_path / "_blobs").rglob("*.z"))) == 1  # Queued with the event
+    assert behind.load_step_content(behind.get_working_steps()[0]) == other
+
+    gate.set()
+    assert writer.drain(timeout=5)
+    assert len(list((tmp_path / "_blobs").rglob("*.z"))) == 2
+    assert "log(999)" not in behind._data_layer._get_log_path("t2").read_text(encoding="utf-8")
+    assert behind.load_step_content(behind.get_working_steps()[0]) == other
+
+
+def test_recent_history_is_read_from_the_log_tail(tmp_path: Path, monkeypatch):
+    memory = SessionMemory(session_id="t1", memory_dir=tmp_path)
+    memory._data_layer.compact_bytes = 8000
+    _fill(memory, 30)
+    chainlit_data_layer.shared_thread_cache.clear()
+    parses = _count_parses(monkeypatch)
+
+    memory = SessionMemory(session_id="t1", memory_dir=tmp_path)
+    history = memory.get_conversation_history(max_messages=10)
+    with memory.batch():
+        memory.add_response("user", "pending")
+        recent = memory.get_recent_messages(3)
+    assert parses[0] == 0  # Neither the snapshot nor the whole log was loaded
+    context = memory.get_context_summary(max_messages=20)  # Facts still come from the full thread
+
+    assert history.splitlines()[0] == "User: question 25"
+    assert history.splitlines()[-1] == "Assistant: answer 29"
+    assert [m.content for m in recent] == ["question 29", "answer 29", "pending"]
+    assert "answer 20" in context and "question 20" not in context
+
+    chainlit_data_layer.shared_thread_cache.clear()
+    assert len(memory.get_recent_messages(100)) == 61  # Beyond the log: falls back to the full thread
+    assert parses[0] == 2
+    assert [m.content for m in memory.get_recent_messages(0)] == [m.content for m in memory.get_messages()]
+
+
+def test_compact_folds_old_turns_into_summary_and_archive(tmp_path: Path):
+    memory = SessionMemory(session_id="t1", memory_dir=tmp_path)
+    for i in range(5):
+        memory.add_response("user", f"Leave for John Smith on 2026-03-{i + 10:02d}")
+        memory.add_working_step(StepType.CODEGEN, f"print({i})", StepCategory.WORKING)
+        memory.add_response("assistant", f"Request LR-{i} submitted")
+    assert memory.compact(keep_messages=6, keep_steps=10) is False  # Below twice the window
+    _fill(memory, 2)
+    hot_files = (memory.file_path, tmp_path / "t1.log.jsonl")
+    size_before = sum(path.stat().st_size for path in hot_files)
+
+    assert memory.compact(keep_messages=6, keep_steps=3, max_facts=8) is True
+    assert sum(path.stat().st_size for path in hot_files) < size_before
+    assert [m.content for m in memory.get_messages()] == [
+        "Leave for John Smith on 2026-03-14",
+        "Request LR-4 submitted",
+        *(text for i in range(2) for text in (f"question {i}", f"answer {i}")),
+    ]
+    assert len(memory.get_working_steps()) == 3
+    facts = memory.get_facts()
+    assert len(facts) == 8
+    assert (facts[-2].fact, facts[-2].source_turn) == ("Reference: LR-3", 8)
+    summary = memory.get_summary()
+    assert summary.splitlines()[0] == "- User: Leave for John Smith on 2026-03-10"
+    assert "Earlier conversation (summary):" in memory.get_conversation_history(max_messages=2)
+
+    archive = memory._data_layer.read_archive("t1")
+    assert len(archive) == 1
+    assert len(archive[0]["messages"]) == 8 and len(archive[0]["steps"]) == 4
+    assert archive[0]["facts"][0]["fact"] == "Person mentioned: John Smith"
+
+    # A later turn's fact counts the pruned messages; the summary is read from the log alone
+    memory.add_facts(["Reference: LR-9"])
+    assert memory.get_facts()[-1].source_turn == 14
+    chainlit_data_layer.shared_thread_cache.clear()
+    assert SessionMemory(session_id="t1", memory_dir=tmp_path).get_summary() == summary
+    assert memory._data_layer._index_entries()["t1"]["message_count"] == 14
+
+    memory.clear()
+    assert not (tmp_path / "t1.archive.jsonl").exists()
+
+
+def test_write_behind_compact_archives_each_pruned_fact_once(tmp_path: Path):
+    memory = SessionMemory(session_id="t1", memory_dir=tmp_path, write_behind=True)
+    memory.add_facts(["Reference: LR-100", "Reference: LR-101"])
+    for i in range(4):
+        memory.add_response("user", f"Leave for John Smith on 2026-03-{i + 10:02d}")
+        memory.add_response("assistant", f"Request LR-{i} submitted")
+
+    assert memory.compact(keep_messages=4, keep_steps=10, max_facts=3) is True
+    kept = [f.fact for f in memory.get_facts()]
+    assert write_behind.get_writer().drain(timeout=5)
+    archived = [f["fact"] for f in memory._data_layer.read_archive("t1")[0]["facts"]]
+    assert archived[:2] == ["Reference: LR-100", "Reference: LR-101"]
+    assert len(kept) == 3 and len(set(archived + kept)) == len(archived) + len(kept)
+    chainlit_data_layer.shared_thread_cache.clear()
+    assert [f.fact for f in SessionMemory(session_id="t1", memory_dir=tmp_path).get_facts()] == kept
+
+
+def test_prune_is_archived_once_across_crashes(tmp_path: Path, monkeypatch):
+    memory = SessionMemory(session_id="t1", memory_dir=tmp_path)
+    _fill(memory, 8)
+
+    # Crash right after the prune event is logged, before the fold
+    monkeypatch.setattr(FileDataLayer, "_compact_thread", lambda self, thread_id: None)
+    assert memory.compact(keep_messages=4, keep_steps=4) is True
+    monkeypatch.undo()
+    assert memory._data_layer.read_archive("t1") == []
+
+    # Crash after archiving, before the snapshot is saved
+    real_save = FileDataLayer._save_thread
+
+    def crash(self, thread_id, data):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(FileDataLayer, "_save_thread", crash)
+    with pytest.raises(OSError):
+        memory._data_layer._compact_thread("t1")
+    monkeypatch.setattr(FileDataLayer, "_save_thread", real_save)
+    memory._data_layer._compact_thread("t1")
+
+    archive = memory._data_layer.read_archive("t1")
+    assert len(archive) == 1
+    assert [m["content"] for m in archive[0]["messages"]] == [
+        text for i in range(6) for text in (f"question {i}", f"answer {i}")
+    ]
+    chainlit_data_layer.shared_thread_cache.clear()
+    assert len(SessionMemory(session_id="t1", memory_dir=tmp_path).get_messages()) == 4
+
+
+def test_snapshot_format_is_pluggable_and_detected_per_file(tmp_path: Path, monkeypatch):
+    _fill(SessionMemory(session_id="t1", memory_dir=tmp_path), 2)
+    FileDataLayer(storage_dir=tmp_path)._compact_thread("t1")
+    expected = FileDataLayer(storage_dir=tmp_path)._load_thread("t1")
+
+    for fmt, prefix in (("json", b"{"), ("binary", b"SMZ1"), ("yaml", b"session_id:")):
+        monkeypatch.setenv("memory_format", fmt)
+        memory = SessionMemory(session_id="t1", memory_dir=tmp_path)
+        assert memory._data_layer._load_thread("t1") == expected  # Written in the previous format
+        memory._data_layer._compact_thread("t1")
+        assert memory.file_path.read_bytes().startswith(prefix)
+        chainlit_data_layer.shared_thread_cache.clear()
+        assert [m.content for m in memory.get_messages()] == [m["content"] for m in expected["messages"]]
+
+    monkeypatch.setenv("memory_format", "toml")
+    with pytest.raises(ValueError, match="memory_format"):
+        SessionMemory(session_id="t1", memory_dir=tmp_path)
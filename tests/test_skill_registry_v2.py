@@ -11,3 +11,20 @@ def test_skill_registry_v2_finds_hr_scopes_skill():
     assert "Onboard New Hires" in names
     assert "Offboard Employee" in names
     assert "Probation Check-in Reminders" in names
+
+
+def test_skill_registry_serves_warmed_index_until_rewarmed(tmp_path: Path):
+    examples = tmp_path / "HR-scopes" / "examples"
+    examples.mkdir(parents=True)
+    (examples / "onboard.md").write_text("# Onboard\n", encoding="utf-8")
+    (tmp_path / "Readme.md").write_text("skills", encoding="utf-8")
+    registry = SkillRegistry(tmp_path)
+    registry.warm()
+
+    (examples / "offboard.md").write_text("# Offboard\n", encoding="utf-8")
+    assert [s.name for s in registry.list_skills()] == ["Onboard"]
+    assert registry.list_skill_groups() == ["HR-scopes"]
+    assert registry.read_skills_readme() == "skills"
+
+    registry.warm()
+    assert [s.name for s in registry.list_skills()] == ["Offboard", "Onboard"]
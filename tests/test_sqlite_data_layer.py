@@ -0,0 +1,165 @@
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+
+from agent_workspace.memory import SessionMemory, StepCategory, StepType
+from agent_workspace.memory import sqlite_data_layer
+from agent_workspace.memory.chainlit_data_layer import FileDataLayer
+from agent_workspace.memory.sqlite_data_layer import SQLiteDataLayer
+
+USERS = {
+    "testuser": {
+        "id": "user-1",
+        "identifier": "testuser",
+        "createdAt": "2026-01-01T00:00:00+00:00",
+        "metadata": {"provider": "credentials"},
+    }
+}
+
+
+def _list(layer, *, cursor=None, first=20, user_id=None, user_identifier=None):
+    return asyncio.run(
+        layer.list_threads(
+            pagination=SimpleNamespace(cursor=cursor, first=first),
+            filters=SimpleNamespace(userId=user_id, userIdentifier=user_identifier),
+        )
+    )
+
+
+def test_session_memory_on_sqlite_backend(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("memory_backend", "sqlite")
+    memory = SessionMemory(session_id="t1", memory_dir=tmp_path)
+    assert isinstance(memory._data_layer, SQLiteDataLayer)
+    assert memory.file_path == tmp_path / "threads.sqlite3"
+
+    memory.add_response("user", "Submit leave for John Smith")
+    memory.add_working_step(StepType.PLAN, "{}", StepCategory.WORKING, metadata={"intent": "leave"})
+    memory.add_response("assistant", "Done")
+    memory.add_facts(["Person mentioned: John Smith"])
+    memory.save_workflow_state({"workflow_id": "w1", "is_multi_turn": True})
+
+    assert [(m.role, m.content) for m in memory.get_messages()] == [
+        ("user", "Submit leave for John Smith"),
+        ("assistant", "Done"),
+    ]
+    assert memory.get_working_steps()[0].metadata == {"intent": "leave"}
+    assert [m.content for m in memory.get_recent_messages(1)] == ["Done"]
+    assert memory.get_facts()[0].source_turn == 2
+    assert memory.has_pending_workflow() is True
+    memory.clear_workflow_state()
+    assert memory.get_workflow_state() is None
+
+    thread = asyncio.run(memory._data_layer.get_thread("t1"))
+    assert [s["output"] for s in thread["steps"]] == ["Submit leave for John Smith", "Done"]
+
+    memory.clear()
+    assert memory._data_layer._read_thread("t1") is None
+    assert memory.get_messages() == []
+
+
+def test_list_threads_filters_by_user_and_pages_by_keyset(tmp_path: Path):
+    layer = SQLiteDataLayer(storage_dir=tmp_path)
+    layer._save_users(USERS)
+    for i in range(5):
+        layer._save_thread(f"thread-{i}", {"created_at": f"2026-01-0{i + 1}T00:00:00+00:00", "user_id": "user-1"})
+    layer._save_thread("other", {"created_at": "2026-02-01T00:00:00+00:00", "user_id": "user-2"})
+
+    first = _list(layer, first=2, user_id="user-1")
+    assert [t["id"] for t in first.data] == ["thread-4", "thread-3"]
+    assert first.pageInfo.hasNextPage is True
+    second = _list(layer, first=2, user_id="user-1", cursor=first.pageInfo.endCursor)
+    assert [t["id"] for t in second.data] == ["thread-2", "thread-1"]
+    last = _list(layer, first=2, user_id="user-1", cursor=second.pageInfo.endCursor)
+    assert [t["id"] for t in last.data] == ["thread-0"]
+    assert last.pageInfo.hasNextPage is False
+
+    by_identifier = _list(layer, user_identifier="testuser")
+    assert len(by_identifier.data) == 5
+    assert by_identifier.data[0]["userIdentifier"] == "testuser"
+    assert [t["id"] for t in _list(layer).data][0] == "other"
+
+    asyncio.run(layer.update_thread("thread-0", name="Leave requests"))
+    assert _list(layer, user_id="user-1").data[-1]["name"] == "Leave requests"
+    assert asyncio.run(layer.get_thread_author("thread-0")) == "testuser"
+    assert asyncio.run(layer.get_thread_author("other")) == ""
+
+
+def test_migrate_copies_yaml_store(tmp_path: Path):
+    source_dir = tmp_path / "sessions"
+    source = FileDataLayer(storage_dir=source_dir)
+    source._save_users(USERS)
+    asyncio.run(source.update_thread("thread-1", user_id="user-1", name="hi"))
+    memory = SessionMemory(session_id="thread-1", memory_dir=source_dir)
+    memory.add_response("user", "hello")
+    memory.add_working_step(StepType.CODEGEN, "print(1)", StepCategory.WORKING, metadata={"attempt": 1})
+    memory.add_facts(["Reference: LR-123"])
+    memory.save_workflow_state({"workflow_id": "w1", "is_multi_turn": True})
+    (source_dir / "broken.yaml").write_text("- not\n- a thread\n", encoding="utf-8")
+
+    db_path = tmp_path / "threads.sqlite3"
+    assert sqlite_data_layer.main(["--from", str(source_dir), "--db", str(db_path)]) == 1  # broken.yaml skipped
+    assert sqlite_data_layer.main(["--from", str(source_dir), "--db", str(db_path)]) == 1  # Re-runnable
+
+    layer = SQLiteDataLayer(storage_dir=tmp_path, db_path=db_path)
+    expected = source._load_thread("thread-1")
+    migrated = layer._read_thread("thread-1")
+    for key in ("name", "user_id", "user_identifier", "created_at", "messages", "steps", "facts", "workflow_state"):
+        assert migrated[key] == expected[key], key
+    assert asyncio.run(layer.get_user("testuser")).id == "user-1"
+    assert [t["id"] for t in _list(layer, user_identifier="testuser").data] == ["thread-1"]
+
+
+def test_externalized_step_contents_keep_their_reference(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("memory_backend", "sqlite")
+    memory = SessionMemory(session_id="t1", memory_dir=tmp_path, inline_max_chars=10)
+    memory.add_working_step(StepType.EXECUTE, "stdout: " + "x" * 100, StepCategory.WORKING)
+    memory.add_working_step(StepType.PLAN, "{}", StepCategory.WORKING)
+
+    big, small = memory.get_working_steps()
+    assert big.content_ref is not None
+    assert memory.load_step_content(big) == "stdout: " + "x" * 100
+    assert small.content_ref is None
+    assert "content_ref" not in memory._data_layer._read_thread("t1")["steps"][1]
+
+
+def test_compact_prunes_rows(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("memory_backend", "sqlite")
+    memory = SessionMemory(session_id="t1", memory_dir=tmp_path)
+    for i in range(4):
+        memory.add_response("user", f"question {i}")
+        memory.add_working_step(StepType.PLAN, "{}", StepCategory.WORKING)
+        memory.add_response("assistant", f"Ticket LR-{i} created")
+
+    assert memory.compact(keep_messages=2, keep_steps=2) is True
+    assert [m.content for m in memory.get_messages()] == ["question 3", "Ticket LR-3 created"]
+    assert len(memory.get_working_steps()) == 2
+    assert memory.get_summary().splitlines()[-1] == "- Assistant: Ticket LR-2 created"
+    assert [f.source_turn for f in memory.get_facts()][:2] == [2, 2]
+    (archived,) = memory._data_layer.read_archive("t1")
+    assert [m["content"] for m in archived["messages"]][:2] == ["question 0", "Ticket LR-0 created"]
+    assert len(archived["steps"]) == 2
+    assert not memory._data_layer._get_archive_path("t1").exists()  # Stored in the database
+
+    memory.add_facts(["Reference: LR-9"])
+    assert memory.get_facts()[-1].source_turn == 8
+    layer = memory._data_layer
+    layer._save_thread("t1", layer._load_thread("t1"))  # Message count survives a rewrite
+    memory.add_facts(["Reference: LR-10"])
+    assert memory.get_facts()[-1].source_turn == 8
+
+
+def test_inherited_data_layer_api_works(tmp_path: Path):
+    layer = SQLiteDataLayer(storage_dir=tmp_path)
+    layer._save_users(USERS)
+    asyncio.run(layer.update_thread("t1", user_id="user-1", name="hi"))
+    layer._append_thread_events("t1", [{"op": "message", "item": {"role": "user", "content": "hello"}}])
+    layer._save_thread("t2", {"created_at": "2026-01-01T00:00:00+00:00"})
+
+    assert layer.rebuild_index() == 2
+    entry = layer._index_entries()["t1"]
+    assert (entry["name"], entry["user_identifier"], entry["message_count"]) == ("hi", "testuser", 1)
+    layer._compact_thread("t1")
+    assert [m["content"] for m in layer._load_thread("t1")["messages"]] == ["hello"]
+    assert asyncio.run(layer.get_thread("t1"))["userIdentifier"] == "testuser"
+    assert layer._get_thread_data("t3", create_if_missing=True)["messages"] == []
+    assert not (tmp_path / "_index.jsonl").exists()